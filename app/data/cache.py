@@ -0,0 +1,284 @@
+"""
+Process-wide query result cache shared by every dashboard page.
+
+Entries are keyed by (query, params, versions of the tables it reads).
+A table's version has two parts. The first is a counter in this process:
+every data-layer write calls bump_table_version(table), which drops the
+entries that read that table at once. The second is the table's
+fingerprint in the database file (schema.table_fingerprint), so writes
+from other processes also invalidate entries. Those writers include
+main.py, ingest, migrations and a second server. The fingerprint is only
+recomputed after PRAGMA data_version reports a commit, so a hit costs one
+PRAGMA.
+
+An entry whose database can't be read (missing file or table, in-memory
+connection) expires after VERSION_TTL seconds instead. Unchanged data
+stays cached until it is evicted (least recently used first) to keep the
+cache under its entry and byte caps.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import pandas as pd
+from app.data.db import DB_PATH
+from app.data.schema import table_fingerprint
+
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 1024 * 1024
+VERSION_TTL = 30.0   # seconds an entry lives when its tables can't be fingerprinted
+
+
+def _freeze(value):
+    """Turn dicts/lists/sets (e.g. filter selections) into hashable tuples."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+def _sizeof(value):
+    """Approximate memory held by a cached result, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    """Hand out copies of DataFrames so callers cannot mutate the cache."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+
+class _DatabaseWatch:
+    """
+    Read-only connection to one database file that fingerprints tables.
+    PRAGMA data_version changes whenever another connection, in any
+    process, commits. Fingerprints are kept until that happens.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._data_version = None
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def fingerprints(self, tables):
+        """Return a tuple of fingerprints for tables, or None if the file can't be read."""
+        with self._lock:
+            try:
+                if self._conn is None:
+                    uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+                    self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                (data_version,) = self._conn.execute("PRAGMA data_version").fetchone()
+                if data_version != self._data_version:
+                    self._fingerprints.clear()
+                    self._data_version = data_version
+                for table in tables:
+                    if table not in self._fingerprints:
+                        self._fingerprints[table] = table_fingerprint(self._conn, table)
+                return tuple(self._fingerprints[t] for t in tables)
+            except sqlite3.Error:
+                return None
+
+
+class QueryCache:
+    """
+    Thread-safe LRU of query results with per-table versions (a local
+    write counter plus the table's fingerprint in db_path).
+    Results larger than max_bytes are returned but not stored.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, db_path=DB_PATH):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self._entries = OrderedDict()   # key -> (value, size, tables, expires)
+        self._versions = {}
+        self._watches = {}
+        self._seen = {}                 # (db path, table) -> last fingerprint
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def version(self, table):
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def bump(self, *tables):
+        """Record a write to tables and drop the entries that read them."""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            self._drop(tables)
+
+    def _drop(self, tables):
+        stale = [key for key, (_, _, deps, _) in self._entries.items()
+                 if any(t in deps for t in tables)]
+        for key in stale:
+            self._discard(key)
+        self._stats["invalidations"] += len(stale)
+
+    def _fingerprints(self, tables, db_path):
+        """Fingerprints of tables in db_path; None when they can't be read."""
+        if not tables:
+            return ()
+        path = os.path.abspath(db_path)
+        with self._lock:
+            if path not in self._watches:
+                self._watches[path] = _DatabaseWatch(path)
+            watch = self._watches[path]
+        fingerprints = watch.fingerprints(tables)
+        if fingerprints is not None:
+            with self._lock:
+                # Another process wrote: drop what this one cached for the table.
+                moved = [t for t, fp in zip(tables, fingerprints)
+                         if self._seen.get((path, t), fp) != fp]
+                self._seen.update(((path, t), fp) for t, fp in zip(tables, fingerprints))
+                self._drop(moved)
+        return fingerprints
+
+    def get_or_compute(self, key, tables, compute, db_path=None):
+        """
+        Return the cached result for key at the current versions of tables
+        (read from db_path, default self.db_path), calling compute() on a miss.
+        """
+        tables = tuple(tables)
+        db_path = self.db_path if db_path is None else db_path
+        fingerprints = self._fingerprints(tables, db_path)
+        with self._lock:
+            local = tuple((t, self._versions.get(t, 0)) for t in tables)
+            full_key = (_freeze(key), local, fingerprints)
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[3] is not None and entry[3] < time.monotonic():
+                self._discard(full_key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(full_key)
+                self._stats["hits"] += 1
+                return _copy(entry[0])
+            self._stats["misses"] += 1
+
+        value = compute()
+        size = _sizeof(value)
+        current_fingerprints = self._fingerprints(tables, db_path)
+        with self._lock:
+            # A write that landed while computing has already moved the
+            # version on; storing under the old key would only waste space.
+            current = tuple((t, self._versions.get(t, 0)) for t in tables)
+            if size <= self.max_bytes and (current, current_fingerprints) == full_key[1:]:
+                if full_key in self._entries:
+                    self._discard(full_key)
+                expires = time.monotonic() + VERSION_TTL if fingerprints is None else None
+                self._entries[full_key] = (value, size, tables, expires)
+                self._bytes += size
+                self._evict()
+        return _copy(value)
+
+    def _discard(self, key):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._discard(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+_cache = QueryCache()
+
+
+def get_query_cache():
+    """Return the process-wide QueryCache."""
+    return _cache
+
+
+def table_version(table):
+    return _cache.version(table)
+
+
+def bump_table_version(*tables):
+    """Call after committing a write to tables."""
+    _cache.bump(*tables)
+
+
+def clear_query_cache():
+    _cache.clear()
+
+
+def query_cache_stats():
+    return _cache.stats()
+
+
+def _database_file(conn):
+    """Path of conn's main database file, or "" for an in-memory database."""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return path
+    return ""
+
+
+def cached_query(conn, query, params=(), tables=()):
+    """pd.read_sql_query through the shared cache; tables are those query reads."""
+    # An in-memory database has no file to fingerprint; its entries use the TTL.
+    db_path = _database_file(conn) or ":memory:"
+    return _cache.get_or_compute(
+        ("sql", query, params), tables, lambda: pd.read_sql_query(query, conn, params=params),
+        db_path=db_path,
+    )
+
+
+def cached_call(tables, fn, *args, **kwargs):
+    """
+    Memoize fn(*args, **kwargs) in the shared cache; tables are the source
+    tables the call reads, in DB_PATH. A rollup counts as its source table,
+    since triggers update it in the same transaction.
+    """
+    key = (fn.__module__, fn.__qualname__, args, kwargs)
+    return _cache.get_or_compute(key, tables, lambda: fn(*args, **kwargs))
+
+
+def cached_read_csv(path, prepare=None, **kwargs):
+    """
+    pd.read_csv through the shared cache, keyed by the file's mtime and size.
+    With prepare, prepare(frame) is cached instead of the frame as read, so
+    it runs once per change of the file (keyed by prepare's qualified name).
+    """
+    st = os.stat(path)
+    step = None if prepare is None else (prepare.__module__, prepare.__qualname__)
+    key = ("csv", os.path.abspath(path), st.st_mtime_ns, st.st_size, step, kwargs)
+
+    def read():
+        df = pd.read_csv(path, **kwargs)
+        return df if prepare is None else prepare(df)
+    return _cache.get_or_compute(key, (), read)
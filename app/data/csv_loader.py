@@ -0,0 +1,40 @@
+import time
+from pathlib import Path
+import pandas as pd
+from app.data.cache import bump_table_version
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def stream_csv_to_table(conn, csv_path, table_name, transform, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Load a CSV into table_name chunk by chunk.
+
+    Only one chunk of `chunksize` rows is held in memory at a time, so peak
+    memory does not depend on the file size. `transform` receives each raw
+    chunk and must return a DataFrame whose columns match the table; every
+    chunk is written and committed in its own transaction.
+    Prints progress (by bytes read) and throughput after each chunk.
+    """
+    csv_path = Path(csv_path)
+    total_bytes = csv_path.stat().st_size or 1
+    total_rows = 0
+    start = time.perf_counter()
+
+    with open(csv_path, "rb") as fh:
+        for i, chunk in enumerate(pd.read_csv(fh, chunksize=chunksize), start=1):
+            df = transform(chunk)
+            with conn:
+                df.to_sql(name=table_name, con=conn, if_exists="append", index=False)
+            total_rows += len(df)
+            bump_table_version(table_name)
+
+            elapsed = time.perf_counter() - start
+            rate = total_rows / elapsed if elapsed > 0 else 0.0
+            pct = min(100.0, fh.tell() * 100 / total_bytes)
+            print(f"   chunk {i}: {total_rows} rows ({pct:.0f}% of {csv_path.name}, {rate:.0f} rows/s)")
+
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Streamed {total_rows} rows into '{table_name}' in {elapsed:.2f}s ({rate:.0f} rows/s).")
+    return total_rows
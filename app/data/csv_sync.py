@@ -0,0 +1,384 @@
+"""
+Idempotent CSV -> table sync.
+
+load_csv_to_table_*() append every CSV row on every run. sync_csv()
+instead keys each row by its natural id (incident_id, ticket_id,
+dataset_id) and only writes rows that are new or whose content changed:
+
+  - sync_files holds each source file's fingerprint (size, mtime, SHA-256)
+    and a checkpoint (rows done, status). A file whose size and mtime, or
+    failing that content hash, match a completed sync is skipped unread.
+  - sync_rows maps (table, natural id) to the row's content hash and the
+    id of the row it was written to.
+
+Rows are upserted in batches, one transaction per batch, and the
+checkpoint is advanced in the same transaction, so an interrupted sync
+resumes after the last committed batch. On a table's first sync, rows
+already loaded by the old append loaders are adopted (matched on
+SYNC_SOURCES[...]["match"]) instead of inserted again.
+
+Usage:
+    python -m app.data.csv_sync              # sync every CSV in SYNC_SOURCES
+    python -m app.data.csv_sync --force      # re-check files even if unchanged
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.data.cache import bump_table_version
+from app.data.db import DB_PATH, connect_database
+from app.data.datasets import _prepare_datasets_frame
+from app.data.incidents import _prepare_incidents_frame
+from app.data.tickets import _prepare_tickets_frame
+
+DEFAULT_BATCH_SIZE = 5000
+_IN_CHUNK = 500          # host parameters per IN (...) lookup
+
+# Per table: source CSV, natural id column, CSV -> table transform and the
+# table columns that identify a row loaded before sync existed.
+SYNC_SOURCES = {
+    "cyber_incidents": {
+        "csv": Path("DATA") / "cyber_incidents.csv",
+        "natural_id": "incident_id",
+        "transform": _prepare_incidents_frame,
+        "match": ("date", "incident_type", "description"),
+    },
+    "datasets_metadata": {
+        "csv": Path("DATA") / "datasets_metadata.csv",
+        "natural_id": "dataset_id",
+        "transform": _prepare_datasets_frame,
+        "match": ("dataset_name",),
+    },
+    "it_tickets": {
+        "csv": Path("DATA") / "it_tickets.csv",
+        "natural_id": "ticket_id",
+        "transform": _prepare_tickets_frame,
+        "match": ("ticket_id",),
+    },
+}
+
+SYNC_TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS sync_files (
+        table_name TEXT NOT NULL,
+        path TEXT NOT NULL,
+        size INTEGER,
+        mtime_ns INTEGER,
+        sha256 TEXT,
+        rows_done INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'running',
+        inserted INTEGER NOT NULL DEFAULT 0,
+        updated INTEGER NOT NULL DEFAULT 0,
+        unchanged INTEGER NOT NULL DEFAULT 0,
+        synced_at TEXT,
+        PRIMARY KEY (table_name, path)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sync_rows (
+        table_name TEXT NOT NULL,
+        natural_id TEXT NOT NULL,
+        row_hash TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        PRIMARY KEY (table_name, natural_id)
+    ) WITHOUT ROWID
+    """,
+]
+
+
+def create_sync_tables(conn):
+    """Create the sync metadata tables (run by migration 5)."""
+    for sql in SYNC_TABLES_SQL:
+        conn.execute(sql)
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _text(value):
+    """Compare ids and match keys as text: 2000, 2000.0 and '2000' agree."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+_MISSING = "\x00"         # hashed in place of NULL, so NULL and '' differ
+
+
+def _hash_text(col):
+    """
+    One column as text for row_hashes(), independent of the dtype pandas
+    inferred for the chunk: 5, 5.0 and '5' all become '5'.
+    """
+    missing = col.isna().to_numpy()
+    if pd.api.types.is_float_dtype(col):
+        values = col.to_numpy(dtype="float64", na_value=np.nan)
+        text = col.astype(str).to_numpy(dtype=object)
+        whole = ~missing & (np.mod(values, 1) == 0) & (np.abs(values) < 2 ** 53)
+        text[whole] = values[whole].astype("int64").astype(str)
+    elif pd.api.types.is_object_dtype(col):
+        text = np.array([_text(v) for v in col.to_numpy()], dtype=object)
+    else:
+        text = col.astype(str).to_numpy(dtype=object)
+    text[missing] = _MISSING
+    return text
+
+
+def row_hashes(df):
+    """Per-row content hash of a transformed frame, as 16-digit hex text."""
+    text = pd.DataFrame({i: _hash_text(df[c]) for i, c in enumerate(df.columns)})
+    hashes = pd.util.hash_pandas_object(text, index=False)
+    return [f"{h:016x}" for h in hashes]
+
+
+def _sql_rows(df):
+    """Frame rows as tuples with NaN/NaT turned into None."""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def _known_rows(conn, table, natural_ids):
+    """Return {natural_id: (row_hash, row_id)} for ids already synced."""
+    known = {}
+    for i in range(0, len(natural_ids), _IN_CHUNK):
+        part = natural_ids[i:i + _IN_CHUNK]
+        rows = conn.execute(
+            "SELECT natural_id, row_hash, row_id FROM sync_rows "
+            f"WHERE table_name = ? AND natural_id IN ({', '.join('?' for _ in part)})",
+            [table, *part],
+        ).fetchall()
+        known.update((nid, (h, rid)) for nid, h, rid in rows)
+    return known
+
+
+def _adoptable_rows(conn, table, match):
+    """
+    {match key: [row ids]} for rows not yet claimed by a natural id, oldest
+    first. Loaded once per sync, and only if some CSV row is not yet known.
+    """
+    cols = ", ".join(f"t.{c}" for c in match)
+    rows = conn.execute(
+        f"SELECT t.id, {cols} FROM {table} t "
+        "WHERE NOT EXISTS (SELECT 1 FROM sync_rows s WHERE s.table_name = ? AND s.row_id = t.id) "
+        "ORDER BY t.id",
+        (table,),
+    ).fetchall()
+    adoptable = {}
+    for row_id, *key in rows:
+        adoptable.setdefault(tuple(_text(v) for v in key), []).append(row_id)
+    return adoptable
+
+
+def _checkpoint(conn, table, path, fingerprint, **fields):
+    size, mtime_ns, sha256 = fingerprint
+    conn.execute(
+        """
+        INSERT INTO sync_files (table_name, path, size, mtime_ns, sha256, rows_done, status,
+                                inserted, updated, unchanged, synced_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+        ON CONFLICT (table_name, path) DO UPDATE SET
+            size = excluded.size, mtime_ns = excluded.mtime_ns, sha256 = excluded.sha256,
+            rows_done = excluded.rows_done, status = excluded.status,
+            inserted = excluded.inserted, updated = excluded.updated,
+            unchanged = excluded.unchanged, synced_at = excluded.synced_at
+        """,
+        (table, path, size, mtime_ns, sha256, fields["rows_done"], fields["status"],
+         fields["inserted"], fields["updated"], fields["unchanged"]),
+    )
+
+
+def prepare_batch(table, chunk):
+    """
+    Transform one raw CSV chunk into the rows to upsert: natural ids, table
+    columns, row values and content hashes. Pure, so it can run in a
+    worker process; write_batch() applies the result.
+    """
+    spec = SYNC_SOURCES[table]
+    ids = [_text(v) for v in chunk[spec["natural_id"]]]
+    frame = spec["transform"](chunk).reset_index(drop=True)
+    keep = ~pd.Series(ids).duplicated(keep="last").to_numpy()  # last row wins per id
+    frame = frame[keep].reset_index(drop=True)
+    return {
+        "ids": [nid for nid, k in zip(ids, keep) if k],
+        "columns": list(frame.columns),
+        "values": _sql_rows(frame),
+        "hashes": row_hashes(frame),
+        "rows": len(chunk),
+    }
+
+
+def write_batch(conn, table, batch, report, state):
+    """Upsert one prepared batch; the caller wraps it in a transaction."""
+    spec = SYNC_SOURCES[table]
+    ids, columns = batch["ids"], batch["columns"]
+    known = _known_rows(conn, table, [nid for nid in ids if nid is not None])
+
+    insert_sql = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                  f"VALUES ({', '.join('?' for _ in columns)})")
+    update_sql = f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?"
+    updates, index_rows = [], []
+    for nid, row_hash, row in zip(ids, batch["hashes"], batch["values"]):
+        if nid is None:
+            report["errors"] += 1
+            continue
+        if nid in known:
+            old_hash, row_id = known[nid]
+            if old_hash == row_hash:
+                report["unchanged"] += 1
+                continue
+            updates.append((*row, row_id))
+            report["updated"] += 1
+        else:
+            if state.get("adoptable") is None:
+                state["adoptable"] = _adoptable_rows(conn, table, spec["match"])
+            key = tuple(_text(row[columns.index(c)]) for c in spec["match"])
+            candidates = state["adoptable"].get(key)
+            if candidates:
+                row_id = candidates.pop(0)
+                updates.append((*row, row_id))
+                report["adopted"] += 1
+            else:
+                row_id = conn.execute(insert_sql, row).lastrowid
+                report["inserted"] += 1
+        index_rows.append((table, nid, row_hash, row_id))
+
+    if updates:
+        conn.executemany(update_sql, updates)
+    conn.executemany(
+        """
+        INSERT INTO sync_rows (table_name, natural_id, row_hash, row_id) VALUES (?, ?, ?, ?)
+        ON CONFLICT (table_name, natural_id) DO UPDATE SET
+            row_hash = excluded.row_hash, row_id = excluded.row_id
+        """,
+        index_rows,
+    )
+
+
+def new_report(table, csv_path):
+    return {"table": table, "file": str(csv_path), "status": "missing", "rows": 0,
+            "inserted": 0, "adopted": 0, "updated": 0, "unchanged": 0, "errors": 0,
+            "seconds": 0.0}
+
+
+def plan_file(conn, table, csv_path, force=False):
+    """
+    Decide what a sync of csv_path needs. Returns (status, fingerprint,
+    resume_rows): status "missing", "skipped" (unchanged since its last
+    complete sync) or "sync", resuming after resume_rows rows when an
+    earlier sync of the same content was interrupted.
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        return "missing", None, 0
+    key = str(csv_path.resolve())
+    stat = csv_path.stat()
+    stored = conn.execute(
+        "SELECT size, mtime_ns, sha256, rows_done, status FROM sync_files "
+        "WHERE table_name = ? AND path = ?",
+        (table, key),
+    ).fetchone()
+
+    if stored and not force and stored[4] == "complete" and stored[:2] == (stat.st_size, stat.st_mtime_ns):
+        return "skipped", None, 0
+    sha256 = file_sha256(csv_path)
+    fingerprint = (stat.st_size, stat.st_mtime_ns, sha256)
+    if stored and not force and stored[4] == "complete" and stored[2] == sha256:
+        with conn:  # touched but identical: remember the new mtime
+            conn.execute("UPDATE sync_files SET size = ?, mtime_ns = ? WHERE table_name = ? AND path = ?",
+                         (stat.st_size, stat.st_mtime_ns, table, key))
+        return "skipped", fingerprint, 0
+    resume = stored[3] if stored and stored[4] == "running" and stored[2] == sha256 else 0
+    return "sync", fingerprint, resume
+
+
+def record_progress(conn, table, csv_path, fingerprint, report, rows_done, complete=False):
+    """Advance the file's checkpoint; call inside the batch's transaction."""
+    _checkpoint(conn, table, str(Path(csv_path).resolve()), fingerprint,
+                rows_done=rows_done, status="complete" if complete else "running",
+                inserted=report["inserted"], updated=report["updated"] + report["adopted"],
+                unchanged=report["unchanged"])
+
+
+def read_chunks(csv_path, batch_size=DEFAULT_BATCH_SIZE, resume=0):
+    """Yield raw CSV chunks, skipping the first `resume` data rows."""
+    skip = range(1, resume + 1) if resume else None
+    yield from pd.read_csv(csv_path, chunksize=batch_size, skiprows=skip)
+
+
+def sync_csv(conn, table, csv_path=None, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """
+    Sync one CSV into table. Returns a report dict with the file status
+    ("skipped", "synced" or "missing") and inserted / adopted / updated /
+    unchanged row counts.
+    """
+    csv_path = Path(csv_path or SYNC_SOURCES[table]["csv"])
+    report = new_report(table, csv_path)
+    start = time.perf_counter()
+    status, fingerprint, resume = plan_file(conn, table, csv_path, force)
+    if status == "missing":
+        print(f"⚠️  File not found: {csv_path}")
+    if status != "sync":
+        report["status"] = status
+        return report
+
+    state = {}
+    rows_done = resume
+    for chunk in read_chunks(csv_path, batch_size, resume):
+        batch = prepare_batch(table, chunk)
+        with conn:
+            write_batch(conn, table, batch, report, state)
+            rows_done += batch["rows"]
+            record_progress(conn, table, csv_path, fingerprint, report, rows_done)
+        bump_table_version(table)
+
+    with conn:
+        record_progress(conn, table, csv_path, fingerprint, report, rows_done, complete=True)
+    report.update(status="synced", rows=rows_done, seconds=time.perf_counter() - start)
+    return report
+
+
+def sync_all(conn, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """Sync every source in SYNC_SOURCES and print one line per file."""
+    reports = []
+    for table in SYNC_SOURCES:
+        report = sync_csv(conn, table, batch_size=batch_size, force=force)
+        if report["status"] == "skipped":
+            print(f"✅ {table}: {Path(report['file']).name} unchanged, skipped.")
+        elif report["status"] == "synced":
+            print(f"✅ {table}: {report['inserted']} inserted, {report['updated']} updated, "
+                  f"{report['adopted']} adopted, {report['unchanged']} unchanged "
+                  f"({report['seconds']:.2f}s).")
+        reports.append(report)
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync the CSV sources into the database.")
+    parser.add_argument("--db", default=str(DB_PATH), help="database file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--force", action="store_true", help="re-check files even if unchanged")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    try:
+        create_sync_tables(conn)
+        reports = sync_all(conn, batch_size=args.batch_size, force=args.force)
+    finally:
+        conn.close()
+    return 1 if any(r["errors"] for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,64 @@
 import pandas as pd
 from pathlib import Path
-from app.data.db import connect_database
-from app.data.datasets import insert_dataset_metadata
+from app.data.cache import bump_table_version
+from app.data.csv_loader import stream_csv_to_table
+from app.data.db import pooled_connection, transaction
+from app.data.schema import table_exists
+
+# Analytical queries live at module level so app.data.migrations can
+# EXPLAIN them and catch full table scans. The category counts read
+# dataset_rollup (migration 4), which triggers keep in step; the _BASE_
+# variant groups datasets_metadata itself for databases without it.
+DATASETS_BY_CATEGORY_QUERY = """
+    SELECT category, n AS count
+    FROM dataset_rollup
+    ORDER BY count DESC
+"""
+
+DATASETS_BY_CATEGORY_BASE_QUERY = """
+    SELECT category, COUNT(*) AS count
+    FROM datasets_metadata
+    GROUP BY category
+    ORDER BY count DESC
+"""
+
+# DATE(last_updated) matches the expression index idx_datasets_updated_day.
+DATASETS_RECENTLY_UPDATED_QUERY = """
+    SELECT dataset_name, last_updated
+    FROM datasets_metadata
+    WHERE DATE(last_updated) >= DATE('now', ?)
+    ORDER BY last_updated DESC
+"""
 
 
 def insert_dataset_metadata(dataset_name, category, source, last_updated,
                             record_count=None, file_size_mb=None):
     """Insert new dataset metadata record."""
     
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO datasets_metadata
-        (dataset_name, category, source, last_updated,
-         record_count, file_size_mb)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (dataset_name, category, source, last_updated,
-          record_count, file_size_mb))
-
-    conn.commit()
-    record_id = cursor.lastrowid
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT INTO datasets_metadata
+            (dataset_name, category, source, last_updated,
+             record_count, file_size_mb)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (dataset_name, category, source, last_updated,
+              record_count, file_size_mb))
+
+        record_id = cursor.lastrowid
+    bump_table_version("datasets_metadata")
     return record_id
 
 
 
 def get_all_datasets_metadata():
     """Return all dataset metadata records as a DataFrame."""
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM datasets_metadata ORDER BY id DESC",
-        conn
-    )
-    conn.close()
+    with pooled_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM datasets_metadata ORDER BY id DESC",
+            conn
+        )
     return df
 
 
@@ -48,6 +73,7 @@ def update_dataset_metadata(conn, dataset_id, field, new_value):
     cursor.execute(query, (new_value, dataset_id))
 
     conn.commit()
+    bump_table_version("datasets_metadata")
     return cursor.rowcount
 
 
@@ -57,19 +83,16 @@ def delete_dataset_metadata(conn, dataset_id):
     cursor = conn.cursor()
     cursor.execute("DELETE FROM datasets_metadata WHERE id = ?", (dataset_id,))
     conn.commit()
+    bump_table_version("datasets_metadata")
     return cursor.rowcount
 
 
 
 def count_datasets_by_category(conn):
     """Count datasets grouped by category."""
-    query = """
-    SELECT category, COUNT(*) AS count
-    FROM datasets_metadata
-    GROUP BY category
-    ORDER BY count DESC
-    """
-    return pd.read_sql_query(query, conn)
+    if table_exists(conn, "dataset_rollup"):
+        return pd.read_sql_query(DATASETS_BY_CATEGORY_QUERY, conn)
+    return pd.read_sql_query(DATASETS_BY_CATEGORY_BASE_QUERY, conn)
 
 
 def count_large_datasets(conn, min_rows=100000):
@@ -85,60 +108,11 @@ def count_large_datasets(conn, min_rows=100000):
 
 def datasets_recently_updated(conn, days=90):
     """Return datasets updated within last X days."""
-    query = f"""
-    SELECT dataset_name, last_updated
-    FROM datasets_metadata
-    WHERE DATE(last_updated) >= DATE('now', '-{days} days')
-    ORDER BY last_updated DESC
-    """
-    return pd.read_sql_query(query, conn)
-
-import sqlite3
-from pathlib import Path
-
-DB_PATH = Path("DATA/intelligence_platform.db")
-
-
-def insert_dataset_metadata(
-    name: str,
-    source: str,
-    description: str,
-    owner: str,
-    created_date: str
-):
-    """
-    Insert a new dataset metadata record into the database.
-    """
-
-    if not DB_PATH.exists():
-        raise FileNotFoundError("Database file not found.")
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute(
-        """
-        INSERT INTO datasets_metadata
-        (name, source, description, owner, created_date)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (name, source, description, owner, created_date)
-    )
-
-    conn.commit()
-    conn.close()
-
-def load_csv_to_table_datasets_metadata(conn, csv_path, table_name):
-    """Load dataset metadata CSV into the database."""
-
-    csv_path = Path(csv_path)
-
-    if not csv_path.exists():
-        print(f"⚠️ File not found: {csv_path}")
-        return 0
-
-    df = pd.read_csv(csv_path)
+    return pd.read_sql_query(DATASETS_RECENTLY_UPDATED_QUERY, conn,
+                             params=(f"-{int(days)} days",))
 
+def _prepare_datasets_frame(df):
+    """Rename CSV columns to the datasets_metadata schema and fill defaults."""
     # Rename CSV → DB schema
     df = df.rename(columns={
         "name": "dataset_name",
@@ -160,7 +134,27 @@ def load_csv_to_table_datasets_metadata(conn, csv_path, table_name):
         "last_updated", "record_count", "file_size_mb"
     ]
 
-    df = df[required_cols]
+    return df[required_cols]
+
+
+def load_csv_to_table_datasets_metadata(conn, csv_path, table_name, chunksize=None):
+    """
+    Load dataset metadata CSV into the database.
+    Pass chunksize to stream the file in chunks (bounded memory).
+    """
+
+    csv_path = Path(csv_path)
+
+    if not csv_path.exists():
+        print(f"⚠️ File not found: {csv_path}")
+        return 0
+
+    if chunksize:
+        return stream_csv_to_table(conn, csv_path, table_name, _prepare_datasets_frame, chunksize)
+
+    df = pd.read_csv(csv_path)
+
+    df = _prepare_datasets_frame(df)
 
     # Load into database
     df.to_sql(
@@ -169,6 +163,7 @@ def load_csv_to_table_datasets_metadata(conn, csv_path, table_name):
         if_exists="append",
         index=False
     )
+    bump_table_version(table_name)
 
     print(f"✅ Loaded {len(df)} rows into '{table_name}'.")
     return len(df)
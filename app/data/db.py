@@ -1,10 +1,528 @@
+import json
+import logging
+import logging.handlers
+import os
+import re
 import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 
+from app.data.metrics import LatencyHistogram
+
 DB_PATH = Path("DATA") / "intelligence_platform.db"
 
-def connect_database(db_path=DB_PATH):
+# Pragmas applied to every connection we hand out.
+# WAL lets dashboard readers run while a writer commits, and NORMAL sync is
+# safe under WAL (only the last transaction can be lost on power failure).
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,        # negative = KiB, so ~20 MB page cache
+    "mmap_size": 268435456,      # 256 MB memory-mapped I/O
+    "busy_timeout": 5000,        # ms to wait on a locked database
+    "temp_store": "MEMORY",
+}
+
+POOL_SIZE = 8
+POOL_TIMEOUT = 10.0
+
+
+# Query instrumentation (off by default). When on, connections are opened as
+# InstrumentedConnection and every statement is timed from execute() until
+# its rows have been read. DB_QUERY_STATS=1 enables it at import time,
+# enable_query_stats() at runtime.
+QUERY_STATS_ENABLED = os.environ.get("DB_QUERY_STATS", "") == "1"
+SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = Path(os.environ.get("DB_SLOW_QUERY_LOG", Path("DATA") / "slow_queries.log"))
+SLOW_QUERY_LOG_BYTES = 5 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 3
+SLOW_QUERY_LOG_PARAMS = False       # parameters may hold password hashes
+QUERY_STATS_MAX_KEYS = 500          # (caller, statement) pairs kept in memory
+
+# Frames from these modules are skipped when looking for the calling helper.
+_LIBRARY_MODULES = ("pandas", "sqlite3", "contextlib", "numpy", "sqlalchemy")
+
+_query_stats = {}                   # (caller, statement) -> counters + LatencyHistogram
+_query_stats_lock = threading.Lock()
+_slow_logger = None
+_slow_logger_lock = threading.Lock()
+
+
+def _caller():
+    """'module.function' of the innermost frame outside db.py and the libraries."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module != __name__ and not module.startswith(_LIBRARY_MODULES):
+            if module == "__main__":
+                module = Path(frame.f_code.co_filename).stem
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def _statement(sql):
+    """Collapse whitespace so the same statement always gets the same key."""
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def _get_slow_logger():
+    global _slow_logger
+    with _slow_logger_lock:
+        if _slow_logger is None:
+            SLOW_QUERY_LOG.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_BYTES,
+                backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("app.data.slow_queries")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.handlers = [handler]
+            _slow_logger = logger
+        return _slow_logger
+
+
+def _explain(conn, sql, params):
+    """EXPLAIN QUERY PLAN detail lines, run on a plain (uninstrumented) cursor."""
+    try:
+        cur = sqlite3.Cursor(conn)
+        return [row[3] for row in cur.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+    except (sqlite3.Error, ValueError) as e:
+        return [f"unavailable: {e}"]
+
+
+def _log_slow(query, ms, conn):
+    entry = {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "ms": round(ms, 2),
+        "rows": query["rows"],
+        "caller": query["caller"],
+        "sql": _statement(query["sql"]),
+        "plan": _explain(conn, query["sql"], query["params"]) if query["params"] is not None else [],
+    }
+    if SLOW_QUERY_LOG_PARAMS and query["params"] is not None:
+        entry["params"] = [repr(p)[:100] for p in query["params"]]
+    try:
+        _get_slow_logger().info(json.dumps(entry))
+    except OSError as e:
+        print(f"⚠️  Slow query not logged: {e}")
+
+
+def _record(query, conn):
+    ms = query["seconds"] * 1000
+    key = (query["caller"], _statement(query["sql"]))
+    with _query_stats_lock:
+        entry = _query_stats.get(key)
+        if entry is None:
+            if len(_query_stats) >= QUERY_STATS_MAX_KEYS:
+                key = (query["caller"], "(other statements)")
+                entry = _query_stats.get(key)
+            if entry is None:
+                entry = _query_stats[key] = {"histogram": LatencyHistogram(), "rows": 0, "slow": 0, "errors": 0}
+        entry["rows"] += query["rows"]
+        entry["errors"] += query["error"]
+        entry["slow"] += ms >= SLOW_QUERY_MS
+    entry["histogram"].observe(ms)
+    if ms >= SLOW_QUERY_MS and not query["error"]:
+        _log_slow(query, ms, conn)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor that records latency, rows and caller for each statement.
+
+    A SELECT is only complete once its rows are read, so the clock covers
+    execute() plus every fetch; the record is closed when the rows run out,
+    the cursor is closed or reused, or its connection runs another statement,
+    is closed or goes back to the pool (a result read only partly, as in
+    execute(...).fetchone(), is recorded then). Nothing is recorded from
+    __del__, so garbage collection never logs or runs EXPLAIN.
+    """
+
+    _query = None
+
+    def _start(self, sql, params):
+        self._finish()
+        self.connection.flush_queries()
+        self._query = {"sql": sql, "params": params, "caller": _caller(),
+                       "seconds": 0.0, "rows": 0, "error": False}
+        self.connection._pending[id(self._query)] = self._query
+
+    def _finish(self):
+        query, self._query = self._query, None
+        if query is not None and self.connection._pending.pop(id(query), None) is not None:
+            _record(query, self.connection)
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        except sqlite3.Error:
+            if self._query is not None:
+                self._query["error"] = True
+            raise
+        finally:
+            if self._query is not None:
+                self._query["seconds"] += time.perf_counter() - start
+
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        try:
+            self._timed(super().execute, sql, parameters)
+        finally:
+            if self._query["error"] or self.description is None:  # no result rows to wait for
+                self._query["rows"] = max(self.rowcount, 0)
+                self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._start(sql, None)   # no single parameter set to EXPLAIN with
+        try:
+            self._timed(super().executemany, sql, seq_of_parameters)
+        finally:
+            self._query["rows"] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if self._query is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._query["rows"] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        if self._query is not None:
+            self._query["rows"] += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._query is not None:
+            self._query["rows"] += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._query is not None:
+            self._query["rows"] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including conn.execute() shortcuts, are instrumented."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = {}          # id(query) -> statements whose rows are not read to the end
+
+    def flush_queries(self):
+        """Record the statements still open on this connection's cursors."""
+        while self._pending:
+            _record(self._pending.popitem()[1], self)
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C-level shortcuts bypass Python cursor methods, so route them through cursor().
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        self.flush_queries()
+        super().close()
+
+
+def connect_database(db_path=DB_PATH, check_same_thread=True):
     """Connect to SQLite database."""
-    return sqlite3.connect(str(db_path))
+    factory = InstrumentedConnection if QUERY_STATS_ENABLED else sqlite3.Connection
+    conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread, factory=factory)
+    for name, value in PRAGMAS.items():
+        sqlite3.Connection.execute(conn, f"PRAGMA {name} = {value}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections for one database file.
+
+    A thread checks a connection out for the duration of a `with` block.
+    Nested checkouts from the same thread reuse the connection it already
+    holds, so helpers can call each other without deadlocking the pool.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._created = 0
+        self._generation = 0        # bumped by close(); older connections are not reused
+        self._born = {}             # id(conn) -> generation it was opened in
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "wait_time": 0.0, "timeouts": 0}
+
+    def _acquire(self):
+        start = time.perf_counter()
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    self._stats["hits"] += 1
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    self._created += 1
+                    self._stats["misses"] += 1
+                    conn = None
+                    break
+                remaining = self.timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise TimeoutError(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.max_size})."
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time"] += time.perf_counter() - start
+
+        if conn is None:
+            with self._cond:
+                generation = self._generation
+            try:
+                conn = connect_database(self.db_path, check_same_thread=False)
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._born[id(conn)] = generation
+        return conn
+
+    def _release(self, conn):
+        if isinstance(conn, InstrumentedConnection):
+            conn.flush_queries()
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            usable = True
+        except sqlite3.Error:   # e.g. ProgrammingError: the caller closed it
+            usable = False
+        with self._cond:
+            keep = usable and self._born.get(id(conn)) == self._generation
+            if keep:
+                self._idle.append(conn)
+            else:
+                self._born.pop(id(conn), None)
+                self._created -= 1
+            self._cond.notify()
+        if usable and not keep:
+            conn.close()         # opened before the last close()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the current thread."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Check out a connection and commit on success, roll back on error."""
+        with self.connection() as conn:
+            if getattr(self._local, "in_transaction", False):
+                # Joined an enclosing transaction; it decides commit/rollback.
+                yield conn
+                return
+            self._local.in_transaction = True
+            try:
+                yield conn
+            except Exception:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                self._local.in_transaction = False
+
+    def stats(self):
+        """Return a snapshot of the pool counters."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._created
+            stats["idle"] = len(self._idle)
+            stats["max_size"] = self.max_size
+        checkouts = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / checkouts if checkouts else 0.0
+        stats["avg_wait_ms"] = stats["wait_time"] * 1000 / stats["waits"] if stats["waits"] else 0.0
+        return stats
+
+    def close(self):
+        """
+        Close idle connections. Checked-out connections close on release,
+        and later checkouts open new ones, so the pool stays usable.
+        """
+        with self._cond:
+            self._generation += 1
+            while self._idle:
+                conn = self._idle.pop()
+                self._born.pop(id(conn), None)
+                conn.close()
+                self._created -= 1
+            self._cond.notify_all()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH):
+    """Return the process-wide pool for db_path, creating it on first use."""
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[key] = pool
+        return pool
+
+
+@contextmanager
+def pooled_connection(db_path=DB_PATH):
+    """
+    Borrow a pooled connection.
+    Example:
+        with pooled_connection() as conn:
+            df = pd.read_sql_query("SELECT * FROM it_tickets", conn)
+    """
+    with get_pool(db_path).connection() as conn:
+        yield conn
+
+
+@contextmanager
+def transaction(db_path=DB_PATH):
+    """Borrow a pooled connection inside a transaction (commit or rollback)."""
+    with get_pool(db_path).transaction() as conn:
+        yield conn
+
+
+def pool_stats(db_path=DB_PATH):
+    """Return hit/miss/wait counters for the pool serving db_path."""
+    return get_pool(db_path).stats()
+
+
+def enable_query_stats(slow_ms=None, log_path=None):
+    """
+    Instrument connections opened from now on. Idle pooled connections are
+    closed so the pools reopen them instrumented.
+    """
+    global QUERY_STATS_ENABLED, SLOW_QUERY_MS, SLOW_QUERY_LOG, _slow_logger
+    if slow_ms is not None:
+        SLOW_QUERY_MS = float(slow_ms)
+    if log_path is not None:
+        with _slow_logger_lock:
+            if _slow_logger is not None:
+                for handler in _slow_logger.handlers:
+                    handler.close()
+            SLOW_QUERY_LOG, _slow_logger = Path(log_path), None
+    if not QUERY_STATS_ENABLED:
+        QUERY_STATS_ENABLED = True
+        with _pools_lock:
+            pools = list(_pools.values())
+        for pool in pools:
+            pool.close()
+
+
+def disable_query_stats():
+    """Open plain connections again (idle pooled connections are closed)."""
+    global QUERY_STATS_ENABLED
+    if QUERY_STATS_ENABLED:
+        QUERY_STATS_ENABLED = False
+        with _pools_lock:
+            pools = list(_pools.values())
+        for pool in pools:
+            pool.close()
+
+
+def query_stats():
+    """
+    One dict per (caller, statement): count, rows, slow and error counts,
+    total time and latency percentiles, slowest in total first.
+    """
+    with _query_stats_lock:
+        items = list(_query_stats.items())
+    stats = []
+    for (caller, sql), entry in items:
+        summary = entry["histogram"].to_dict()
+        stats.append({
+            "caller": caller,
+            "sql": sql,
+            "rows": entry["rows"],
+            "slow": entry["slow"],
+            "errors": entry["errors"],
+            "total_ms": entry["histogram"].total_ms,
+            **summary,
+        })
+    return sorted(stats, key=lambda s: s["total_ms"], reverse=True)
+
+
+def dump_query_stats(path=None):
+    """Write query_stats() as JSON to path (default DATA/query_stats.json); returns the path."""
+    path = Path(path) if path is not None else Path("DATA") / "query_stats.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "slow_query_ms": SLOW_QUERY_MS,
+        "statements": query_stats(),
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return path
 
 
+def reset_query_stats():
+    with _query_stats_lock:
+        _query_stats.clear()
@@ -0,0 +1,149 @@
+"""
+Server-side filtering helpers for the dashboards.
+
+Sidebar filter state is turned into a parameterized WHERE clause so that
+filtering, KPIs, chart aggregates and paging all run inside SQLite and
+only the requested page of rows reaches pandas.
+"""
+
+import re
+from datetime import timedelta
+import pandas as pd
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_ORDER_BY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(?:\s+(?:ASC|DESC))?$", re.IGNORECASE)
+
+
+def _ident(name):
+    """Reject anything that is not a plain column/table name."""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return name
+
+
+def build_where(date_col=None, date_range=None, isin=None, ranges=None):
+    """
+    Build (sql, params) for the dashboard filters.
+
+    date_range: (start_date, end_date), inclusive, compared on date_col as
+                ISO text so an index on date_col can be used.
+    isin:       {column: [values]}; empty or None selections are ignored,
+                matching the pandas filters they replace.
+    ranges:     {column: (lo, hi)}, inclusive.
+    Returns ("", ()) when nothing is filtered.
+    """
+    clauses, params = [], []
+
+    if date_col and date_range is not None and len(date_range) == 2:
+        start, end = date_range
+        col = _ident(date_col)
+        clauses.append(f"{col} >= ? AND {col} < ?")
+        params += [start.isoformat(), (end + timedelta(days=1)).isoformat()]
+
+    for column, values in (isin or {}).items():
+        if values:
+            clauses.append(f"{_ident(column)} IN ({', '.join('?' for _ in values)})")
+            params += list(values)
+
+    for column, bounds in (ranges or {}).items():
+        if bounds is not None:
+            lo, hi = bounds
+            clauses.append(f"{_ident(column)} BETWEEN ? AND ?")
+            params += [lo, hi]
+
+    if not clauses:
+        return "", ()
+    return "WHERE " + " AND ".join(clauses), tuple(params)
+
+
+def fetch_page(conn, table, where="", params=(), order_by="id DESC", limit=100, offset=0):
+    """Return one page of matching rows as a DataFrame."""
+    if not _ORDER_BY.match(order_by):
+        raise ValueError(f"Invalid ORDER BY: {order_by!r}")
+    query = f"SELECT * FROM {_ident(table)} {where} ORDER BY {order_by} LIMIT ? OFFSET ?"
+    return pd.read_sql_query(query, conn, params=(*params, int(limit), int(offset)))
+
+
+def aggregate(conn, table, exprs, where="", params=()):
+    """
+    Evaluate named SQL aggregate expressions over the matching rows.
+    Example: aggregate(conn, "it_tickets", {"open": "SUM(status = 'Open')"})
+    Returns {name: value}.
+    """
+    select = ", ".join(f"{expr} AS {_ident(name)}" for name, expr in exprs.items())
+    row = conn.execute(f"SELECT {select} FROM {_ident(table)} {where}", params).fetchone()
+    return dict(zip(exprs, row))
+
+
+def count_by(conn, table, column, where="", params=(), count_expr="COUNT(*)"):
+    """
+    Return a DataFrame of [column, count] for the matching rows.
+    On a rollup table pass count_expr="SUM(n)" to add up the group counts.
+    """
+    col = _ident(column)
+    query = f"""
+        SELECT {col}, {count_expr} AS count
+        FROM {_ident(table)} {where}
+        GROUP BY {col}
+        ORDER BY count DESC
+    """
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def count_by_day(conn, table, date_col, where="", params=(), count_expr="COUNT(*)"):
+    """Return a DataFrame of [date, count] per calendar day of date_col."""
+    col = _ident(date_col)
+    query = f"""
+        SELECT substr({col}, 1, 10) AS date, {count_expr} AS count
+        FROM {_ident(table)} {where}
+        GROUP BY date
+        ORDER BY date
+    """
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def count_by_pair(conn, table, first, second, where="", params=(), count_expr="COUNT(*)"):
+    """Return a DataFrame of [first, second, count] for the matching rows."""
+    a, b = _ident(first), _ident(second)
+    query = f"SELECT {a}, {b}, {count_expr} AS count FROM {_ident(table)} {where} GROUP BY {a}, {b}"
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def distinct_values(conn, table, column):
+    """Return the sorted non-null distinct values of a column (filter options)."""
+    col = _ident(column)
+    rows = conn.execute(
+        f"SELECT DISTINCT {col} FROM {_ident(table)} WHERE {col} IS NOT NULL ORDER BY {col}"
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def value_bounds(conn, table, column):
+    """Return (min, max) of a column, e.g. for date pickers and sliders."""
+    col = _ident(column)
+    return conn.execute(f"SELECT MIN({col}), MAX({col}) FROM {_ident(table)}").fetchone()
+
+
+def histogram(conn, table, expr, where="", params=(), bins=25):
+    """
+    Bin a numeric SQL expression inside SQLite.
+    Returns a DataFrame of [bin_start, bin_end, count] with at most `bins`
+    rows, so only the bin counts leave the database.
+    """
+    scope = f"{where} AND" if where else "WHERE"
+    lo, hi = conn.execute(
+        f"SELECT MIN({expr}), MAX({expr}) FROM {_ident(table)} {scope} ({expr}) IS NOT NULL", params
+    ).fetchone()
+    if lo is None:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "count"])
+    width = (hi - lo) / bins or 1.0
+    query = f"""
+        SELECT MIN(CAST((({expr}) - ?) / ? AS INTEGER), ?) AS bin, COUNT(*) AS count
+        FROM {_ident(table)} {scope} ({expr}) IS NOT NULL
+        GROUP BY bin
+        ORDER BY bin
+    """
+    df = pd.read_sql_query(query, conn, params=(lo, width, bins - 1, *params))
+    df["bin_start"] = lo + df["bin"] * width
+    df["bin_end"] = df["bin_start"] + width
+    return df[["bin_start", "bin_end", "count"]]
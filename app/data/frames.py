@@ -0,0 +1,123 @@
+"""
+Compact, typed DataFrames for the dashboards.
+
+optimize_frame() turns the low-cardinality text columns (severity, status,
+priority, ...) into categoricals, downcasts integer columns and parses date
+columns once into datetime64; optimize_table() applies it with the date
+columns of a dashboard table. concat_frames() stacks frames without losing
+those dtypes, and memory_report() shows what a frame costs.
+"""
+
+import pandas as pd
+from pandas.api.types import (
+    is_bool_dtype,
+    is_datetime64_any_dtype,
+    is_integer_dtype,
+    is_object_dtype,
+    is_string_dtype,
+    union_categoricals,
+)
+
+CATEGORY_COLUMNS = (
+    "severity", "status", "priority", "category", "incident_type",
+    "assigned_to", "source", "reported_by",
+)
+
+# A column only becomes categorical if it repeats values enough to pay off.
+MAX_CATEGORY_RATIO = 0.5
+
+# Date columns of the dashboard tables, parsed by optimize_table().
+TABLE_DATE_COLUMNS = {
+    "cyber_incidents": ("date",),
+    "it_tickets": ("created_date", "resolved_date"),
+    "datasets_metadata": ("last_updated",),
+}
+
+
+def parse_dates(series):
+    """
+    Parse a column to datetime64 (NaT when unparseable). ISO strings take
+    the fast path; only the leftovers are parsed element by element.
+    """
+    if is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, errors="coerce", format="ISO8601")
+    leftover = parsed.isna() & series.notna()
+    if leftover.any():
+        parsed[leftover] = pd.to_datetime(series[leftover], errors="coerce", format="mixed")
+    return parsed
+
+
+def _text_columns(df):
+    return [c for c in df.columns if is_object_dtype(df[c]) or is_string_dtype(df[c])]
+
+
+def optimize_frame(df, categories=None, dates=(), max_category_ratio=MAX_CATEGORY_RATIO):
+    """
+    Return df with compact dtypes:
+      - columns in `dates` parsed to datetime64
+      - text columns stored as category when repetitive enough; with
+        categories=None every text column is a candidate (CATEGORY_COLUMNS
+        always, others such as batch-load timestamps when they repeat)
+      - integer columns downcast to the smallest integer type that fits
+    """
+    if df is None or df.empty:
+        return df
+    df = df.copy()
+    for col in dates:
+        if col in df.columns:
+            df[col] = parse_dates(df[col])
+    candidates = _text_columns(df) if categories is None else [c for c in categories if c in df.columns]
+    limit = max(1, len(df) * max_category_ratio)
+    for col in candidates:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if col in CATEGORY_COLUMNS or df[col].nunique(dropna=True) <= limit:
+            df[col] = df[col].astype("category")
+    for col in df.columns:
+        if is_integer_dtype(df[col]) and not is_bool_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def optimize_table(df, table):
+    """
+    optimize_frame() for rows of a dashboard table: its TABLE_DATE_COLUMNS
+    become datetime64 and only CATEGORY_COLUMNS become categoricals, so
+    id and updated_at keep the values incremental loads compare against.
+    """
+    return optimize_frame(df, categories=CATEGORY_COLUMNS, dates=TABLE_DATE_COLUMNS.get(table, ()))
+
+
+def concat_frames(frames, **kwargs):
+    """
+    pd.concat that keeps categorical columns categorical: categories are
+    unioned first, since concatenating differing categoricals falls back
+    to object columns.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    cat_cols = {c for f in frames for c in f.columns if isinstance(f[c].dtype, pd.CategoricalDtype)}
+    for col in cat_cols:
+        parts = [f[col].astype("category") for f in frames if col in f.columns]
+        dtype = pd.CategoricalDtype(union_categoricals(parts, ignore_order=True).categories)
+        frames = [f.assign(**{col: f[col].astype(dtype)}) if col in f.columns else f for f in frames]
+    out = pd.concat(frames, **kwargs)
+    # frames missing a column contribute NaN, which can decay it to object
+    for col in cat_cols:
+        if not isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype("category")
+    return out
+
+
+def memory_report(df):
+    """Return {"rows", "bytes", "columns": {name: bytes}} using deep memory usage."""
+    if df is None:
+        return {"rows": 0, "bytes": 0, "columns": {}}
+    usage = df.memory_usage(deep=True, index=True)
+    return {
+        "rows": len(df),
+        "bytes": int(usage.sum()),
+        "columns": {str(k): int(v) for k, v in usage.items()},
+    }
@@ -1,28 +1,203 @@
+import sqlite3
+import time
+from itertools import islice
+from pathlib import Path
 import pandas as pd
-from app.data.db import connect_database
+from app.data.cache import bump_table_version
+from app.data.csv_loader import stream_csv_to_table
+from app.data.db import DB_PATH, pooled_connection, transaction
+from app.data.metrics import LatencyHistogram
+from app.data.schema import RANKED_SEARCH_LIMIT, count_fts_matches, fts_query, table_exists
+
+INCIDENT_COLUMNS = ("date", "incident_type", "severity", "status", "description", "reported_by")
+
+# Analytical queries live at module level so app.data.migrations can
+# EXPLAIN them and catch full table scans. They read incident_rollup
+# (migration 4), which triggers keep in step with cyber_incidents; the
+# _BASE_ variants group cyber_incidents itself for databases without it.
+INCIDENTS_BY_TYPE_QUERY = """
+    SELECT incident_type, SUM(n) as count
+    FROM incident_rollup
+    GROUP BY incident_type
+    ORDER BY count DESC
+"""
+
+HIGH_SEVERITY_BY_STATUS_QUERY = """
+    SELECT status, SUM(n) as count
+    FROM incident_rollup
+    WHERE severity = 'High'
+    GROUP BY status
+    ORDER BY count DESC
+"""
+
+INCIDENT_TYPES_WITH_MANY_CASES_QUERY = """
+    SELECT incident_type, SUM(n) as count
+    FROM incident_rollup
+    GROUP BY incident_type
+    HAVING SUM(n) > ?
+    ORDER BY count DESC
+"""
+
+INCIDENTS_BY_TYPE_BASE_QUERY = """
+    SELECT incident_type, COUNT(*) as count
+    FROM cyber_incidents
+    GROUP BY incident_type
+    ORDER BY count DESC
+"""
+
+HIGH_SEVERITY_BY_STATUS_BASE_QUERY = """
+    SELECT status, COUNT(*) as count
+    FROM cyber_incidents
+    WHERE severity = 'High'
+    GROUP BY status
+    ORDER BY count DESC
+"""
+
+INCIDENT_TYPES_WITH_MANY_CASES_BASE_QUERY = """
+    SELECT incident_type, COUNT(*) as count
+    FROM cyber_incidents
+    GROUP BY incident_type
+    HAVING COUNT(*) > ?
+    ORDER BY count DESC
+"""
+
+# Full-text search over descriptions via incidents_fts (migration 7).
+# ORDER BY rank is bm25(); past RANKED_SEARCH_LIMIT matches the newest come
+# first. Matched words are wrapped in ** for markdown.
+_SEARCH_INCIDENTS_SQL = """
+    SELECT c.id, c.date, c.incident_type, c.severity, c.status,
+           snippet(incidents_fts, -1, '**', '**', ' … ', 16) AS snippet,
+           {score} AS score
+    FROM incidents_fts
+    JOIN cyber_incidents c ON c.id = incidents_fts.rowid
+    WHERE incidents_fts MATCH ?
+    ORDER BY {order}
+    LIMIT ? OFFSET ?
+"""
+SEARCH_INCIDENTS_QUERY = _SEARCH_INCIDENTS_SQL.format(score="bm25(incidents_fts)", order="rank")
+# no score here: bm25() would read every match to get term frequencies
+SEARCH_INCIDENTS_NEWEST_QUERY = _SEARCH_INCIDENTS_SQL.format(score="NULL", order="incidents_fts.rowid DESC")
 
 def insert_incident(date, incident_type, severity, status, description, reported_by=None):
     """Insert new incident."""
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO cyber_incidents 
-        (date, incident_type, severity, status, description, reported_by)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (date, incident_type, severity, status, description, reported_by))
-    conn.commit()
-    incident_id = cursor.lastrowid
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO cyber_incidents 
+            (date, incident_type, severity, status, description, reported_by)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (date, incident_type, severity, status, description, reported_by))
+        incident_id = cursor.lastrowid
+    bump_table_version("cyber_incidents")
     return incident_id
 
+def _incident_row(record):
+    """
+    Turn a dict or sequence into an insert tuple.
+    Raises ValueError if a required field is missing or blank.
+    """
+    if isinstance(record, dict):
+        row = [record.get(col) for col in INCIDENT_COLUMNS]
+    else:
+        row = list(record)
+        if len(row) == len(INCIDENT_COLUMNS) - 1:
+            row.append(None)
+        if len(row) != len(INCIDENT_COLUMNS):
+            raise ValueError(f"expected {len(INCIDENT_COLUMNS)} fields, got {len(row)}")
+
+    if row[-1] is None or str(row[-1]).strip() == "":
+        row[-1] = "system"
+    for col, value in zip(INCIDENT_COLUMNS, row):
+        if value is None or str(value).strip() == "":
+            raise ValueError(f"missing {col}")
+    return tuple(row)
+
+def bulk_insert_incidents(records, batch_size=1000, db_path=DB_PATH, max_errors=20):
+    """
+    Insert many incidents from any iterable (list, generator, CSV reader...).
+    Records are dicts keyed by column name or sequences in column order.
+    Each batch is written with executemany and committed once, so the cost
+    is one fsync per batch instead of one per row.
+
+    Returns a report dict with inserted/rejected counts, rows per second
+    and a per-batch commit latency histogram.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    query = f"""
+        INSERT INTO cyber_incidents ({", ".join(INCIDENT_COLUMNS)})
+        VALUES ({", ".join("?" for _ in INCIDENT_COLUMNS)})
+    """
+    latency = LatencyHistogram()
+    inserted = rejected = batches = 0
+    errors = []
+
+    def reject(position, reason):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < max_errors:
+            errors.append(f"record {position}: {reason}")
+
+    start = time.perf_counter()
+    records = iter(records)
+    position = 0
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+
+        rows, positions = [], []
+        for record in chunk:
+            try:
+                rows.append(_incident_row(record))
+                positions.append(position)
+            except (ValueError, TypeError) as e:
+                reject(position, e)
+            position += 1
+        if not rows:
+            continue
+
+        batch_start = time.perf_counter()
+        try:
+            with transaction(db_path) as conn:
+                conn.executemany(query, rows)
+            inserted += len(rows)
+        except sqlite3.IntegrityError:
+            # One bad row fails the whole executemany; isolate it row by row.
+            with transaction(db_path) as conn:
+                for row_position, row in zip(positions, rows):
+                    try:
+                        conn.execute(query, row)
+                        inserted += 1
+                    except sqlite3.IntegrityError as e:
+                        reject(row_position, e)
+        latency.observe((time.perf_counter() - batch_start) * 1000)
+        batches += 1
+
+    if inserted:
+        bump_table_version("cyber_incidents")
+    elapsed = time.perf_counter() - start
+    report = {
+        "inserted": inserted,
+        "rejected": rejected,
+        "batches": batches,
+        "elapsed_s": elapsed,
+        "rows_per_sec": inserted / elapsed if elapsed > 0 else 0.0,
+        "commit_latency_ms": latency.to_dict(),
+        "errors": errors,
+    }
+    print(f"✅ Ingested {inserted} incidents in {batches} batches "
+          f"({report['rows_per_sec']:.0f} rows/s, {rejected} rejected).")
+    return report
+
 def get_all_incidents():
     """Get all incidents as DataFrame."""
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM cyber_incidents ORDER BY id DESC",
-        conn
-    )
-    conn.close()
+    with pooled_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM cyber_incidents ORDER BY id DESC",
+            conn
+        )
     return df
 
 def update_incident_status(conn, incident_id, new_status):
@@ -40,6 +215,7 @@ def update_incident_status(conn, incident_id, new_status):
 
     cursor.execute(query, (new_status, incident_id))
     conn.commit()
+    bump_table_version("cyber_incidents")
 
     return cursor.rowcount
 
@@ -53,20 +229,19 @@ def delete_incident(conn, incident_id):
 
     cursor.execute(query, (incident_id,))
     conn.commit()
+    bump_table_version("cyber_incidents")
 
     return cursor.rowcount
 
+def _has_rollup(conn):
+    return table_exists(conn, "incident_rollup")
+
 def get_incidents_by_type_count(conn):
     """
     Count incidents by type.
     Uses: SELECT, FROM, GROUP BY, ORDER BY
     """
-    query = """
-    SELECT incident_type, COUNT(*) as count
-    FROM cyber_incidents
-    GROUP BY incident_type
-    ORDER BY count DESC
-    """
+    query = INCIDENTS_BY_TYPE_QUERY if _has_rollup(conn) else INCIDENTS_BY_TYPE_BASE_QUERY
     df = pd.read_sql_query(query, conn)
     return df
 
@@ -75,13 +250,7 @@ def get_high_severity_by_status(conn):
     Count high severity incidents by status.
     Uses: SELECT, FROM, WHERE, GROUP BY, ORDER BY
     """
-    query = """
-    SELECT status, COUNT(*) as count
-    FROM cyber_incidents
-    WHERE severity = 'High'
-    GROUP BY status
-    ORDER BY count DESC
-    """
+    query = HIGH_SEVERITY_BY_STATUS_QUERY if _has_rollup(conn) else HIGH_SEVERITY_BY_STATUS_BASE_QUERY
     df = pd.read_sql_query(query, conn)
     return df
 
@@ -90,28 +259,36 @@ def get_incident_types_with_many_cases(conn, min_count=5):
     Find incident types with more than min_count cases.
     Uses: SELECT, FROM, GROUP BY, HAVING, ORDER BY
     """
-    query = """
-    SELECT incident_type, COUNT(*) as count
-    FROM cyber_incidents
-    GROUP BY incident_type
-    HAVING COUNT(*) > ?
-    ORDER BY count DESC
-    """
+    if _has_rollup(conn):
+        query = INCIDENT_TYPES_WITH_MANY_CASES_QUERY
+    else:
+        query = INCIDENT_TYPES_WITH_MANY_CASES_BASE_QUERY
     df = pd.read_sql_query(query, conn, params=(min_count,))
     return df
 
-def load_csv_to_table_incidents(conn, csv_path, table_name):
+def search_incidents(conn, text, limit=20, offset=0):
+    """
+    Incidents whose description matches every word of text (word* for a
+    prefix), best bm25 match first (newest first past
+    RANKED_SEARCH_LIMIT matches), with a highlighted snippet.
+    Page with limit/offset; count_incident_matches() gives the total.
+    """
+    match = fts_query(text)
+    if not match:
+        return pd.DataFrame(columns=["id", "date", "incident_type", "severity", "status", "snippet", "score"])
+    ranked = count_fts_matches(conn, "incidents_fts", match, RANKED_SEARCH_LIMIT + 1) <= RANKED_SEARCH_LIMIT
+    query = SEARCH_INCIDENTS_QUERY if ranked else SEARCH_INCIDENTS_NEWEST_QUERY
+    return pd.read_sql_query(query, conn, params=(match, limit, offset))
 
-    # Check if CSV file exists
-    if not csv_path.exists():
-        print(f"⚠️  File not found: {csv_path}")
-        print("   No incidents to migrate.")
-        return
-    
-    #Read CSV using pandas.read_csv()
-    #pd.read_csv(csv_path)
-    df = pd.read_csv(csv_path)
+def count_incident_matches(conn, text, cap=None):
+    """Number of incidents search_incidents() would page through (at most cap)."""
+    match = fts_query(text)
+    if not match:
+        return 0
+    return count_fts_matches(conn, "incidents_fts", match, cap)
 
+def _prepare_incidents_frame(df):
+    """Rename CSV columns to the cyber_incidents schema and fill defaults."""
     df = df.rename(columns={
         "timestamp": "date",
         "category": "incident_type"
@@ -123,7 +300,30 @@ def load_csv_to_table_incidents(conn, csv_path, table_name):
 
     # Drop any extra columns not in the table definition (optional but cleaner)
     required_cols = ["date", "incident_type", "severity", "status", "description", "reported_by"]
-    df = df[required_cols]
+    return df[required_cols]
+
+def load_csv_to_table_incidents(conn, csv_path, table_name, chunksize=None):
+    """
+    Load the incidents CSV into the database.
+    Pass chunksize to stream the file in chunks (bounded memory) instead of
+    reading it whole.
+    """
+    csv_path = Path(csv_path)
+
+    # Check if CSV file exists
+    if not csv_path.exists():
+        print(f"⚠️  File not found: {csv_path}")
+        print("   No incidents to migrate.")
+        return
+
+    if chunksize:
+        return stream_csv_to_table(conn, csv_path, table_name, _prepare_incidents_frame, chunksize)
+    
+    #Read CSV using pandas.read_csv()
+    #pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path)
+
+    df = _prepare_incidents_frame(df)
 
     # Use df.to_sql() to insert data
     # Parameters: name=table_name, con=conn, if_exists='append', index=False
@@ -133,10 +333,10 @@ def load_csv_to_table_incidents(conn, csv_path, table_name):
         if_exists='append',
         index=False
     )
+    bump_table_version(table_name)
     
     # Print success message and return row count
     print(f"Loaded {len(df)} rows into '{table_name}'.")
 
     return len(df)
     #pass
-
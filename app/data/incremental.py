@@ -0,0 +1,174 @@
+import threading
+import pandas as pd
+from app.data.db import DB_PATH, pooled_connection
+from app.data.frames import concat_frames, optimize_table
+
+# Tables the dashboards load incrementally; migration 2 gives them an
+# updated_at column that a trigger stamps on every UPDATE.
+INCREMENTAL_TABLES = ("cyber_incidents", "it_tickets", "datasets_metadata")
+
+
+class IncrementalTableLoader:
+    """
+    Keep one table cached as a DataFrame and refresh it from high-water marks.
+
+    Each load() fetches only rows with id above the cached max id (new rows)
+    or updated_at at/after the cached max updated_at (changed rows), merges
+    them into the cached frame, then compares COUNT(*)/MAX(id) with the
+    merged frame. A mismatch means rows were deleted, so the table is
+    reloaded in full.
+
+    With optimize=True every frame read (the full table, each delta and a
+    primed frame) goes through frames.optimize_table() before it is merged,
+    so the cached frame keeps datetime64 dates and categorical columns and
+    nothing is re-parsed on later loads.
+
+    version changes whenever the cached frame does; load(prepare=fn) keeps
+    fn(frame) for the current version, so per-view work such as a page's
+    normalization runs once per data change rather than once per load.
+    """
+
+    def __init__(self, table_name, key="id", changed_col="updated_at", optimize=False):
+        self.table_name = table_name
+        self.key = key
+        self.changed_col = changed_col
+        self.optimize = optimize
+        self._df = None
+        self._prepared = None
+        self._prepared_version = None
+        self._lock = threading.Lock()
+        self.version = 0
+        self.last_mode = None
+        self.last_rows_fetched = 0
+
+    def reset(self):
+        """Drop the cached frame; the next load() is a full reload."""
+        with self._lock:
+            self._set_frame(None)
+
+    @property
+    def is_cold(self):
+        """True until the first load() or prime()."""
+        return self._df is None
+
+    @property
+    def frame(self):
+        """The cached frame itself (None while cold); callers must not modify it."""
+        return self._df
+
+    def prime(self, df):
+        """
+        Start a cold loader from df (e.g. a saved copy of the table) instead
+        of a full reload; the next load() fetches only rows added or changed
+        since, and still reloads in full if rows were deleted. Ignored once
+        the loader holds rows.
+        """
+        with self._lock:
+            if self._df is None:
+                self._set_frame(self._prepare(df))
+                self.last_mode = "primed"
+                self.last_rows_fetched = 0
+
+    def load(self, conn=None, db_path=DB_PATH, prepare=None):
+        """
+        Return an up-to-date copy of the table, or of prepare(table) when
+        prepare is given; that result is computed once per version and
+        reused until the table changes.
+        Without conn, a pooled connection for db_path is borrowed.
+        """
+        if conn is None:
+            with pooled_connection(db_path) as pooled:
+                return self.load(pooled, prepare=prepare)
+
+        with self._lock:
+            own_snapshot = not conn.in_transaction
+            if own_snapshot:
+                # One read transaction so the delta and checksum agree.
+                conn.execute("BEGIN")
+            try:
+                if self._df is None:
+                    self._full_reload(conn)
+                else:
+                    self._refresh(conn)
+            finally:
+                if own_snapshot:
+                    conn.commit()
+            if prepare is None:
+                return self._df.copy()
+            if self._prepared_version != self.version:
+                self._prepared = prepare(self._df)
+                self._prepared_version = self.version
+            return self._prepared.copy()
+
+    def _set_frame(self, df):
+        self._df = df
+        self._prepared = self._prepared_version = None
+        self.version += 1
+
+    def _prepare(self, df):
+        return optimize_table(df, self.table_name) if self.optimize else df
+
+    def _read(self, query, conn, params=()):
+        return self._prepare(pd.read_sql_query(query, conn, params=params))
+
+    def _has_changed_col(self, df):
+        return self.changed_col is not None and self.changed_col in df.columns
+
+    def _full_reload(self, conn):
+        self._set_frame(self._read(f"SELECT * FROM {self.table_name} ORDER BY {self.key}", conn))
+        self.last_mode = "full"
+        self.last_rows_fetched = len(self._df)
+
+    def _watermarks(self):
+        df = self._df
+        max_id = int(df[self.key].max()) if not df.empty else 0
+        max_changed = ""
+        if self._has_changed_col(df) and df[self.changed_col].notna().any():
+            max_changed = df[self.changed_col].dropna().max()
+        return max_id, max_changed
+
+    def _refresh(self, conn):
+        max_id, max_changed = self._watermarks()
+        if self._has_changed_col(self._df):
+            # >= so rows stamped in the same millisecond are not missed;
+            # re-fetched rows that are unchanged do not count as a change.
+            query = (f"SELECT * FROM {self.table_name} "
+                     f"WHERE {self.key} > ? OR {self.changed_col} >= ?")
+            params = (max_id, max_changed)
+        else:
+            query = f"SELECT * FROM {self.table_name} WHERE {self.key} > ?"
+            params = (max_id,)
+        delta = self._read(query, conn, params)
+        fetched = len(delta)
+        if not delta.empty and self._already_merged(delta):
+            delta = delta.iloc[0:0]
+
+        if delta.empty:
+            merged = self._df
+        else:
+            kept = self._df[~self._df[self.key].isin(delta[self.key])]
+            merged = concat_frames([kept, delta], ignore_index=True).sort_values(self.key, ignore_index=True)
+
+        count, db_max_id = conn.execute(
+            f"SELECT COUNT(*), MAX({self.key}) FROM {self.table_name}"
+        ).fetchone()
+        merged_max = int(merged[self.key].max()) if not merged.empty else None
+        if count != len(merged) or db_max_id != merged_max:
+            self._full_reload(conn)
+            return
+
+        if not delta.empty:
+            self._set_frame(merged)
+        self.last_mode = "incremental" if not delta.empty else "unchanged"
+        self.last_rows_fetched = fetched
+
+    def _already_merged(self, delta):
+        """True if every row of delta is already in the cached frame, value for value."""
+        if list(delta.columns) != list(self._df.columns):
+            return False
+        cached = self._df[self._df[self.key].isin(delta[self.key])]
+        if len(cached) != len(delta):
+            return False
+        cached = cached.set_index(self.key).sort_index().astype(object)
+        fresh = delta.set_index(self.key).sort_index().astype(object)
+        return bool((cached.eq(fresh) | (cached.isna() & fresh.isna())).all(axis=None))
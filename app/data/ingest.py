@@ -0,0 +1,252 @@
+"""
+Parallel CSV ingestion for backfills.
+
+Worker processes read and transform the source files concurrently (CSV
+parsing, column renames, resolved_date derivation and row hashing, i.e.
+csv_sync.prepare_batch) and hand the prepared batches over a bounded queue
+to a single writer thread, which applies them with csv_sync.write_batch,
+one transaction per batch. SQLite allows one writer at a time, so this is
+as parallel as the write side gets; wall time tends to max(transform) plus
+the writes rather than the sum of every source.
+
+Writes go through the same fingerprints, row hashes and checkpoints as
+sync_csv(), so re-running a backfill only touches new or changed rows.
+
+Usage:
+    python main.py ingest                          # the default CSV sources
+    python main.py ingest "DATA/*.csv" it_tickets=backfill/tickets_*.csv --workers 3
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from pathlib import Path
+
+from app.data.cache import bump_table_version
+from app.data.csv_sync import (
+    DEFAULT_BATCH_SIZE,
+    SYNC_SOURCES,
+    create_sync_tables,
+    new_report,
+    plan_file,
+    prepare_batch,
+    read_chunks,
+    record_progress,
+    write_batch,
+)
+from app.data.db import DB_PATH, connect_database
+
+QUEUE_DEPTH = 8          # prepared batches in flight; bounds parent memory
+
+_queue = None            # set in each worker by _init_worker
+
+
+def resolve_sources(patterns=None):
+    """
+    Expand source patterns into [(table, path)]. A pattern is either
+    "table=glob" or a glob whose file names start with the table name
+    (DATA/it_tickets*.csv -> it_tickets). No patterns means the default
+    CSV of every table in SYNC_SOURCES.
+    """
+    if not patterns:
+        return [(table, Path(spec["csv"])) for table, spec in SYNC_SOURCES.items()]
+    sources = []
+    for pattern in patterns:
+        table, sep, path_glob = pattern.partition("=")
+        if not sep:
+            table, path_glob = None, pattern
+        elif table not in SYNC_SOURCES:
+            print(f"⚠️  Unknown table '{table}' in '{pattern}', skipped.")
+            continue
+        paths = sorted(glob.glob(path_glob)) or [path_glob]
+        for path in map(Path, paths):
+            name = table or next((t for t in SYNC_SOURCES if path.name.startswith(t)), None)
+            if name is None:
+                print(f"⚠️  Cannot tell which table {path} belongs to; use table=path.")
+                continue
+            if (name, path) not in sources:
+                sources.append((name, path))
+    return sources
+
+
+def _init_worker(batch_queue):
+    global _queue
+    _queue = batch_queue
+
+
+def _transform_source(index, table, path, batch_size, resume):
+    """Worker: stream one file through prepare_batch() onto the queue."""
+    stats = {"rows": 0, "seconds": 0.0, "error": None}
+    try:
+        chunks = read_chunks(path, batch_size, resume)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            batch = prepare_batch(table, chunk)
+            stats["seconds"] += time.perf_counter() - start
+            stats["rows"] += batch["rows"]
+            _queue.put(("batch", index, batch))
+    except Exception as e:
+        stats["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        _queue.put(("done", index, stats))
+    return stats
+
+
+def _write_batches(db_path, batch_queue, jobs, reports, timings, finished):
+    """
+    Writer thread: the only connection that writes during ingestion. Runs
+    until every job's "done" has arrived, adding its index to `finished`.
+    """
+    conn = connect_database(db_path)
+    states = {}                   # per table, shared by every file of it
+    try:
+        while len(finished) < len(jobs):
+            kind, index, payload = batch_queue.get()
+            table, path, fingerprint, resume = jobs[index]
+            report = reports[index]
+            if kind == "done":
+                # ingest() also reports a worker whose future failed, which
+                # may follow the worker's own "done"; the first one counts.
+                if index in finished:
+                    continue
+                finished.add(index)
+                report["transform_seconds"] = payload["seconds"]
+                if payload["error"]:
+                    report.update(status="failed", error=payload["error"])
+                    continue
+                with conn:
+                    record_progress(conn, table, path, fingerprint, report,
+                                    resume + report["rows"], complete=True)
+                report["status"] = "synced"
+                continue
+            if report.get("status") == "failed":
+                continue
+
+            start = time.perf_counter()
+            with conn:
+                write_batch(conn, table, payload, report, states.setdefault(table, {}))
+                report["rows"] += payload["rows"]
+                record_progress(conn, table, path, fingerprint, report, resume + report["rows"])
+            bump_table_version(table)
+            elapsed = time.perf_counter() - start
+            report["write_seconds"] += elapsed
+            timings["write"] += elapsed
+    except Exception as e:
+        timings["error"] = f"{type(e).__name__}: {e}"
+        for report in reports:
+            if report["status"] != "synced":
+                report.update(status="failed", error=timings["error"])
+        # keep draining so workers blocked on a full queue can finish
+        while len(finished) < len(jobs):
+            kind, index, _ = batch_queue.get()
+            if kind == "done":
+                finished.add(index)
+    finally:
+        conn.close()
+
+
+def _rate(rows, seconds):
+    return f"{rows / seconds:,.0f} rows/s" if seconds > 0 else "-"
+
+
+def ingest(patterns=None, db_path=DB_PATH, workers=None, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """
+    Ingest every source matched by patterns (see resolve_sources) and print
+    per-source and overall throughput. Returns one report per file.
+    """
+    wall_start = time.perf_counter()
+    sources = resolve_sources(patterns)
+    reports, jobs, active = [], [], []     # active[i] is the report of jobs[i]
+    conn = connect_database(db_path)
+    try:
+        create_sync_tables(conn)
+        for table, path in sources:
+            report = new_report(table, path)
+            report.update(transform_seconds=0.0, write_seconds=0.0)
+            status, fingerprint, resume = plan_file(conn, table, path, force)
+            if status == "sync":
+                jobs.append((table, path, fingerprint, resume))
+                active.append(report)
+            else:
+                report["status"] = status
+                print(f"⚠️  File not found: {path}" if status == "missing"
+                      else f"✅ {table} ← {path.name}: unchanged, skipped.")
+            reports.append(report)
+    finally:
+        conn.close()
+
+    timings = {"write": 0.0, "error": None}
+    if jobs:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+        ctx = multiprocessing.get_context("spawn")
+        batch_queue = ctx.Queue(QUEUE_DEPTH)
+        finished = set()
+        writer = threading.Thread(target=_write_batches, name="ingest-writer",
+                                  args=(db_path, batch_queue, jobs, active, timings, finished))
+        writer.start()
+        with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(batch_queue,)) as pool:
+            futures = {pool.submit(_transform_source, i, table, str(path), batch_size, resume): i
+                       for i, (table, path, _, resume) in enumerate(jobs)}
+            wait(futures)
+            for future, index in futures.items():
+                # the worker died, perhaps before reporting; the writer keeps the first "done"
+                if future.exception() is not None and index not in finished:
+                    batch_queue.put(("done", index, {"rows": 0, "seconds": 0.0,
+                                                     "error": str(future.exception())}))
+        writer.join()
+
+    for report in active:
+        if report["status"] == "failed":
+            print(f"❌ {report['table']} ← {Path(report['file']).name}: {report['error']}")
+            continue
+        print(f"✅ {report['table']} ← {Path(report['file']).name}: {report['rows']} rows | "
+              f"read+transform {report['transform_seconds']:.2f}s "
+              f"({_rate(report['rows'], report['transform_seconds'])}) | "
+              f"write {report['write_seconds']:.2f}s ({_rate(report['rows'], report['write_seconds'])}) | "
+              f"{report['inserted']} inserted, {report['updated']} updated, "
+              f"{report['adopted']} adopted, {report['unchanged']} unchanged")
+
+    wall = time.perf_counter() - wall_start
+    total_rows = sum(r["rows"] for r in active)
+    transform_sum = sum(r["transform_seconds"] for r in active)
+    if timings["error"]:
+        print(f"❌ Writer stopped: {timings['error']}")
+    print(f"Ingested {total_rows} rows from {len(active)} of {len(reports)} files in {wall:.2f}s "
+          f"({_rate(total_rows, wall)}); transform {transform_sum:.2f}s summed over "
+          f"{workers if jobs else 0} workers, write {timings['write']:.2f}s.")
+    return reports
+
+
+def add_arguments(parser):
+    parser.add_argument("sources", nargs="*",
+                        help='files or globs, optionally "table=glob" (default: the DATA/*.csv sources)')
+    parser.add_argument("--db", default=str(DB_PATH), help="database file")
+    parser.add_argument("--workers", type=int, default=None, help="transform processes (default: CPUs)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--force", action="store_true", help="re-check files even if unchanged")
+
+
+def run(args):
+    """Run an ingest from parsed add_arguments() options; returns an exit code."""
+    reports = ingest(args.sources, db_path=args.db, workers=args.workers,
+                     batch_size=args.batch_size, force=args.force)
+    return 1 if any(r["status"] == "failed" or r["errors"] for r in reports) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load CSV sources in parallel.")
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
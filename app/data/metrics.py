@@ -0,0 +1,65 @@
+import bisect
+import threading
+
+# Upper bounds (ms) of the latency buckets; the last bucket is open-ended.
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Thread-safe, fixed-bucket latency histogram in milliseconds.
+    Percentiles are estimated from bucket upper bounds, so memory stays
+    constant no matter how many samples are recorded.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+
+    def observe(self, ms):
+        """Record one latency sample (milliseconds)."""
+        idx = bisect.bisect_left(self.buckets, ms)
+        with self._lock:
+            self._counts[idx] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+            self.max_ms = ms if self.max_ms is None else max(self.max_ms, ms)
+
+    def percentile(self, p):
+        """Estimate the p-th percentile (0-100). Returns None when empty."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = max(1, -(-self.count * p // 100))  # ceil without floats
+            seen = 0
+            for idx, n in enumerate(self._counts):
+                seen += n
+                if seen >= rank:
+                    upper = self.buckets[idx] if idx < len(self.buckets) else self.max_ms
+                    return min(upper, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        """Return counts per bucket plus summary stats."""
+        with self._lock:
+            labels = [f"<={b}ms" for b in self.buckets] + [f">{self.buckets[-1]}ms"]
+            hist = {label: n for label, n in zip(labels, self._counts) if n}
+            summary = {
+                "count": self.count,
+                "mean_ms": self.total_ms / self.count if self.count else None,
+                "min_ms": self.min_ms,
+                "max_ms": self.max_ms,
+            }
+        summary.update({
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": hist,
+        })
+        return summary
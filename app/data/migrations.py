@@ -0,0 +1,225 @@
+"""
+Versioned schema migrations for intelligence_platform.db.
+
+The schema version is stored in SQLite's PRAGMA user_version. Each entry
+in MIGRATIONS is (version, description, steps); steps are SQL strings or
+callables taking the connection, so a migration can also reshape data.
+To evolve the schema, append a new entry with the next version number;
+never edit a migration that has already shipped.
+
+Usage:
+    python -m app.data.migrations            # apply pending migrations
+    python -m app.data.migrations --check    # also verify query plans
+"""
+
+import argparse
+import re
+import sys
+
+from app.data.csv_sync import create_sync_tables
+from app.data.db import DB_PATH, connect_database
+from app.data.incremental import INCREMENTAL_TABLES
+from app.data.rollups import ROLLUPS, create_rollups, rebuild_rollups
+from app.data.schema import create_ai_cache_table, define_search_indexes, reindex_search_indexes
+from app.data.incidents import (
+    INCIDENTS_BY_TYPE_QUERY,
+    HIGH_SEVERITY_BY_STATUS_QUERY,
+    INCIDENT_TYPES_WITH_MANY_CASES_QUERY,
+    SEARCH_INCIDENTS_QUERY,
+)
+from app.data.tickets import (
+    TICKETS_BY_PRIORITY_QUERY,
+    TICKETS_BY_STATUS_QUERY,
+    AVERAGE_RESOLUTION_QUERY,
+    UNRESOLVED_TICKETS_QUERY,
+    SEARCH_TICKETS_QUERY,
+)
+from app.data.datasets import (
+    DATASETS_BY_CATEGORY_QUERY,
+    DATASETS_RECENTLY_UPDATED_QUERY,
+)
+
+
+def _column_exists(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def _add_updated_at_tracking(conn):
+    """
+    Give each dashboard table an updated_at column stamped (UTC, ms) by a
+    trigger on every UPDATE, plus an index for the incremental loader's
+    "changed since" query. Inserts leave it NULL; new rows are found by id.
+    """
+    for table in INCREMENTAL_TABLES:
+        if not _column_exists(conn, table, "updated_at"):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN updated_at TEXT")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_updated_at
+            AFTER UPDATE ON {table}
+            FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN
+                UPDATE {table}
+                SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                WHERE id = NEW.id;
+            END
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated_at ON {table}(updated_at)")
+
+
+MIGRATIONS = [
+    (1, "Indexes for the analytical helpers", [
+        # GROUP BY incident_type -> covering index scan, no table access
+        "CREATE INDEX IF NOT EXISTS idx_incidents_type ON cyber_incidents(incident_type)",
+        # WHERE severity = ? GROUP BY status -> covering index search
+        "CREATE INDEX IF NOT EXISTS idx_incidents_severity_status ON cyber_incidents(severity, status)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_priority ON it_tickets(priority)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_status ON it_tickets(status)",
+        # != cannot use a normal index; a partial index holds only the
+        # unresolved rows, already ordered by created_date
+        "CREATE INDEX IF NOT EXISTS idx_tickets_unresolved_created "
+        "ON it_tickets(created_date) WHERE status != 'Resolved'",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_category ON datasets_metadata(category)",
+        # expression index so DATE(last_updated) >= ? can seek
+        "CREATE INDEX IF NOT EXISTS idx_datasets_updated_day ON datasets_metadata(DATE(last_updated))",
+        "ANALYZE",
+    ]),
+    (2, "updated_at change tracking for incremental dashboard loads", [
+        _add_updated_at_tracking,
+    ]),
+    (3, "Indexes for server-side dashboard filters", [
+        # date-range filters and per-day charts compare these as ISO text
+        "CREATE INDEX IF NOT EXISTS idx_incidents_date ON cyber_incidents(date)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_created_date ON it_tickets(created_date)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_assigned_to ON it_tickets(assigned_to)",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_last_updated ON datasets_metadata(last_updated)",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_record_count ON datasets_metadata(record_count)",
+    ]),
+    (4, "Trigger-maintained KPI rollup tables", [
+        create_rollups,
+        rebuild_rollups,
+    ]),
+    (5, "CSV sync fingerprints, row hashes and checkpoints", [
+        create_sync_tables,
+    ]),
+    (6, "AI assistant response cache", [
+        create_ai_cache_table,
+    ]),
+    (7, "FTS5 search over incident and ticket text", [
+        define_search_indexes,
+        reindex_search_indexes,
+    ]),
+]
+
+
+# Helper name -> (query, params) checked by find_full_scans().
+QUERY_PLAN_CHECKS = {
+    "get_incidents_by_type_count": (INCIDENTS_BY_TYPE_QUERY, ()),
+    "get_high_severity_by_status": (HIGH_SEVERITY_BY_STATUS_QUERY, ()),
+    "get_incident_types_with_many_cases": (INCIDENT_TYPES_WITH_MANY_CASES_QUERY, (5,)),
+    "count_tickets_by_priority": (TICKETS_BY_PRIORITY_QUERY, ()),
+    "count_tickets_by_status": (TICKETS_BY_STATUS_QUERY, ()),
+    "average_resolution_time": (AVERAGE_RESOLUTION_QUERY, ()),
+    "unresolved_tickets": (UNRESOLVED_TICKETS_QUERY, ()),
+    "count_datasets_by_category": (DATASETS_BY_CATEGORY_QUERY, ()),
+    "datasets_recently_updated": (DATASETS_RECENTLY_UPDATED_QUERY, ("-90 days",)),
+    "search_incidents": (SEARCH_INCIDENTS_QUERY, ('"phishing"', 20, 0)),
+    "search_tickets": (SEARCH_TICKETS_QUERY, ('"password"', 20, 0)),
+}
+
+# "SCAN cyber_incidents" (3.36+) or "SCAN TABLE cyber_incidents" (older),
+# with no "USING ... INDEX" suffix.
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+# Rollup tables hold one row per group, so scanning them is the point.
+_SCAN_ALLOWED = set(ROLLUPS)
+
+
+def get_schema_version(conn):
+    """Return the schema version recorded in PRAGMA user_version."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn, target=None):
+    """
+    Apply every migration newer than the current schema version (up to
+    target, if given). Each migration runs in its own transaction together
+    with the user_version bump, so a failure leaves the previous version.
+    Returns the resulting schema version.
+    """
+    current = get_schema_version(conn)
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        if target is not None and version > target:
+            break
+        conn.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        current = version
+        print(f"✅ Migration {version}: {description}")
+    return current
+
+
+def explain_query_plan(conn, query, params=()):
+    """Return the detail lines of EXPLAIN QUERY PLAN for query."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def find_full_scans(conn, checks=None):
+    """
+    Return {helper_name: [plan lines]} for every checked query whose plan
+    scans a table without using an index. An empty dict means all good.
+    """
+    checks = QUERY_PLAN_CHECKS if checks is None else checks
+    offenders = {}
+    for name, (query, params) in checks.items():
+        plan = explain_query_plan(conn, query, params)
+        scanned = [m.group(1) for m in map(_FULL_SCAN.match, plan) if m]
+        if any(table not in _SCAN_ALLOWED for table in scanned):
+            offenders[name] = plan
+    return offenders
+
+
+def assert_query_plans(conn, checks=None):
+    """Raise RuntimeError if any analytical helper regressed to a full table scan."""
+    offenders = find_full_scans(conn, checks)
+    if offenders:
+        details = "\n".join(f"  {name}: {' | '.join(plan)}" for name, plan in offenders.items())
+        raise RuntimeError(f"Full table scans detected:\n{details}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply schema migrations.")
+    parser.add_argument("--db", default=str(DB_PATH), help="database file")
+    parser.add_argument("--check", action="store_true",
+                        help="fail if an analytical query does a full table scan")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    try:
+        version = run_migrations(conn)
+        print(f"Schema version: {version}")
+        if args.check:
+            offenders = find_full_scans(conn)
+            for name, plan in offenders.items():
+                print(f"❌ {name}: {' | '.join(plan)}")
+            if offenders:
+                return 1
+            print(f"✅ {len(QUERY_PLAN_CHECKS)} query plans use indexes.")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Pre-aggregated KPI rollups kept current by SQLite triggers.
+
+Each rollup table holds one row per combination of its key columns with
+running measures (row counts, sums). Insert/update/delete triggers on the
+source table add or subtract that row's contribution, so GROUP BY helpers
+and dashboard KPIs read O(groups) rows instead of scanning O(rows).
+
+The DDL is generated from ROLLUPS; {r} in an expression stands for the
+source row (NEW/OLD in triggers, the table alias when backfilling), and
+"columns" lists the source columns whose UPDATE moves a row between groups.
+"""
+
+from app.data.schema import table_exists
+
+LARGE_DATASET_ROWS = 100_000
+
+_RESOLUTION_HOURS = "(JULIANDAY({r}.resolved_date) - JULIANDAY({r}.created_date)) * 24"
+
+ROLLUPS = {
+    "incident_rollup": {
+        "source": "cyber_incidents",
+        "columns": ("date", "severity", "status", "incident_type"),
+        "keys": {
+            "day": "substr({r}.date, 1, 10)",
+            "severity": "{r}.severity",
+            "status": "{r}.status",
+            "incident_type": "{r}.incident_type",
+        },
+        "measures": {
+            "n": ("INTEGER", "1"),
+        },
+    },
+    "ticket_rollup": {
+        "source": "it_tickets",
+        "columns": ("created_date", "resolved_date", "priority", "status", "assigned_to"),
+        "keys": {
+            # key columns cannot be NULL in a WITHOUT ROWID table
+            "day": "COALESCE(substr({r}.created_date, 1, 10), '')",
+            "priority": "{r}.priority",
+            "status": "{r}.status",
+            "assigned_to": "COALESCE({r}.assigned_to, '')",
+        },
+        "measures": {
+            "n": ("INTEGER", "1"),
+            "resolved_n": ("INTEGER", f"({_RESOLUTION_HOURS}) IS NOT NULL"),
+            "resolution_hours": ("REAL", f"COALESCE({_RESOLUTION_HOURS}, 0)"),
+        },
+    },
+    "dataset_rollup": {
+        "source": "datasets_metadata",
+        "columns": ("category", "record_count"),
+        "keys": {
+            "category": "{r}.category",
+        },
+        "measures": {
+            "n": ("INTEGER", "1"),
+            "large_n": ("INTEGER", f"COALESCE({{r}}.record_count, 0) >= {LARGE_DATASET_ROWS}"),
+            "record_total": ("INTEGER", "COALESCE({r}.record_count, 0)"),
+        },
+    },
+}
+
+
+def _apply(name, spec, row, sign):
+    """UPSERT adding (sign=+1) or subtracting (sign=-1) one source row."""
+    keys, measures = spec["keys"], spec["measures"]
+    cols = list(keys) + list(measures)
+    values = [expr.format(r=row) for expr in keys.values()]
+    values += [f"{sign} * ({expr.format(r=row)})" for _, expr in measures.values()]
+    updates = ", ".join(f"{m} = {m} + excluded.{m}" for m in measures)
+    return (
+        f"INSERT INTO {name} ({', '.join(cols)}) VALUES ({', '.join(values)}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates};"
+    )
+
+
+def _prune(name, spec, row):
+    """Drop the group for `row` once its count reaches zero."""
+    match = " AND ".join(f"{k} = {expr.format(r=row)}" for k, expr in spec["keys"].items())
+    return f"DELETE FROM {name} WHERE {match} AND n <= 0;"
+
+
+def create_rollups(conn):
+    """Create the rollup tables and their maintenance triggers."""
+    for name, spec in ROLLUPS.items():
+        source = spec["source"]
+        key_defs = [f"{k} TEXT NOT NULL" for k in spec["keys"]]
+        measure_defs = [f"{m} {typ} NOT NULL DEFAULT 0" for m, (typ, _) in spec["measures"].items()]
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                {", ".join(key_defs + measure_defs)},
+                PRIMARY KEY ({", ".join(spec["keys"])})
+            ) WITHOUT ROWID
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{name}_insert AFTER INSERT ON {source}
+            BEGIN
+                {_apply(name, spec, "NEW", 1)}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{name}_delete AFTER DELETE ON {source}
+            BEGIN
+                {_apply(name, spec, "OLD", -1)}
+                {_prune(name, spec, "OLD")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{name}_update
+            AFTER UPDATE OF {", ".join(spec["columns"])} ON {source}
+            BEGIN
+                {_apply(name, spec, "OLD", -1)}
+                {_prune(name, spec, "OLD")}
+                {_apply(name, spec, "NEW", 1)}
+            END
+        """)
+
+
+def rebuild_rollups(conn):
+    """Recompute every rollup from its source table (backfill / repair)."""
+    for name, spec in ROLLUPS.items():
+        keys, measures = spec["keys"], spec["measures"]
+        key_exprs = [expr.format(r="src") for expr in keys.values()]
+        select = [f"{expr} AS {k}" for k, expr in zip(keys, key_exprs)]
+        select += [f"SUM({expr.format(r='src')}) AS {m}" for m, (_, expr) in measures.items()]
+        conn.execute(f"DELETE FROM {name}")
+        # Group by the key expressions: a bare name like assigned_to would
+        # resolve to the source column, splitting NULL and '' into two rows
+        # with the same rollup key.
+        conn.execute(f"""
+            INSERT INTO {name} ({", ".join(list(keys) + list(measures))})
+            SELECT {", ".join(select)}
+            FROM {spec["source"]} AS src
+            GROUP BY {", ".join(key_exprs)}
+        """)
+
+
+def rollup_exists(conn, name):
+    """True if the rollup table has been created (migration 4 applied)."""
+    return table_exists(conn, name)
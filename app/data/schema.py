@@ -1,3 +1,6 @@
+import re
+
+
 def create_users_table(conn):
     """Create users table."""
     cursor = conn.cursor()
@@ -66,9 +69,151 @@ def create_it_tickets_table(conn):
     """)
     conn.commit()
 
+
+def create_ai_cache_table(conn):
+    """Create the AI assistant's response cache table (run by migration 6; no commit)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ai_response_cache (
+            cache_key TEXT PRIMARY KEY,
+            prompt TEXT NOT NULL,
+            reply TEXT NOT NULL,
+            latency_ms REAL NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_response_cache_last_used ON ai_response_cache(last_used)")
+
+
+# bm25 scores every match before the top rows are known, so ranking a
+# query that matches a large share of the table (e.g. "email") costs
+# ~1.5 us per match. Beyond this many matches, searches list the newest
+# matches first instead, which only reads the rows it returns.
+RANKED_SEARCH_LIMIT = 5_000
+
+# Full-text indexes over the free-text columns. They are external-content
+# FTS5 tables (the text stays in the source table; the index holds only
+# tokens), kept in step by triggers. "weights" are the bm25 column weights
+# stored as the default rank, so ORDER BY rank ranks subject matches first.
+FTS_INDEXES = {
+    "incidents_fts": {
+        "source": "cyber_incidents",
+        "columns": ("description",),
+        "weights": (1.0,),
+    },
+    "tickets_fts": {
+        "source": "it_tickets",
+        "columns": ("subject", "description"),
+        "weights": (2.0, 1.0),
+    },
+}
+
+
+def _fts_values(spec, row):
+    return ", ".join(f"{row}.{col}" for col in spec["columns"])
+
+
+def define_search_indexes(conn):
+    """
+    Create the FTS5 tables in FTS_INDEXES and the triggers that maintain
+    them, without committing (a migration step runs inside its transaction).
+    """
+    for name, spec in FTS_INDEXES.items():
+        source, columns = spec["source"], ", ".join(spec["columns"])
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5(
+                {columns},
+                content='{source}', content_rowid='id',
+                tokenize='porter unicode61', prefix='2 3'
+            )
+        """)
+        weights = ", ".join(str(w) for w in spec["weights"])
+        conn.execute(f"INSERT INTO {name} ({name}, rank) VALUES ('rank', 'bm25({weights})')")
+        delete = (f"INSERT INTO {name} ({name}, rowid, {columns}) "
+                  f"VALUES ('delete', old.id, {_fts_values(spec, 'old')});")
+        insert = f"INSERT INTO {name} (rowid, {columns}) VALUES (new.id, {_fts_values(spec, 'new')});"
+        # One execute() per trigger: executescript() would commit first.
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {source} BEGIN
+                {insert}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {source} BEGIN
+                {delete}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {columns} ON {source} BEGIN
+                {delete}
+                {insert}
+            END
+        """)
+
+
+def reindex_search_indexes(conn):
+    """Re-index every row of the source tables, without committing."""
+    for name in FTS_INDEXES:
+        conn.execute(f"INSERT INTO {name} ({name}) VALUES ('rebuild')")
+
+
+def create_search_indexes(conn):
+    """define_search_indexes() and commit, for use outside a migration."""
+    define_search_indexes(conn)
+    conn.commit()
+
+
+def rebuild_search_indexes(conn):
+    """Re-index every row of the source tables (after a bulk load or to repair drift) and commit."""
+    reindex_search_indexes(conn)
+    conn.commit()
+
+
+def table_exists(conn, name):
+    """True if a table (including an FTS5 virtual table) named `name` exists."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def table_fingerprint(conn, table):
+    """
+    Cheap change marker for a table: COUNT(*), MAX(id) and, once migration
+    2 has added it, MAX(updated_at). Inserts move the max id, deletes the
+    count and updates the updated_at stamp.
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    changed = "MAX(updated_at)" if "updated_at" in columns else "NULL"
+    count, max_id, max_changed = conn.execute(
+        f"SELECT COUNT(*), MAX(id), {changed} FROM {table}"
+    ).fetchone()
+    return f"{count}:{max_id}:{max_changed}"
+
+
+def count_fts_matches(conn, index, match, cap=None):
+    """Rows of an FTS_INDEXES table matching an fts_query() expression, stopping at cap."""
+    if cap is None:
+        return conn.execute(f"SELECT COUNT(*) FROM {index} WHERE {index} MATCH ?", (match,)).fetchone()[0]
+    return conn.execute(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM {index} WHERE {index} MATCH ? LIMIT ?)", (match, cap)
+    ).fetchone()[0]
+
+
+def fts_query(text):
+    """
+    Turn free text from a search box into a safe FTS5 MATCH expression:
+    every word must appear (AND); a trailing * keeps a prefix search
+    (phish* matches phishing). Returns "" if there is nothing to search.
+    """
+    terms = re.findall(r"\w+\*?", text or "")
+    return " ".join(f'"{t.rstrip("*")}"*' if t.endswith("*") else f'"{t}"' for t in terms)
+
+
 def create_all_tables(conn):
     """Create all tables."""
     create_users_table(conn)
     create_cyber_incidents_table(conn)
     create_datasets_metadata_table(conn)
-    create_it_tickets_table(conn)
\ No newline at end of file
+    create_it_tickets_table(conn)
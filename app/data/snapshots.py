@@ -0,0 +1,149 @@
+"""
+Columnar snapshots of the dashboard tables (Arrow IPC files) for cold loads.
+
+The dashboards keep each table in an IncrementalTableLoader, which fetches
+only the rows added or changed since its last load. A new process has no
+rows yet and would read the whole table from SQLite; load_table() instead
+primes the cold loader from DATA/snapshots/<table>.arrow (memory-mapped,
+converted to pandas once) and lets it fetch the delta since the snapshot.
+A stale snapshot is fine: it only means a larger first delta.
+
+The snapshot holds the typed frame of an IncrementalTableLoader(...,
+optimize=True): dates as Arrow timestamps and the low-cardinality columns
+(severity, status, priority, ...) dictionary-encoded, which come back as
+datetime64 and categoricals. A cold start therefore parses nothing, and
+the loader merges its optimized deltas in with frames.concat_frames. It
+is rewritten from the loaded frame only when a load fell back to a full
+read (no snapshot yet, or rows deleted since) or a cold start's delta was
+large, never per write.
+
+pyarrow is optional; check HAS_PYARROW before calling.
+
+Usage:
+    python -m app.data.snapshots          # (re)build every snapshot
+"""
+
+import argparse
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from app.data.db import DB_PATH, connect_database, pooled_connection
+from app.data.frames import optimize_table
+from app.data.incremental import INCREMENTAL_TABLES
+from app.data.schema import table_fingerprint  # noqa: F401  (re-exported)
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401  (registers pa.ipc)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+SNAPSHOT_DIR = Path("DATA") / "snapshots"
+SNAPSHOT_TABLES = INCREMENTAL_TABLES
+SNAPSHOT_STALE_RATIO = 0.1   # rewrite when a cold start fetched this share of the table
+
+
+def _require_pyarrow():
+    if not HAS_PYARROW:
+        raise RuntimeError("pyarrow is not installed; snapshots are unavailable.")
+
+
+def snapshot_path(table, snapshot_dir=SNAPSHOT_DIR):
+    return Path(snapshot_dir) / f"{table}.arrow"
+
+
+def write_snapshot(df, table, snapshot_dir=SNAPSHOT_DIR):
+    """Write a frame of table to its snapshot file (atomically) and return the path."""
+    _require_pyarrow()
+    arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+    path = snapshot_path(table, snapshot_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".arrow.tmp{os.getpid()}.{threading.get_ident()}")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    os.replace(tmp, path)
+    return path
+
+
+def export_snapshot(conn, table, snapshot_dir=SNAPSHOT_DIR):
+    """Read the whole table and write its (optimized) snapshot; returns the path."""
+    df = pd.read_sql_query(f"SELECT * FROM {table} ORDER BY id", conn)
+    return write_snapshot(optimize_table(df, table), table, snapshot_dir)
+
+
+def read_snapshot(path):
+    """
+    Memory-map a snapshot file and return it as a pyarrow.Table whose
+    buffers point into the mapped file. to_pandas() copies them out.
+    """
+    _require_pyarrow()
+    source = pa.memory_map(str(path), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def load_table(loader, db_path=DB_PATH, snapshot_dir=SNAPSHOT_DIR, prepare=None):
+    """
+    loader.load(prepare=prepare) for an IncrementalTableLoader(table,
+    optimize=True) of a SNAPSHOT_TABLES table, priming it from the
+    snapshot when it is cold.
+    Rewrites the snapshot when the load had to read the whole table, or the
+    cold start fetched more than SNAPSHOT_STALE_RATIO of it.
+    """
+    _require_pyarrow()
+    if not loader.optimize:
+        raise ValueError("load_table() needs an IncrementalTableLoader(..., optimize=True)")
+    table = loader.table_name
+    cold = loader.is_cold
+    if cold:
+        path = snapshot_path(table, snapshot_dir)
+        try:
+            df = read_snapshot(path).to_pandas() if path.exists() else None
+        except (OSError, pa.ArrowException) as e:
+            print(f"⚠️  Snapshot {path} unreadable, reading {table} in full: {e}")
+            df = None
+        if df is not None:
+            with pooled_connection(db_path) as conn:
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+            # Columns added since the snapshot would stay empty in its rows,
+            # and without the changed column the loader only sees new ids.
+            if list(df.columns) == columns and loader.changed_col in columns:
+                loader.prime(df)
+
+    df = loader.load(db_path=db_path, prepare=prepare)
+    frame = loader.frame
+    stale = cold and loader.last_rows_fetched > len(frame) * SNAPSHOT_STALE_RATIO
+    if loader.last_mode == "full" or stale:
+        try:
+            write_snapshot(frame, table, snapshot_dir)
+        except (OSError, pa.ArrowException) as e:
+            print(f"⚠️  Snapshot of {table} not written: {e}")
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export dashboard tables to Arrow snapshots.")
+    parser.add_argument("--db", default=str(DB_PATH), help="database file")
+    parser.add_argument("--dir", default=str(SNAPSHOT_DIR), help="snapshot directory")
+    args = parser.parse_args(argv)
+    if not HAS_PYARROW:
+        print("❌ pyarrow is not installed.")
+        return 1
+
+    conn = connect_database(args.db)
+    try:
+        for table in SNAPSHOT_TABLES:
+            path = export_snapshot(conn, table, args.dir)
+            print(f"✅ {table} -> {path} ({path.stat().st_size / 1024:.0f} KiB)")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
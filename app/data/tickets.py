@@ -1,28 +1,98 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from datetime import datetime, timedelta
-from app.data.db import connect_database
+from app.data.cache import bump_table_version
+from app.data.csv_loader import stream_csv_to_table
+from app.data.db import pooled_connection, transaction
+from app.data.schema import RANKED_SEARCH_LIMIT, count_fts_matches, fts_query, table_exists
+
+TICKET_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Analytical queries live at module level so app.data.migrations can
+# EXPLAIN them and catch full table scans. The counts read ticket_rollup
+# (migration 4), which triggers keep in step with it_tickets; the _BASE_
+# variants read it_tickets itself for databases without it.
+TICKETS_BY_PRIORITY_QUERY = """
+    SELECT priority, SUM(n) AS count
+    FROM ticket_rollup
+    GROUP BY priority
+    ORDER BY count DESC
+"""
+
+TICKETS_BY_STATUS_QUERY = """
+    SELECT status, SUM(n) AS count
+    FROM ticket_rollup
+    GROUP BY status
+    ORDER BY count DESC
+"""
+
+AVERAGE_RESOLUTION_QUERY = """
+    SELECT SUM(resolution_hours) / SUM(resolved_n) AS avg_resolution_hours
+    FROM ticket_rollup
+"""
+
+TICKETS_BY_PRIORITY_BASE_QUERY = """
+    SELECT priority, COUNT(*) AS count
+    FROM it_tickets
+    GROUP BY priority
+    ORDER BY count DESC
+"""
+
+TICKETS_BY_STATUS_BASE_QUERY = """
+    SELECT status, COUNT(*) AS count
+    FROM it_tickets
+    GROUP BY status
+    ORDER BY count DESC
+"""
+
+AVERAGE_RESOLUTION_BASE_QUERY = """
+    SELECT AVG(JULIANDAY(resolved_date) - JULIANDAY(created_date)) * 24 AS avg_resolution_hours
+    FROM it_tickets
+    WHERE resolved_date IS NOT NULL
+"""
 
+# Matches the partial index idx_tickets_unresolved_created exactly.
+UNRESOLVED_TICKETS_QUERY = """
+    SELECT * FROM it_tickets
+    WHERE status != 'Resolved'
+    ORDER BY created_date DESC
+"""
+
+# Full-text search over subject and description via tickets_fts
+# (migration 7). ORDER BY rank is bm25() with subject hits weighted 2x;
+# past RANKED_SEARCH_LIMIT matches the newest come first.
+_SEARCH_TICKETS_SQL = """
+    SELECT t.id, t.ticket_id, t.priority, t.status, t.assigned_to, t.subject,
+           snippet(tickets_fts, -1, '**', '**', ' … ', 16) AS snippet,
+           {score} AS score
+    FROM tickets_fts
+    JOIN it_tickets t ON t.id = tickets_fts.rowid
+    WHERE tickets_fts MATCH ?
+    ORDER BY {order}
+    LIMIT ? OFFSET ?
+"""
+SEARCH_TICKETS_QUERY = _SEARCH_TICKETS_SQL.format(score="bm25(tickets_fts)", order="rank")
+# no score here: bm25() would read every match to get term frequencies
+SEARCH_TICKETS_NEWEST_QUERY = _SEARCH_TICKETS_SQL.format(score="NULL", order="tickets_fts.rowid DESC")
 
 
 def insert_it_ticket(ticket_id, priority, status, category, subject,
                      description=None, created_date=None,
                      resolved_date=None, assigned_to=None):
     """Insert a new IT ticket record."""
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO it_tickets
-        (ticket_id, priority, status, category, subject,
-         description, created_date, resolved_date, assigned_to)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (ticket_id, priority, status, category, subject,
-          description, created_date, resolved_date, assigned_to))
-
-    conn.commit()
-    record_id = cursor.lastrowid
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT INTO it_tickets
+            (ticket_id, priority, status, category, subject,
+             description, created_date, resolved_date, assigned_to)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (ticket_id, priority, status, category, subject,
+              description, created_date, resolved_date, assigned_to))
+
+        record_id = cursor.lastrowid
+    bump_table_version("it_tickets")
     return record_id
 
 
@@ -30,9 +100,8 @@ def insert_it_ticket(ticket_id, priority, status, category, subject,
 
 def get_all_it_tickets():
     """Return all IT tickets as a DataFrame."""
-    conn = connect_database()
-    df = pd.read_sql_query("SELECT * FROM it_tickets ORDER BY id DESC", conn)
-    conn.close()
+    with pooled_connection() as conn:
+        df = pd.read_sql_query("SELECT * FROM it_tickets ORDER BY id DESC", conn)
     return df
 
 
@@ -44,6 +113,7 @@ def update_it_ticket(conn, ticket_id, field, new_value):
     query = f"UPDATE it_tickets SET {field} = ? WHERE id = ?"
     cursor.execute(query, (new_value, ticket_id))
     conn.commit()
+    bump_table_version("it_tickets")
     return cursor.rowcount
 
 
@@ -54,68 +124,83 @@ def delete_it_ticket(conn, ticket_id):
     cursor = conn.cursor()
     cursor.execute("DELETE FROM it_tickets WHERE id = ?", (ticket_id,))
     conn.commit()
+    bump_table_version("it_tickets")
     return cursor.rowcount
 
 
 
 
+def _has_rollup(conn):
+    return table_exists(conn, "ticket_rollup")
+
+
 def count_tickets_by_priority(conn):
     """Count tickets grouped by priority."""
-    query = """
-    SELECT priority, COUNT(*) AS count
-    FROM it_tickets
-    GROUP BY priority
-    ORDER BY count DESC
-    """
+    query = TICKETS_BY_PRIORITY_QUERY if _has_rollup(conn) else TICKETS_BY_PRIORITY_BASE_QUERY
     return pd.read_sql_query(query, conn)
 
 
 def count_tickets_by_status(conn):
     """Count tickets grouped by status."""
-    query = """
-    SELECT status, COUNT(*) AS count
-    FROM it_tickets
-    GROUP BY status
-    ORDER BY count DESC
-    """
+    query = TICKETS_BY_STATUS_QUERY if _has_rollup(conn) else TICKETS_BY_STATUS_BASE_QUERY
     return pd.read_sql_query(query, conn)
 
 
 def unresolved_tickets(conn):
     """Return all tickets not resolved."""
-    query = """
-    SELECT * FROM it_tickets
-    WHERE status != 'Resolved'
-    ORDER BY created_date DESC
-    """
-    return pd.read_sql_query(query, conn)
+    return pd.read_sql_query(UNRESOLVED_TICKETS_QUERY, conn)
 
 
 def average_resolution_time(conn):
     """Compute average resolution hours for resolved tickets."""
-    query = """
-    SELECT AVG(
-        JULIANDAY(resolved_date) - JULIANDAY(created_date)
-    ) * 24 AS avg_resolution_hours
-    FROM it_tickets
-    WHERE resolved_date IS NOT NULL
-    """
+    query = AVERAGE_RESOLUTION_QUERY if _has_rollup(conn) else AVERAGE_RESOLUTION_BASE_QUERY
     return pd.read_sql_query(query, conn)
 
 
+def search_tickets(conn, text, limit=20, offset=0):
+    """
+    Tickets whose subject or description matches every word of text
+    (word* for a prefix), best bm25 match first (newest first past
+    RANKED_SEARCH_LIMIT matches), with a highlighted snippet.
+    Page with limit/offset; count_ticket_matches() gives the total.
+    """
+    match = fts_query(text)
+    if not match:
+        return pd.DataFrame(columns=["id", "ticket_id", "priority", "status", "assigned_to",
+                                     "subject", "snippet", "score"])
+    ranked = count_fts_matches(conn, "tickets_fts", match, RANKED_SEARCH_LIMIT + 1) <= RANKED_SEARCH_LIMIT
+    query = SEARCH_TICKETS_QUERY if ranked else SEARCH_TICKETS_NEWEST_QUERY
+    return pd.read_sql_query(query, conn, params=(match, limit, offset))
+
+
+def count_ticket_matches(conn, text, cap=None):
+    """Number of tickets search_tickets() would page through (at most cap)."""
+    match = fts_query(text)
+    if not match:
+        return 0
+    return count_fts_matches(conn, "tickets_fts", match, cap)
 
 
-def load_csv_to_table_it_tickets(conn, csv_path, table_name):
-    """Load IT tickets CSV into the database."""
 
-    csv_path = Path(csv_path)
 
-    if not csv_path.exists():
-        print(f"⚠️ File not found: {csv_path}")
-        return 0
+def compute_resolved_dates(df):
+    """
+    Return resolved_date strings for a frame of CSV tickets.
+    Resolved tickets get created_date + whole resolution_time_hours,
+    formatted as "%Y-%m-%d %H:%M:%S"; every other row gets None.
+    Fully vectorized: one parse, one timedelta add and one format per column.
+    """
+    created = pd.to_datetime(df["created_date"], format=TICKET_DATE_FORMAT, errors="coerce")
+    hours = np.trunc(pd.to_numeric(df["resolution_time_hours"], errors="coerce"))
+    resolved = created + pd.to_timedelta(hours, unit="h")
+
+    mask = (df["status"] == "Resolved") & resolved.notna()
+    formatted = resolved.dt.strftime(TICKET_DATE_FORMAT).astype(object)
+    return formatted.where(mask, None)
 
-    df = pd.read_csv(csv_path)
 
+def _prepare_tickets_frame(df):
+    """Rename CSV columns to the it_tickets schema and derive missing fields."""
     # Rename columns into DB format
     df = df.rename(columns={
         "created_at": "created_date"
@@ -127,23 +212,7 @@ def load_csv_to_table_it_tickets(conn, csv_path, table_name):
     # Build subject (first two words of description)
     df["subject"] = df["description"].apply(lambda d: " ".join(d.split()[:2]) if isinstance(d, str) else "No Subject")
 
-    # Compute resolved_date
-    resolved_dates = []
-    for _, row in df.iterrows():
-        created = row["created_date"]
-        hours = row["resolution_time_hours"]
-        status = row["status"]
-
-        if status != "Resolved":
-            resolved_dates.append(None)
-        else:
-            ts = datetime.strptime(created, "%Y-%m-%d %H:%M:%S")
-            resolved_dates.append(ts + timedelta(hours=int(hours)))
-
-    df["resolved_date"] = [
-        dt.strftime("%Y-%m-%d %H:%M:%S") if dt is not None else None
-        for dt in resolved_dates
-    ]
+    df["resolved_date"] = compute_resolved_dates(df)
 
     # Final columns to match DB schema
     required_cols = [
@@ -152,7 +221,27 @@ def load_csv_to_table_it_tickets(conn, csv_path, table_name):
         "resolved_date", "assigned_to"
     ]
 
-    df = df[required_cols]
+    return df[required_cols]
+
+
+def load_csv_to_table_it_tickets(conn, csv_path, table_name, chunksize=None):
+    """
+    Load IT tickets CSV into the database.
+    Pass chunksize to stream the file in chunks (bounded memory).
+    """
+
+    csv_path = Path(csv_path)
+
+    if not csv_path.exists():
+        print(f"⚠️ File not found: {csv_path}")
+        return 0
+
+    if chunksize:
+        return stream_csv_to_table(conn, csv_path, table_name, _prepare_tickets_frame, chunksize)
+
+    df = pd.read_csv(csv_path)
+
+    df = _prepare_tickets_frame(df)
 
     df.to_sql(
         name=table_name,
@@ -160,6 +249,7 @@ def load_csv_to_table_it_tickets(conn, csv_path, table_name):
         if_exists="append",
         index=False
     )
+    bump_table_version(table_name)
 
     print(f"✅ Loaded {len(df)} IT tickets into '{table_name}'.")
     return len(df)
@@ -0,0 +1,244 @@
+"""
+Response cache and request coalescing for the AI assistant.
+
+Replies are stored in the ai_response_cache table (migration 6), keyed by
+a hash of the model, the conversation context before the prompt (system
+prompt, rolling summary, recent turns), the normalized prompt and a data
+fingerprint of the tables the prompt refers to. A fresh conversation that
+asks a question already answered, with the data unchanged, is served from
+the cache; a write to a referenced table changes the fingerprint, so the
+old answer is no longer found. Entries expire after AI_CACHE_TTL and the
+least recently used are pruned beyond AI_CACHE_MAX_ENTRIES.
+
+Identical requests that arrive while one is already in flight (e.g. from
+other sessions) do not go upstream: they follow the in-flight request and
+replay its deltas as they stream in.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from app.data.db import DB_PATH, pooled_connection, transaction
+from app.data.schema import create_ai_cache_table, table_fingerprint
+
+AI_CACHE_TTL = 6 * 3600         # seconds
+AI_CACHE_MAX_ENTRIES = 500
+
+# Words that make a prompt depend on a table's contents.
+TABLE_KEYWORDS = {
+    "cyber_incidents": ("incident", "cyber", "phishing", "malware", "ddos", "breach", "attack", "severity"),
+    "it_tickets": ("ticket", "resolution", "resolved", "unresolved", "assigned", "priority", "support"),
+    "datasets_metadata": ("dataset", "metadata", "record", "source", "upload"),
+}
+
+_ready = set()                  # db paths whose cache table has been ensured
+_ready_lock = threading.Lock()
+
+_flights = {}                   # cache key -> _Flight
+_flights_lock = threading.Lock()
+
+_cache_stats = {"hits": 0, "misses": 0, "coalesced": 0, "stored": 0, "expired": 0, "saved_ms": 0.0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _cache_stats[name] += amount
+
+
+def _ensure_table(db_path):
+    with _ready_lock:
+        if db_path in _ready:
+            return
+        with transaction(db_path) as conn:
+            create_ai_cache_table(conn)
+        _ready.add(db_path)
+
+
+def normalize_prompt(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", text or "").strip().lower().rstrip(" ?!.")
+
+
+def referenced_tables(prompt):
+    """Tables whose contents the prompt is about, judged by TABLE_KEYWORDS."""
+    words = normalize_prompt(prompt)
+    return tuple(t for t, keys in TABLE_KEYWORDS.items() if any(k in words for k in keys))
+
+
+def data_fingerprint(tables, db_path=DB_PATH):
+    """{table: fingerprint} for the referenced tables (row count, max id, max updated_at)."""
+    if not tables:
+        return {}
+    with pooled_connection(db_path) as conn:
+        return {t: table_fingerprint(conn, t) for t in tables}
+
+
+def cache_key(model, context, prompt, fingerprint):
+    """Hash of everything the reply depends on; context excludes the prompt itself."""
+    payload = json.dumps({
+        "model": model,
+        "context": [(m["role"], m["content"]) for m in context],
+        "prompt": normalize_prompt(prompt),
+        "data": fingerprint,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup(key, db_path=DB_PATH):
+    """Return (reply, latency_ms) for a live entry, or None."""
+    _ensure_table(db_path)
+    now = time.time()
+    with transaction(db_path) as conn:
+        row = conn.execute(
+            "SELECT reply, latency_ms, created_at FROM ai_response_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[2] > AI_CACHE_TTL:
+            conn.execute("DELETE FROM ai_response_cache WHERE cache_key = ?", (key,))
+            _count("expired")
+            return None
+        conn.execute(
+            "UPDATE ai_response_cache SET last_used = ?, hits = hits + 1 WHERE cache_key = ?", (now, key)
+        )
+    return row[0], row[1]
+
+
+def store(key, prompt, reply, latency_ms, db_path=DB_PATH):
+    """Save a reply, then drop expired entries and the least recently used beyond the cap."""
+    _ensure_table(db_path)
+    now = time.time()
+    with transaction(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO ai_response_cache (cache_key, prompt, reply, latency_ms, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (cache_key) DO UPDATE SET
+                reply = excluded.reply, latency_ms = excluded.latency_ms,
+                created_at = excluded.created_at, last_used = excluded.last_used
+            """,
+            (key, prompt, reply, latency_ms, now, now),
+        )
+        conn.execute("DELETE FROM ai_response_cache WHERE created_at < ?", (now - AI_CACHE_TTL,))
+        conn.execute(
+            """
+            DELETE FROM ai_response_cache WHERE cache_key IN (
+                SELECT cache_key FROM ai_response_cache
+                ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (AI_CACHE_MAX_ENTRIES,),
+        )
+    _count("stored")
+
+
+def clear_ai_cache(db_path=DB_PATH):
+    _ensure_table(db_path)
+    with transaction(db_path) as conn:
+        conn.execute("DELETE FROM ai_response_cache")
+
+
+class _Flight:
+    """One upstream request whose deltas other callers can replay."""
+
+    def __init__(self):
+        self.deltas = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def push(self, delta):
+        with self._cond:
+            self.deltas.append(delta)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self.done, self.error = True, error
+            self._cond.notify_all()
+
+    def follow(self):
+        """Yield every delta (past and future); raise the leader's error."""
+        seen = 0
+        while True:
+            with self._cond:
+                while seen == len(self.deltas) and not self.done:
+                    self._cond.wait()
+                pending, seen = self.deltas[seen:], len(self.deltas)
+                done, error = self.done, self.error
+            yield from pending
+            if done and seen == len(self.deltas):
+                if error is not None:
+                    raise error
+                return
+
+
+def _produce(assistant, context, key, prompt, flight, db_path):
+    """Run the upstream request into flight, then cache the complete reply."""
+    start = time.perf_counter()
+    error = None
+    try:
+        for delta in assistant.stream(context):
+            flight.push(delta)
+    except Exception as e:
+        error = e
+    if error is None:
+        try:  # before the flight closes, so a repeat right after it is a hit
+            store(key, prompt, "".join(flight.deltas), (time.perf_counter() - start) * 1000, db_path)
+        except sqlite3.Error as e:
+            print(f"⚠️  AI reply not cached: {e}")
+    with _flights_lock:
+        _flights.pop(key, None)
+    flight.finish(error)
+
+
+def cached_stream(assistant, context, prompt, db_path=DB_PATH):
+    """
+    Stream a reply to context (whose last message is prompt) through the
+    cache: a hit yields the stored reply at once, an identical in-flight
+    request is followed, and anything else starts an upstream request via
+    assistant.stream(). The upstream request runs on its own thread, so a
+    caller that stops reading early does not cut off the others, and the
+    reply is still cached.
+    """
+    try:
+        fingerprint = data_fingerprint(referenced_tables(prompt), db_path)
+        key = cache_key(assistant.model, context[:-1], prompt, fingerprint)
+        cached = lookup(key, db_path)
+    except sqlite3.Error as e:
+        print(f"⚠️  AI cache unavailable: {e}")
+        yield from assistant.stream(context)
+        return
+
+    if cached is not None:
+        _count("hits")
+        _count("saved_ms", cached[1])
+        yield cached[0]
+        return
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if leader:
+        _count("misses")
+        threading.Thread(target=_produce, name="ai-cache-request", daemon=True,
+                         args=(assistant, context, key, prompt, flight, db_path)).start()
+    else:
+        _count("coalesced")
+    yield from flight.follow()
+
+
+def ai_cache_stats():
+    """Hits, misses, coalesced requests, hit ratio and upstream latency saved by hits."""
+    with _stats_lock:
+        stats = dict(_cache_stats)
+    lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+    stats["hit_ratio"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+    return stats
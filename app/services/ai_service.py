@@ -0,0 +1,279 @@
+"""
+Streaming, bounded-context client for the AI assistant page.
+
+Requests run on one background asyncio loop through openai.AsyncOpenAI, so
+the Streamlit script thread only renders text deltas as they arrive
+(stream() is a plain generator for st.write_stream). Every request is
+bounded by an overall timeout and an idle timeout between stream events,
+and at most MAX_CONCURRENT_REQUESTS run at once across all sessions.
+
+Only the newest messages that fit CONTEXT_TOKEN_BUDGET are sent verbatim;
+older turns are folded into a rolling summary (summarize()) that is sent
+as a system message instead of the full history.
+
+Point base_url at app/services/ai_stub_server.py to run without the API.
+"""
+
+import asyncio
+import math
+import queue
+import threading
+
+from app.data.metrics import LatencyHistogram
+
+try:
+    from openai import AsyncOpenAI
+    HAS_OPENAI = True
+except ImportError:
+    HAS_OPENAI = False
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+    HAS_TIKTOKEN = True
+except Exception:
+    HAS_TIKTOKEN = False
+
+AI_MODEL = "gpt-4.1-mini"
+
+# Conversation sent per request: system prompt + summary + recent turns.
+CONTEXT_TOKEN_BUDGET = 4000
+SUMMARY_MAX_TOKENS = 300
+MESSAGE_OVERHEAD_TOKENS = 4    # role and framing per message
+
+# Per request: total time, longest gap between stream events, and how
+# long to wait for a free slot before giving up.
+REQUEST_TIMEOUT = 60.0         # seconds
+IDLE_TIMEOUT = 20.0
+QUEUE_TIMEOUT = 10.0
+MAX_CONCURRENT_REQUESTS = 4
+
+SUMMARY_PROMPT = (
+    "Condense the conversation below into a short summary for the assistant's "
+    "own memory. Keep names, ids, numbers, decisions and open questions; drop "
+    "pleasantries. Start from the previous summary if there is one."
+)
+
+_loop = None
+_loop_lock = threading.Lock()
+_slots = None                  # asyncio.Semaphore, created on the loop
+
+_first_token_latency = LatencyHistogram()
+_request_latency = LatencyHistogram()
+_ai_stats = {
+    "requests": 0,
+    "completed": 0,
+    "timeouts": 0,
+    "rejected_busy": 0,
+    "errors": 0,
+    "cancelled": 0,
+    "summaries": 0,
+}
+_stats_lock = threading.Lock()
+
+
+class AIServiceBusy(RuntimeError):
+    """Raised when no request slot frees up within QUEUE_TIMEOUT."""
+
+
+class AIRequestError(RuntimeError):
+    """Raised when the API reports a failed response."""
+
+
+def _count(name):
+    with _stats_lock:
+        _ai_stats[name] += 1
+
+
+def _get_loop():
+    """The process-wide event loop all AI requests run on (daemon thread)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="ai-client-loop", daemon=True).start()
+        return _loop
+
+
+def estimate_tokens(text):
+    """Token count of text (tiktoken if installed, else ~4 characters per token)."""
+    if not text:
+        return 0
+    if HAS_TIKTOKEN:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def message_tokens(message):
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def summary_message(summary):
+    return {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+
+
+def build_context(messages, summary="", summarized=0, budget=None):
+    """
+    Choose what to send for the next request.
+
+    messages is the full chat (system prompt first); the first `summarized`
+    non-system messages are already covered by `summary`. Returns
+    (context, overflow, tokens): the messages to send, the older messages
+    that no longer fit (fold them into the summary with summarize()), and
+    the estimated token count of context. The newest message is always sent.
+    """
+    budget = CONTEXT_TOKEN_BUDGET if budget is None else budget
+    system = [m for m in messages if m["role"] == "system"][:1]
+    history = [m for m in messages if m["role"] != "system"][summarized:]
+    head = system + ([summary_message(summary)] if summary else [])
+    used = sum(message_tokens(m) for m in head)
+
+    kept = 0
+    for message in reversed(history):
+        cost = message_tokens(message)
+        if kept and used + cost > budget:
+            break
+        used += cost
+        kept += 1
+    recent = history[len(history) - kept:]
+    overflow = history[:len(history) - kept]
+    return head + recent, overflow, used
+
+
+class AssistantClient:
+    """Async OpenAI Responses client with streaming, timeouts and a shared concurrency cap."""
+
+    def __init__(self, api_key, base_url=None, model=AI_MODEL, timeout=REQUEST_TIMEOUT,
+                 idle_timeout=IDLE_TIMEOUT, max_retries=1):
+        if not HAS_OPENAI:
+            raise RuntimeError("openai is not installed.")
+        self.model = model
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._client = AsyncOpenAI(api_key=api_key, base_url=base_url,
+                                   timeout=timeout, max_retries=max_retries)
+
+    async def _acquire_slot(self):
+        global _slots
+        if _slots is None:
+            _slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        try:
+            await asyncio.wait_for(_slots.acquire(), QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            _count("rejected_busy")
+            raise AIServiceBusy("The assistant is busy, please try again.") from None
+        return _slots
+
+    async def astream(self, messages, max_output_tokens=None):
+        """Yield the reply's text deltas as they arrive."""
+        _count("requests")
+        slots = await self._acquire_slot()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.timeout
+        first = True
+        stream = None
+        try:
+            options = {"max_output_tokens": max_output_tokens} if max_output_tokens else {}
+            stream = await asyncio.wait_for(
+                self._client.responses.create(model=self.model, input=messages, stream=True, **options),
+                self.timeout,
+            )
+            events = stream.__aiter__()
+            while True:
+                wait = min(self.idle_timeout, deadline - loop.time())
+                try:
+                    event = await asyncio.wait_for(events.__anext__(), max(wait, 0))
+                except StopAsyncIteration:
+                    break
+                if event.type == "response.output_text.delta":
+                    if first:
+                        _first_token_latency.observe((loop.time() - start) * 1000)
+                        first = False
+                    yield event.delta
+                elif event.type in ("response.failed", "error"):
+                    raise AIRequestError(f"AI request failed ({event.type}).")
+            _count("completed")
+        except asyncio.TimeoutError:
+            _count("timeouts")
+            raise TimeoutError("The assistant took too long to respond.") from None
+        except asyncio.CancelledError:
+            _count("cancelled")
+            raise
+        except Exception:
+            _count("errors")
+            raise
+        finally:
+            slots.release()
+            _request_latency.observe((loop.time() - start) * 1000)
+            if stream is not None:
+                await stream.close()
+
+    async def acomplete(self, messages, max_output_tokens=None):
+        """Return the whole reply text (streamed underneath, same limits)."""
+        return "".join([delta async for delta in self.astream(messages, max_output_tokens)])
+
+    def stream(self, messages, max_output_tokens=None):
+        """
+        Synchronous generator of text deltas for the calling thread (e.g.
+        st.write_stream). The request itself runs on the background loop;
+        closing the generator early cancels it.
+        """
+        deltas = queue.Queue()
+
+        async def pump():
+            try:
+                async for delta in self.astream(messages, max_output_tokens):
+                    deltas.put(("delta", delta))
+                deltas.put(("end", None))
+            except BaseException as e:  # includes cancellation
+                deltas.put(("error", e))
+                raise
+
+        future = asyncio.run_coroutine_threadsafe(pump(), _get_loop())
+        try:
+            while True:
+                kind, value = deltas.get()
+                if kind == "delta":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    return
+        finally:
+            future.cancel()
+
+    def complete(self, messages, max_output_tokens=None):
+        """Blocking wrapper around acomplete() for scripts."""
+        future = asyncio.run_coroutine_threadsafe(self.acomplete(messages, max_output_tokens), _get_loop())
+        return future.result()
+
+    async def asummarize(self, previous_summary, messages):
+        """Fold messages into the rolling summary and return the new summary."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        if previous_summary:
+            transcript = f"Previous summary:\n{previous_summary}\n\nConversation:\n{transcript}"
+        _count("summaries")
+        reply = await self.acomplete(
+            [{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": transcript}],
+            max_output_tokens=SUMMARY_MAX_TOKENS,
+        )
+        return reply.strip()
+
+    def summarize_later(self, previous_summary, messages):
+        """Start asummarize() on the background loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(self.asummarize(previous_summary, messages), _get_loop())
+
+    def summarize(self, previous_summary, messages):
+        """Blocking wrapper around asummarize() for scripts."""
+        return self.summarize_later(previous_summary, messages).result()
+
+
+def ai_metrics():
+    """Request counters plus time-to-first-token and total latency percentiles."""
+    with _stats_lock:
+        stats = dict(_ai_stats)
+    stats["first_token_ms"] = _first_token_latency.to_dict()
+    stats["request_ms"] = _request_latency.to_dict()
+    stats["max_concurrent_requests"] = MAX_CONCURRENT_REQUESTS
+    return stats
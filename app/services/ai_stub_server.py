@@ -0,0 +1,158 @@
+"""
+Local stand-in for the OpenAI Responses API, for trying the AI assistant
+without a key or network access.
+
+POST /v1/responses answers with "Stub reply to: <last user message>",
+either as one JSON response or, with "stream": true, as server-sent events
+(response.created, response.output_text.delta per word,
+response.completed) in the same shapes the openai SDK parses.
+--token-delay and --first-token-delay simulate a slow model.
+
+Usage:
+    python -m app.services.ai_stub_server --port 8765
+    # then set OPEN_AI_BASE_URL = "http://127.0.0.1:8765/v1" in .streamlit/secrets.toml
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+
+
+def _last_user_text(payload):
+    items = payload.get("input")
+    if isinstance(items, str):
+        return items
+    for item in reversed(items or []):
+        if item.get("role") == "user":
+            content = item.get("content")
+            if isinstance(content, list):
+                return " ".join(part.get("text", "") for part in content)
+            return content or ""
+    return ""
+
+
+def _response_object(response_id, model, text, status):
+    item = {
+        "id": f"msg_{response_id}",
+        "type": "message",
+        "role": "assistant",
+        "status": status,
+        "content": [{"type": "output_text", "text": text, "annotations": []}] if text else [],
+    }
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": status,
+        "output": [item] if status == "completed" else [],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {"input_tokens": 0, "output_tokens": len(text.split()), "total_tokens": len(text.split())},
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    token_delay = 0.0
+    first_token_delay = 0.0
+
+    def log_message(self, fmt, *args):  # keep the console quiet
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_event(self, event):
+        chunk = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/responses", "/responses"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        model = payload.get("model", "stub")
+        text = f"Stub reply to: {_last_user_text(payload)}"
+        limit = payload.get("max_output_tokens")
+        words = text.split(" ")[:limit] if limit else text.split(" ")
+        text = " ".join(words)
+        response_id = f"resp_{uuid.uuid4().hex[:12]}"
+        self.server.requests += 1
+
+        if not payload.get("stream"):
+            time.sleep(self.first_token_delay + self.token_delay * len(words))
+            self._send_json(200, _response_object(response_id, model, text, "completed"))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        seq = 0
+        try:
+            self._send_event({"type": "response.created", "sequence_number": seq,
+                              "response": _response_object(response_id, model, "", "in_progress")})
+            time.sleep(self.first_token_delay)
+            for i, word in enumerate(words):
+                seq += 1
+                self._send_event({
+                    "type": "response.output_text.delta", "sequence_number": seq,
+                    "item_id": f"msg_{response_id}", "output_index": 0, "content_index": 0,
+                    "delta": word if i == 0 else f" {word}", "logprobs": [],
+                })
+                time.sleep(self.token_delay)
+            seq += 1
+            self._send_event({"type": "response.completed", "sequence_number": seq,
+                              "response": _response_object(response_id, model, text, "completed")})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client cancelled mid-stream
+
+
+def start_stub_server(port=0, token_delay=0.0, first_token_delay=0.0):
+    """
+    Serve the stub on 127.0.0.1 from a daemon thread. Returns the server;
+    its base URL is f"http://127.0.0.1:{server.server_port}/v1" and
+    server.requests counts the requests it answered.
+    """
+    handler = type("Handler", (StubHandler,), {
+        "token_delay": token_delay, "first_token_delay": first_token_delay,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, name="ai-stub-server", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI Responses API.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token-delay", type=float, default=0.05, help="seconds between streamed words")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="seconds before the first word")
+    args = parser.parse_args(argv)
+    server = start_stub_server(args.port, args.token_delay, args.first_token_delay)
+    print(f"✅ Stub Responses API on http://127.0.0.1:{server.server_port}/v1 (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Per-section render profiling for the Streamlit pages.
+
+A page creates one RenderProfiler per rerun and calls step(name, **frames)
+after each stage (load, normalize, filter, KPIs, charts, table): the time
+since the previous step is recorded under `name`, with the row/column
+count and deep memory size of any DataFrames passed in. finish() closes
+the rerun, appends it as one JSON line to DATA/render_trace.jsonl
+(rotating) and returns it for the page's debug panel.
+
+Profiling is off unless APP_PROFILE or the page's ?profile= query param is
+set: "1" times sections, "mem" also tracks peak Python memory per section
+with tracemalloc (slower; the peak is process-wide, so concurrent sessions
+show up in it). When db query instrumentation is on (DB_QUERY_STATS=1),
+each rerun also records how many statements ran and their total time.
+
+Summarize the trace from the repo root:
+    python -m app.services.profiler
+    python -m app.services.profiler --page it_tickets --last 50
+"""
+
+import argparse
+import json
+import logging
+import logging.handlers
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from app.data import db
+
+PROFILE_ENV = "APP_PROFILE"
+PROFILE_MODES = {"1": "time", "true": "time", "time": "time", "mem": "mem", "memory": "mem"}
+RENDER_TRACE = Path(os.environ.get("APP_RENDER_TRACE", Path("DATA") / "render_trace.jsonl"))
+RENDER_TRACE_BYTES = 5 * 1024 * 1024
+RENDER_TRACE_BACKUPS = 3
+
+_trace_logger = None
+_trace_lock = threading.Lock()
+_tracemalloc_users = 0          # profilers currently relying on tracemalloc
+_tracemalloc_ours = False       # whether we started it (and so may stop it)
+_tracemalloc_lock = threading.Lock()
+
+
+def profile_mode(query_value=None):
+    """'time', 'mem' or None, from the query param value or else APP_PROFILE."""
+    value = query_value if query_value is not None else os.environ.get(PROFILE_ENV, "")
+    return PROFILE_MODES.get(str(value).strip().lower())
+
+
+def _get_trace_logger():
+    global _trace_logger
+    with _trace_lock:
+        if _trace_logger is None:
+            RENDER_TRACE.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                RENDER_TRACE, maxBytes=RENDER_TRACE_BYTES,
+                backupCount=RENDER_TRACE_BACKUPS, encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("app.services.render_trace")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.handlers = [handler]
+            _trace_logger = logger
+        return _trace_logger
+
+
+def frame_size(df):
+    """{"rows", "cols", "kib"} for a DataFrame (deep memory usage), None otherwise."""
+    if df is None or not hasattr(df, "memory_usage"):
+        return None
+    return {
+        "rows": len(df),
+        "cols": df.shape[1],
+        "kib": round(int(df.memory_usage(deep=True, index=True).sum()) / 1024, 1),
+    }
+
+
+def _query_totals():
+    if not db.QUERY_STATS_ENABLED:
+        return None
+    stats = db.query_stats()
+    return sum(s["count"] for s in stats), sum(s["total_ms"] for s in stats)
+
+
+class RenderProfiler:
+    """Times the named sections of one page rerun. A disabled profiler does nothing."""
+
+    def __init__(self, page, mode=None):
+        self.page = page
+        self.mode = mode
+        self.enabled = mode is not None
+        self.sections = []
+        self.record = None
+        if not self.enabled:
+            return
+        self._tracing = mode == "mem"
+        if self._tracing:
+            _start_tracemalloc()
+        self._queries = _query_totals()
+        self._start = self._last = time.perf_counter()
+
+    def step(self, name, **frames):
+        """Record the time since the previous step (or the start) as section `name`."""
+        if not self.enabled or self.record is not None:
+            return
+        now = time.perf_counter()
+        section = {"name": name, "ms": round((now - self._last) * 1000, 2)}
+        if self._tracing:
+            section["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.reset_peak()
+        sizes = {key: frame_size(df) for key, df in frames.items()}
+        sizes = {key: size for key, size in sizes.items() if size is not None}
+        if sizes:
+            section["frames"] = sizes
+        self.sections.append(section)
+        self._last = time.perf_counter()   # frame sizing is not charged to the next section
+
+    def finish(self):
+        """Close the rerun, append it to the trace file and return it (None if disabled)."""
+        if not self.enabled:
+            return None
+        if self.record is not None:
+            return self.record
+        record = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "page": self.page,
+            "mode": self.mode,
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 2),
+            "sections": self.sections,
+        }
+        if self._tracing:
+            record["peak_kib"] = max((s["peak_kib"] for s in self.sections), default=0.0)
+            self._release_tracemalloc()
+        queries = _query_totals()
+        if queries is not None and self._queries is not None:
+            record["queries"] = queries[0] - self._queries[0]
+            record["query_ms"] = round(queries[1] - self._queries[1], 2)
+        self.record = record
+        try:
+            _get_trace_logger().info(json.dumps(record))
+        except OSError as e:
+            print(f"⚠️  Render trace not written: {e}")
+        return record
+
+    def _release_tracemalloc(self):
+        if self._tracing:
+            self._tracing = False
+            _stop_tracemalloc()
+
+    def __del__(self):
+        # A rerun cut short (st.stop, st.rerun) never reaches finish().
+        if self.enabled:
+            self._release_tracemalloc()
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_ours
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_ours = True
+        _tracemalloc_users += 1
+    tracemalloc.reset_peak()
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_ours
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_ours:
+            tracemalloc.stop()
+            _tracemalloc_ours = False
+
+
+def start_profiler(page, query_value=None):
+    """Profiler for one rerun of `page`; disabled unless ?profile= or APP_PROFILE is set."""
+    return RenderProfiler(page, profile_mode(query_value))
+
+
+def profile_rows(record):
+    """Display rows for a finished rerun: section, ms, share of the total, peak and frame sizes."""
+    rows = []
+    for section in record["sections"]:
+        frames = ", ".join(f"{key} {f['rows']:,}×{f['cols']} ({f['kib']:,.0f} KiB)"
+                           for key, f in section.get("frames", {}).items())
+        row = {
+            "section": section["name"],
+            "ms": section["ms"],
+            "share": f"{section['ms'] / record['total_ms']:.0%}" if record["total_ms"] else "-",
+        }
+        if "peak_kib" in section:
+            row["peak_kib"] = section["peak_kib"]
+        row["frames"] = frames
+        rows.append(row)
+    return rows
+
+
+def read_trace(path=None, page=None, last=None):
+    """Reruns from the trace file (oldest first), optionally one page's last `last` runs."""
+    path = Path(path) if path is not None else RENDER_TRACE
+    if not path.exists():
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if page is None or record.get("page") == page:
+                records.append(record)
+    return records[-last:] if last else records
+
+
+def summarize_trace(records):
+    """
+    One row per (page, section): runs, median and p90 ms, max peak KiB and
+    the rows of the largest frame seen, in page order.
+    """
+    grouped = {}
+    for record in records:
+        for section in record["sections"] + [{"name": "(total)", "ms": record["total_ms"],
+                                               "peak_kib": record.get("peak_kib")}]:
+            grouped.setdefault((record["page"], section["name"]), []).append(section)
+    rows = []
+    for (page, name), sections in grouped.items():
+        times = sorted(s["ms"] for s in sections)
+        peaks = [s["peak_kib"] for s in sections if s.get("peak_kib") is not None]
+        frame_rows = [f["rows"] for s in sections for f in s.get("frames", {}).values()]
+        rows.append({
+            "page": page,
+            "section": name,
+            "runs": len(times),
+            "median_ms": round(statistics.median(times), 2),
+            "p90_ms": times[min(len(times) - 1, int(len(times) * 0.9))],
+            "peak_kib": max(peaks) if peaks else None,
+            "max_rows": max(frame_rows) if frame_rows else None,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the page render trace.")
+    parser.add_argument("--trace", default=str(RENDER_TRACE), help="JSONL trace file")
+    parser.add_argument("--page", help="only this page, e.g. it_tickets")
+    parser.add_argument("--last", type=int, help="only the last N reruns")
+    args = parser.parse_args(argv)
+
+    records = read_trace(args.trace, args.page, args.last)
+    if not records:
+        print(f"⚠️  No reruns in {args.trace}; open a page with ?profile=1 or APP_PROFILE=1 first.")
+        return 1
+    print(f"{len(records)} reruns from {records[0]['time']} to {records[-1]['time']}")
+    print(f"{'page':<26} {'section':<14} {'runs':>5} {'median ms':>10} {'p90 ms':>9} {'peak KiB':>10} {'max rows':>9}")
+    for row in summarize_trace(records):
+        peak = f"{row['peak_kib']:10.0f}" if row["peak_kib"] is not None else f"{'-':>10}"
+        max_rows = f"{row['max_rows']:9d}" if row["max_rows"] is not None else f"{'-':>9}"
+        print(f"{row['page']:<26} {row['section']:<14} {row['runs']:5d} {row['median_ms']:10.2f} "
+              f"{row['p90_ms']:9.2f} {peak} {max_rows}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,37 +1,420 @@
 import bcrypt
+import csv
+import json
+import os
 import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from itertools import islice
 from pathlib import Path
-from app.data.db import connect_database
+from app.data.cache import bump_table_version
+from app.data.db import DB_PATH, connect_database, transaction
+from app.data.metrics import LatencyHistogram
 from app.data.users import get_user_by_username, insert_user
 from app.data.schema import create_users_table
 
+# bcrypt work factor: each +1 doubles the cost of a hash.
+BCRYPT_ROUNDS = 12
+
+# User records are cached briefly so a burst of logins does one lookup.
+USER_CACHE_TTL = 30.0          # seconds
+USER_CACHE_MAX = 1024          # entries
+
+# bcrypt runs on a bounded pool (bcrypt releases the GIL while hashing).
+# At most HASH_WORKERS hashes run at once and HASH_QUEUE_LIMIT more may
+# wait; anything beyond that is rejected instead of piling up.
+HASH_WORKERS = 4
+HASH_QUEUE_LIMIT = 16
+HASH_TIMEOUT = 10.0            # seconds a caller waits for its hash
+
+_user_cache = {}               # username -> (expires_at, user row or None)
+_user_cache_lock = threading.Lock()
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_LIMIT)
+
+_login_latency = LatencyHistogram()
+_login_stats = {
+    "attempts": 0,
+    "succeeded": 0,
+    "failed": 0,
+    "rejected_overload": 0,
+    "timeouts": 0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+}
+_stats_lock = threading.Lock()
+
+
+class HashPoolOverloaded(RuntimeError):
+    """Raised when the bcrypt pool's queue is full."""
+
+
+def _count(name):
+    with _stats_lock:
+        _login_stats[name] += 1
+
+
+def _get_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+        return _hash_pool
+
+
+def _run_hash(fn, *args):
+    """
+    Run a bcrypt call on the pool and wait for it.
+    Raises HashPoolOverloaded if the queue is full and
+    concurrent.futures.TimeoutError after HASH_TIMEOUT.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        raise HashPoolOverloaded("Too many password checks in progress.")
+    try:
+        future = _get_hash_pool().submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    # the slot is held until the hash really finishes, even if we time out
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future.result(timeout=HASH_TIMEOUT)
+
+
+def _get_user_cached(username):
+    """get_user_by_username() behind a short TTL cache (misses included)."""
+    now = time.monotonic()
+    with _user_cache_lock:
+        entry = _user_cache.get(username)
+        if entry is not None and entry[0] > now:
+            _count("cache_hits")
+            return entry[1]
+    _count("cache_misses")
+    user = get_user_by_username(username)
+    with _user_cache_lock:
+        if len(_user_cache) >= USER_CACHE_MAX:
+            # drop expired entries first, then the oldest ones
+            for key in [k for k, (exp, _) in _user_cache.items() if exp <= now]:
+                del _user_cache[key]
+            while len(_user_cache) >= USER_CACHE_MAX:
+                del _user_cache[next(iter(_user_cache))]
+        _user_cache[username] = (now + USER_CACHE_TTL, user)
+    return user
+
+
+def invalidate_user_cache(username=None):
+    """Forget one cached user record, or all of them."""
+    with _user_cache_lock:
+        if username is None:
+            _user_cache.clear()
+        else:
+            _user_cache.pop(username, None)
+
+
+def hash_password(password, rounds=BCRYPT_ROUNDS):
+    """Return the bcrypt hash of password as a str."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _hash_job(job):
+    """(password, rounds) -> hash; module level so worker processes can unpickle it."""
+    password, rounds = job
+    return hash_password(password, rounds)
+
+
+def _existing_usernames(conn, usernames, chunk=500):
+    """Return which of usernames are already in the users table."""
+    usernames = list(usernames)
+    found = set()
+    for i in range(0, len(usernames), chunk):
+        part = usernames[i:i + chunk]
+        rows = conn.execute(
+            f"SELECT username FROM users WHERE username IN ({', '.join('?' for _ in part)})", part
+        ).fetchall()
+        found.update(row[0] for row in rows)
+    return found
+
+
+def register_users_batch(users, rounds=BCRYPT_ROUNDS, workers=None, executor="process",
+                         db_path=DB_PATH):
+    """
+    Register many users at once.
+
+    users is an iterable of (username, password[, role]) tuples or dicts
+    with those keys. Usernames already in the table (or repeated in the
+    batch) are skipped before hashing. The remaining passwords are hashed
+    in parallel, on worker processes (executor="process") or threads
+    (executor="thread"; bcrypt releases the GIL). All rows are then
+    inserted in a single transaction.
+
+    Returns a report dict with registered/skipped/invalid counts and
+    hashing throughput.
+    """
+    if executor not in ("process", "thread"):
+        raise ValueError("executor must be 'process' or 'thread'")
+    workers = workers or os.cpu_count() or 1
+
+    pending, seen, invalid, repeated = [], set(), [], 0
+    for user in users:
+        if isinstance(user, dict):
+            username, password, role = user.get("username"), user.get("password"), user.get("role")
+        else:
+            username, password, role = (tuple(user) + (None,))[:3]
+        if not username or not password:
+            invalid.append(username)
+            continue
+        if username in seen:
+            repeated += 1
+            continue
+        seen.add(username)
+        pending.append((username, password, role or "user"))
+
+    with transaction(db_path) as conn:
+        existing = _existing_usernames(conn, seen)
+    pending = [u for u in pending if u[0] not in existing]
+
+    start = time.perf_counter()
+    jobs = [(password, rounds) for _, password, _ in pending]
+    if jobs:
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            chunksize = max(1, len(jobs) // (workers * 4)) if executor == "process" else 1
+            hashes = list(pool.map(_hash_job, jobs, chunksize=chunksize))
+    else:
+        hashes = []
+    hash_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = [(username, h, role) for (username, _, role), h in zip(pending, hashes)]
+    with transaction(db_path) as conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)", rows
+        )
+        registered = conn.total_changes - before
+    insert_s = time.perf_counter() - start
+
+    if registered:
+        bump_table_version("users")
+    for username, _, _ in rows:
+        invalidate_user_cache(username)
+
+    report = {
+        "registered": registered,
+        "skipped": len(seen) - registered + repeated,
+        "invalid": len(invalid),
+        "hashed": len(hashes),
+        "rounds": rounds,
+        "workers": workers,
+        "executor": executor,
+        "hash_s": hash_s,
+        "insert_s": insert_s,
+        "hashes_per_sec": len(hashes) / hash_s if hash_s > 0 else 0.0,
+    }
+    print(f"✅ Registered {registered} users ({report['skipped']} skipped, {len(invalid)} invalid); "
+          f"{len(hashes)} hashes in {hash_s:.2f}s on {workers} {executor} workers "
+          f"({report['hashes_per_sec']:.1f}/s)")
+    return report
+
 
 def register_user(username, password, role='user'):
     """Register new user with password hashing."""
     # Hash password
-    password_hash = bcrypt.hashpw(
-        password.encode('utf-8'),
-        bcrypt.gensalt()
-    ).decode('utf-8')
+    try:
+        password_hash = _run_hash(hash_password, password)
+    except HashPoolOverloaded:
+        return False, "Server busy, please try again."
+    except FutureTimeout:
+        return False, "Registration timed out, please try again."
 
     # Insert into database
     insert_user(username, password_hash, role)
+    invalidate_user_cache(username)
     return True, f"User '{username}' registered successfully."
 
 
 def login_user(username, password):
     """Authenticate user."""
-    user = get_user_by_username(username)
-    if not user:
-        return False, "User not found."
+    start = time.perf_counter()
+    _count("attempts")
+    try:
+        user = _get_user_cached(username)
+        if not user:
+            _count("failed")
+            return False, "User not found."
+
+        # Verify password
+        stored_hash = user[2]  # password_hash column
+        try:
+            ok = _run_hash(bcrypt.checkpw, password.encode('utf-8'), stored_hash.encode('utf-8'))
+        except HashPoolOverloaded:
+            _count("rejected_overload")
+            return False, "Server busy, please try again."
+        except FutureTimeout:
+            _count("timeouts")
+            return False, "Login timed out, please try again."
+
+        if ok:
+            _count("succeeded")
+            return True, f"Login successful!"
+        _count("failed")
+        return False, "Incorrect password."
+    finally:
+        _login_latency.observe((time.perf_counter() - start) * 1000)
+
+
+def login_metrics():
+    """
+    Return login counters (attempts, outcomes, overload rejections, user
+    cache hits) plus end-to-end login latency percentiles.
+    """
+    with _stats_lock:
+        stats = dict(_login_stats)
+    stats["latency_ms"] = _login_latency.to_dict()
+    stats["hash_workers"] = HASH_WORKERS
+    stats["hash_queue_limit"] = HASH_QUEUE_LIMIT
+    return stats
+
+USER_FILE_FORMATS = ("text", "csv", "jsonl")
+USER_BATCH_SIZE = 5000         # rows per transaction in bulk_migrate_users()
+
+
+def _detect_user_format(filepath):
+    suffix = Path(filepath).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    return "text"
+
+
+def _user_record(username, password_hash, role):
+    """Validate one record into an (username, password_hash, role) row."""
+    username = (username or "").strip()
+    password_hash = (password_hash or "").strip()
+    if not username:
+        raise ValueError("missing username")
+    if not password_hash:
+        raise ValueError("missing password hash")
+    return username, password_hash, (role or "").strip() or "user"
+
+
+def _iter_user_records(filepath, fmt):
+    """
+    Stream (line_number, row or exception) from a user dump:
+      text:  username,password_hash[,role] per line
+      csv:   header with username, password_hash (or hash) and optional role
+      jsonl: one {"username", "password_hash" (or "hash"), "role"} object per line
+    """
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for line_no, rec in enumerate(csv.DictReader(f), start=2):
+                try:
+                    yield line_no, _user_record(
+                        rec.get("username"), rec.get("password_hash") or rec.get("hash"), rec.get("role")
+                    )
+                except ValueError as e:
+                    yield line_no, e
+            return
+
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                if fmt == "jsonl":
+                    rec = json.loads(line)
+                    if not isinstance(rec, dict):
+                        raise ValueError("not a JSON object")
+                    row = _user_record(
+                        rec.get("username"), rec.get("password_hash") or rec.get("hash"), rec.get("role")
+                    )
+                else:
+                    parts = line.split(",")
+                    row = _user_record(parts[0], parts[1] if len(parts) > 1 else None,
+                                       parts[2] if len(parts) > 2 else None)
+                yield line_no, row
+            except ValueError as e:  # json.JSONDecodeError is a ValueError
+                yield line_no, e
+
+
+def bulk_migrate_users(conn, filepath, fmt=None, batch_size=USER_BATCH_SIZE, max_errors=20):
+    """
+    Stream a user dump into the users table in batches.
 
-    # Verify password
-    stored_hash = user[2]  # password_hash column
-    if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
-        return True, f"Login successful!"
-    return False, "Incorrect password."
+    fmt is one of USER_FILE_FORMATS (guessed from the extension if None).
+    Each batch is one executemany of INSERT OR IGNORE in one transaction;
+    users that already exist are skipped by the UNIQUE username and counted
+    from the change count, so no per-row round trip is needed.
 
-def migrate_users_from_file(conn, filepath=Path("DATA") / "users.txt"):
+    Returns a report dict with migrated/skipped/errored counts, throughput
+    and the first max_errors error messages.
+    """
+    filepath = Path(filepath)
+    fmt = fmt or _detect_user_format(filepath)
+    if fmt not in USER_FILE_FORMATS:
+        raise ValueError(f"Unknown user file format: {fmt!r}")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    migrated = skipped = errored = batches = 0
+    errors = []
+    start = time.perf_counter()
+    records = _iter_user_records(filepath, fmt)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        rows = []
+        for line_no, row in chunk:
+            if isinstance(row, Exception):
+                errored += 1
+                if len(errors) < max_errors:
+                    errors.append(f"line {line_no}: {row}")
+            else:
+                rows.append(row)
+        if not rows:
+            continue
+
+        before = conn.total_changes
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                rows,
+            )
+        inserted = conn.total_changes - before
+        migrated += inserted
+        skipped += len(rows) - inserted
+        batches += 1
+
+        elapsed = time.perf_counter() - start
+        rate = (migrated + skipped) / elapsed if elapsed > 0 else 0.0
+        print(f"   batch {batches}: {migrated} migrated, {skipped} skipped, "
+              f"{errored} errored ({rate:.0f} rows/s)")
+
+    if migrated:
+        bump_table_version("users")
+        invalidate_user_cache()    # cached misses for the new usernames
+    elapsed = time.perf_counter() - start
+    processed = migrated + skipped + errored
+    report = {
+        "format": fmt,
+        "migrated": migrated,
+        "skipped": skipped,
+        "errored": errored,
+        "batches": batches,
+        "elapsed_s": elapsed,
+        "rows_per_sec": processed / elapsed if elapsed > 0 else 0.0,
+        "errors": errors,
+    }
+    print(f"✅ Migrated {migrated} users from {filepath.name} "
+          f"({skipped} already present, {errored} errored, {report['rows_per_sec']:.0f} rows/s)")
+    return report
+
+
+def migrate_users_from_file(conn, filepath=Path("DATA") / "users.txt", batch_size=None, fmt=None):
     """
     Migrate users from users.txt to the database.
     
@@ -40,11 +423,18 @@ def migrate_users_from_file(conn, filepath=Path("DATA") / "users.txt"):
     Args:
         conn: Database connection
         filepath: Path to users.txt file
+        batch_size: if given, use bulk_migrate_users() (batched, streaming,
+            text/CSV/JSONL) and return its report
+        fmt: source format (see USER_FILE_FORMATS); also selects the bulk
+            mode, with USER_BATCH_SIZE rows per batch unless batch_size is given
     """
     if not filepath.exists():
         print(f"⚠️  File not found: {filepath}")
         print("   No users to migrate.")
         return
+
+    if batch_size or fmt:
+        return bulk_migrate_users(conn, filepath, fmt=fmt, batch_size=batch_size or USER_BATCH_SIZE)
     
     cursor = conn.cursor()
     migrated_count = 0
@@ -73,4 +463,6 @@ def migrate_users_from_file(conn, filepath=Path("DATA") / "users.txt"):
                     print(f"Error migrating user {username}: {e}")
     
     conn.commit()
+    bump_table_version("users")
+    invalidate_user_cache()
     print(f"✅ Migrated {migrated_count} users from {filepath.name}")
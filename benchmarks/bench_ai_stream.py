@@ -0,0 +1,82 @@
+"""
+Benchmark: streaming AI assistant client against the local stub server.
+
+Starts app/services/ai_stub_server.py with a simulated model speed and
+compares time to first visible text for a blocking completion and a
+streamed one, then fires concurrent requests to show the shared
+concurrency cap and the busy rejections beyond it.
+
+Run from the repo root (needs the openai package, no API key):
+    python -m benchmarks.bench_ai_stream
+    python -m benchmarks.bench_ai_stream --words 200 --token-delay 0.01 --clients 16
+"""
+
+import argparse
+import threading
+import time
+
+from app.services import ai_service
+from app.services.ai_service import AIServiceBusy, AssistantClient
+from app.services.ai_stub_server import start_stub_server
+
+
+def _prompt(words):
+    return [{"role": "user", "content": " ".join(f"w{i}" for i in range(words))}]
+
+
+def run(words, token_delay, first_token_delay, clients):
+    server = start_stub_server(token_delay=token_delay, first_token_delay=first_token_delay)
+    client = AssistantClient("stub", base_url=f"http://127.0.0.1:{server.server_port}/v1")
+    messages = _prompt(words)
+    client.complete(_prompt(1))  # warm up the loop and the connection
+
+    t0 = time.perf_counter()
+    client.complete(messages)
+    blocking_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    first_s = None
+    for _ in client.stream(messages):
+        if first_s is None:
+            first_s = time.perf_counter() - t0
+    streamed_s = time.perf_counter() - t0
+    print(f"{words} words | blocking: first text after {blocking_s * 1000:7.0f}ms | "
+          f"streaming: first text after {first_s * 1000:5.0f}ms, done after {streamed_s * 1000:7.0f}ms")
+
+    outcomes = []
+
+    def ask():
+        try:
+            client.complete(_prompt(5))
+            outcomes.append("ok")
+        except AIServiceBusy:
+            outcomes.append("busy")
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=ask) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    print(f"{clients} concurrent requests (cap {ai_service.MAX_CONCURRENT_REQUESTS}, "
+          f"queue timeout {ai_service.QUEUE_TIMEOUT}s) | {outcomes.count('ok')} ok, "
+          f"{outcomes.count('busy')} busy | {elapsed:.2f}s")
+    metrics = ai_service.ai_metrics()
+    print(f"first token p50 {metrics['first_token_ms']['p50_ms']:.0f}ms | "
+          f"request p99 {metrics['request_ms']['p99_ms']:.0f}ms | stub served {server.requests} requests")
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=100)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--clients", type=int, default=12)
+    args = parser.parse_args()
+    run(args.words, args.token_delay, args.first_token_delay, args.clients)
+
+
+if __name__ == "__main__":
+    main()
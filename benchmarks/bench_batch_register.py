@@ -0,0 +1,67 @@
+"""
+Benchmark: parallel bcrypt hashing in register_users_batch.
+
+Registers the same cohort of synthetic users into a fresh temporary
+database once per worker count and reports hashing throughput, speedup
+over one worker and parallel efficiency. Hashing is CPU-bound, so the
+speedup should track min(workers, cores).
+
+Run from the repo root:
+    python -m benchmarks.bench_batch_register
+    python -m benchmarks.bench_batch_register --users 512 --rounds 12 --workers 1 2 4 8 --executor thread
+"""
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from app.data.db import connect_database
+from app.data.schema import create_users_table
+from app.services.user_service import register_users_batch
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def run(n_users, rounds, worker_counts, executor):
+    cores = os.cpu_count() or 1
+    print(f"{n_users} users, bcrypt rounds={rounds}, {executor} pool, {cores} cores")
+    users = [(f"user{i}", f"Password{i}!") for i in range(n_users)]
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in worker_counts:
+            db_path = Path(tmp) / f"users_{workers}.db"
+            conn = connect_database(db_path)
+            create_users_table(conn)
+            conn.close()
+
+            report = register_users_batch(users, rounds=rounds, workers=workers,
+                                          executor=executor, db_path=db_path)
+            assert report["registered"] == n_users
+            rate = report["hashes_per_sec"]
+            baseline = baseline or rate
+            speedup = rate / baseline
+            print(f"{workers:>3} workers | hash {report['hash_s']:7.2f}s | {rate:7.1f} hashes/s | "
+                  f"speedup {speedup:5.2f}x | efficiency {speedup / workers:4.0%} | "
+                  f"insert {report['insert_s'] * 1000:6.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers())
+    parser.add_argument("--executor", choices=("process", "thread"), default="process")
+    args = parser.parse_args()
+    run(args.users, args.rounds, args.workers, args.executor)
+
+
+if __name__ == "__main__":
+    main()
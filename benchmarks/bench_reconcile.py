@@ -0,0 +1,104 @@
+"""
+Benchmark: the Combined (DB + CSV) incidents view.
+
+Compares the original concat + drop_duplicates on every rerun with the
+Reconciler in app/data/reconcile.py: first build, an unchanged rerun, and
+a rerun after a handful of DB rows were updated and inserted.
+
+Run from the repo root:
+    python -m benchmarks.bench_reconcile
+    python -m benchmarks.bench_reconcile --sizes 10000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.data.frames import concat_frames, optimize_frame
+from app.data.reconcile import Reconciler
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+CHANGED_ROWS = 10
+
+
+def make_sources(n_rows, seed=0):
+    """DB frame of n_rows incidents and a CSV export overlapping half of it."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24, n_rows), unit="h")
+    db = optimize_frame(pd.DataFrame({
+        "id": np.arange(1, n_rows + 1),
+        "date": dates,
+        "incident_type": rng.choice(["Phishing", "Malware", "DDoS", "Misconfiguration"], n_rows),
+        "severity": rng.choice(["Low", "Medium", "High", "Critical"], n_rows),
+        "status": rng.choice(["Open", "In Progress", "Resolved", "Closed"], n_rows),
+        "description": [f"Incident {i} description" for i in range(n_rows)],
+        "reported_by": "system",
+        "updated_at": pd.Series([None] * n_rows, dtype="string"),
+    }))
+    half = n_rows // 2
+    csv = optimize_frame(pd.DataFrame({
+        "incident_id": np.arange(1000, 1000 + n_rows),
+        "timestamp": (dates[half:].strftime("%Y-%m-%d %H:%M:%S.%f").tolist()
+                      + dates[:half].strftime("%Y-%m-%d %H:%M:%S.%f").tolist()),
+        "severity": db["severity"].astype(str).to_numpy(),
+        "category": db["incident_type"].astype(str).to_numpy(),
+        "status": db["status"].astype(str).to_numpy(),
+        "description": [f"Incident {i} description" for i in range(half, n_rows)]
+                       + [f"CSV-only incident {i}" for i in range(half)],
+    }))
+    return db, csv
+
+
+def legacy_combine(db, csv):
+    """The original Combined branch: concat both frames, dedupe on id."""
+    combined = concat_frames([db, csv], ignore_index=True, sort=False)
+    return combined.drop_duplicates(subset=["id"]).reset_index(drop=True)
+
+
+def touch_rows(db, count):
+    """Update `count` rows (stamping updated_at) and insert `count` new ones."""
+    db = db.assign(updated_at=db["updated_at"].astype("string"))
+    db.loc[db.index[:count], "status"] = "Resolved"
+    db.loc[db.index[:count], "updated_at"] = "2099-01-01 00:00:00.000"
+    new = db.tail(count).assign(id=lambda d: d["id"] + count, updated_at=pd.NA)
+    return concat_frames([db, new], ignore_index=True)
+
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def run(sizes):
+    for n_rows in sizes:
+        db, csv = make_sources(n_rows)
+        legacy, legacy_ms = _timed(legacy_combine, db, csv)
+
+        reconciler = Reconciler("cyber_incidents")
+        first, first_ms = _timed(reconciler.combine, db, csv, csv_signature=1)
+        _, rerun_ms = _timed(reconciler.combine, db, csv, csv_signature=1)
+        changed = touch_rows(db, CHANGED_ROWS)
+        after, changed_ms = _timed(reconciler.combine, changed, csv, csv_signature=1)
+        stats = reconciler.stats()
+
+        expected = n_rows + n_rows // 2
+        ok = len(first) == expected and len(after) == expected + CHANGED_ROWS
+        print(f"{n_rows:>9} rows | legacy {legacy_ms:8.1f}ms ({len(legacy)} rows) | "
+              f"first {first_ms:8.1f}ms | unchanged {rerun_ms:6.2f}ms | "
+              f"{CHANGED_ROWS}+{CHANGED_ROWS} changed {changed_ms:7.1f}ms "
+              f"({stats['rows_hashed'] - n_rows - len(csv)} rows re-hashed) | "
+              f"{len(after)} rows {'✅' if ok else '❌'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    args = parser.parse_args()
+    run(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
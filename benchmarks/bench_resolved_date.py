@@ -0,0 +1,92 @@
+"""
+Benchmark: resolved_date derivation in the IT ticket loader.
+
+Compares the original per-row loop (iterrows + strptime + timedelta) with
+app.data.tickets.compute_resolved_dates on synthetic ticket CSVs and checks
+both produce identical output.
+
+Run from the repo root:
+    python -m benchmarks.bench_resolved_date
+    python -m benchmarks.bench_resolved_date --sizes 10000 100000
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.data.tickets import compute_resolved_dates
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def make_tickets_csv(path, n_rows, seed=42):
+    """Write a synthetic it_tickets.csv with the same columns as DATA/it_tickets.csv."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01T00:00:00")
+    created = start + rng.integers(0, 365 * 24, n_rows).astype("timedelta64[h]")
+    df = pd.DataFrame({
+        "ticket_id": np.arange(2000, 2000 + n_rows),
+        "priority": rng.choice(["Low", "Medium", "High", "Critical"], n_rows),
+        "description": [f"Ticket {i} problem description" for i in range(n_rows)],
+        "status": rng.choice(["Open", "In Progress", "Resolved", "Waiting for User"], n_rows),
+        "assigned_to": rng.choice(["IT_Support_A", "IT_Support_B", "IT_Support_C"], n_rows),
+        "created_at": pd.Series(created).dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "resolution_time_hours": rng.integers(1, 120, n_rows),
+    })
+    df.to_csv(path, index=False)
+
+
+def legacy_resolved_dates(df):
+    """The original row-by-row implementation, kept for comparison."""
+    resolved_dates = []
+    for _, row in df.iterrows():
+        created = row["created_date"]
+        hours = row["resolution_time_hours"]
+        status = row["status"]
+
+        if status != "Resolved":
+            resolved_dates.append(None)
+        else:
+            ts = datetime.strptime(created, "%Y-%m-%d %H:%M:%S")
+            resolved_dates.append(ts + timedelta(hours=int(hours)))
+
+    return [
+        dt.strftime("%Y-%m-%d %H:%M:%S") if dt is not None else None
+        for dt in resolved_dates
+    ]
+
+
+def run(sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            path = Path(tmp) / f"tickets_{n_rows}.csv"
+            make_tickets_csv(path, n_rows)
+            df = pd.read_csv(path).rename(columns={"created_at": "created_date"})
+
+            t0 = time.perf_counter()
+            legacy = legacy_resolved_dates(df)
+            legacy_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            vectorized = compute_resolved_dates(df).tolist()
+            vectorized_s = time.perf_counter() - t0
+
+            assert vectorized == legacy, f"output mismatch at {n_rows} rows"
+            print(f"{n_rows:>9} rows | loop {legacy_s:8.3f}s | vectorized {vectorized_s:7.3f}s "
+                  f"| speedup {legacy_s / vectorized_s:6.1f}x | identical ✅")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    args = parser.parse_args()
+    run(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
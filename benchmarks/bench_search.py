@@ -0,0 +1,106 @@
+"""
+Benchmark: FTS5 incident search against substring matching in pandas.
+
+Fills a temporary database with synthetic incidents (migration 7's
+incidents_fts index and triggers in place), then times search_incidents()
+for a rare term, a common term, a two-word query and a prefix query, and
+compares the rare term with str.contains over the loaded table. Queries
+past RANKED_SEARCH_LIMIT matches are listed newest first, not ranked.
+
+Run from the repo root:
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --sizes 100000 1000000 --repeat 50
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.data.db import connect_database
+from app.data.incidents import count_incident_matches, search_incidents
+from app.data.schema import create_all_tables, create_search_indexes
+
+DEFAULT_SIZES = (100_000, 1_000_000)
+
+WORDS = ("suspicious email detected from external sender credential harvesting link "
+         "malware beacon outbound traffic blocked firewall login failure brute force "
+         "vpn account locked ransomware note found endpoint quarantined data exfiltration").split()
+
+QUERIES = {
+    "rare term": "zeroday",
+    "common term": "email",
+    "two words": "credential harvesting",
+    "prefix": "ransom*",
+}
+
+
+def make_incidents(conn, n_rows, seed=42):
+    """Insert n_rows synthetic incidents; about 1 in 10,000 mentions 'zeroday'."""
+    rng = np.random.default_rng(seed)
+    words = rng.choice(WORDS, size=(n_rows, 8))
+    descriptions = [" ".join(row) for row in words]
+    for i in range(0, n_rows, 10_000):
+        descriptions[i] += " zeroday"
+    rows = zip(
+        np.full(n_rows, "2025-01-01 00:00:00"),
+        rng.choice(["Phishing", "Malware", "DDoS", "Unauthorized Access"], n_rows),
+        rng.choice(["Low", "Medium", "High", "Critical"], n_rows),
+        rng.choice(["Open", "In Progress", "Resolved"], n_rows),
+        descriptions,
+        np.full(n_rows, "bench"),
+    )
+    with conn:
+        conn.executemany(
+            "INSERT INTO cyber_incidents (date, incident_type, severity, status, description, reported_by) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (tuple(map(str, row)) for row in rows),
+        )
+
+
+def _median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def run(sizes, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            conn = connect_database(Path(tmp) / f"search_{n_rows}.db")
+            create_all_tables(conn)
+            create_search_indexes(conn)
+            t0 = time.perf_counter()
+            make_incidents(conn, n_rows)
+            print(f"{n_rows:>9} rows | loaded and indexed in {time.perf_counter() - t0:.1f}s")
+
+            for label, text in QUERIES.items():
+                page_ms = _median_ms(lambda: search_incidents(conn, text, limit=20), repeat)
+                count_ms = _median_ms(lambda: count_incident_matches(conn, text, cap=10_000), repeat)
+                print(f"{'':>9}      | {label:<11} {text!r:<24} {count_incident_matches(conn, text):>9} hits | "
+                      f"top 20 {page_ms:7.2f}ms | count (cap 10k) {count_ms:5.2f}ms")
+
+            df = pd.read_sql_query("SELECT id, description FROM cyber_incidents", conn)
+            pandas_ms = _median_ms(lambda: df[df["description"].str.contains("zeroday", case=False)],
+                                   max(1, repeat // 10))
+            print(f"{'':>9}      | pandas str.contains('zeroday') on the loaded frame {pandas_ms:8.2f}ms")
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: user lookups and appends in my_app/auth.py.
+
+Compares the original full re-parse of users.txt per lookup with the
+indexed store (cold load, warm lookup, incremental refresh after an
+append), then checks that concurrent appends from threads and processes
+never interleave or lose lines.
+
+Run from the repo root:
+    python -m benchmarks.bench_user_store
+    python -m benchmarks.bench_user_store --sizes 1000 100000
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from my_app import auth
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+FAKE_HASH = "$2b$12$" + "x" * 53          # same length as a real bcrypt hash
+WARM_LOOKUPS = 10_000
+
+
+def make_users_file(path, n_users):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"user{i},{FAKE_HASH}\n" for i in range(n_users))
+
+
+def legacy_read_users(path):
+    """The original _read_users(): parse the whole file into a dict."""
+    users = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split(",", 1)
+            if len(parts) == 2:
+                users[parts[0]] = parts[1]
+    return users
+
+
+def _use_file(path):
+    auth.USER_DATA_FILE = str(path)
+
+
+def _append_many(args):
+    path, prefix, count = args
+    _use_file(path)
+    return sum(auth._append_user(f"{prefix}{i}", FAKE_HASH) for i in range(count))
+
+
+def check_concurrent_appends(tmp, threads=8, processes=4, per_writer=250):
+    path = Path(tmp) / "concurrent_users.txt"
+    make_users_file(path, 0)
+    _use_file(path)
+    with ThreadPoolExecutor(threads) as pool:
+        # every thread also tries the same "dup" names; only one may win each
+        jobs = [(path, f"t{t}_", per_writer) for t in range(threads)] + [(path, "dup", 50)] * threads
+        thread_added = sum(pool.map(_append_many, jobs))
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        proc_added = sum(pool.map(_append_many, [(path, f"p{p}_", per_writer) for p in range(processes)]))
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    expected = (threads + processes) * per_writer + 50
+    malformed = [line for line in lines if line.count(",") != 1 or not line.endswith(FAKE_HASH)]
+    names = [line.split(",", 1)[0] for line in lines]
+    ok = len(lines) == expected == thread_added + proc_added and not malformed and len(set(names)) == len(names)
+    print(f"concurrent appends | {threads} threads + {processes} processes | {len(lines)} lines "
+          f"(expected {expected}), {len(malformed)} malformed, "
+          f"{len(names) - len(set(names))} duplicates | {'✅' if ok else '❌'}")
+    return ok
+
+
+def run(sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_users in sizes:
+            path = Path(tmp) / f"users_{n_users}.txt"
+            make_users_file(path, n_users)
+            target = f"user{n_users // 2}"
+
+            t0 = time.perf_counter()
+            legacy = legacy_read_users(path)[target]
+            legacy_s = time.perf_counter() - t0
+
+            _use_file(path)
+            auth._indexes.clear()
+            t0 = time.perf_counter()
+            assert auth.get_user_hash(target) == legacy
+            cold_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for i in range(WARM_LOOKUPS):
+                auth.get_user_hash(f"user{i % n_users}")
+            warm_us = (time.perf_counter() - t0) / WARM_LOOKUPS * 1e6
+
+            t0 = time.perf_counter()
+            auth._append_user("newcomer", FAKE_HASH)
+            assert auth.get_user_hash("newcomer") == FAKE_HASH
+            append_ms = (time.perf_counter() - t0) * 1000
+
+            print(f"{n_users:>9} users | legacy lookup {legacy_s * 1000:9.2f}ms | "
+                  f"cold index {cold_s * 1000:9.2f}ms | warm lookup {warm_us:6.2f}µs | "
+                  f"append+refresh {append_ms:6.2f}ms")
+            os.remove(path)
+
+        check_concurrent_appends(tmp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    args = parser.parse_args()
+    run(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
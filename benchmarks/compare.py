@@ -0,0 +1,98 @@
+"""
+Compare two benchmarks.suite result files and flag regressions.
+
+A case regresses when its median time grows by more than --threshold
+(relative) and by more than --min-delta-ms (absolute, so sub-millisecond
+noise is ignored). Cases that newly fail or disappear are reported too.
+Exits with status 1 if anything regressed, so CI can gate on it.
+
+Run from the repo root:
+    python -m benchmarks.compare results/bench-old.json results/bench-new.json
+    python -m benchmarks.compare old.json new.json --threshold 0.10 --all
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+DEFAULT_THRESHOLD = 0.25      # +25% median time
+DEFAULT_MIN_DELTA_MS = 1.0
+
+
+def load(path):
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare(base, new, threshold=DEFAULT_THRESHOLD, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """
+    Return a list of rows (size, case, base_ms, new_ms, ratio, status) for
+    every case in either file; status is "regressed", "improved", "ok",
+    "failed", "new" or "missing".
+    """
+    rows = []
+    for size in sorted(set(base["sizes"]) | set(new["sizes"]), key=int):
+        base_cases = base["sizes"].get(size, {}).get("cases", {})
+        new_cases = new["sizes"].get(size, {}).get("cases", {})
+        for case in sorted(set(base_cases) | set(new_cases)):
+            old, cur = base_cases.get(case), new_cases.get(case)
+            if cur is None:
+                rows.append((size, case, None, None, None, "missing"))
+                continue
+            if "error" in cur:
+                rows.append((size, case, None, None, None, "failed"))
+                continue
+            new_ms = cur["median_s"] * 1000
+            if old is None or "error" in old:
+                rows.append((size, case, None, new_ms, None, "new"))
+                continue
+            base_ms = old["median_s"] * 1000
+            ratio = new_ms / base_ms if base_ms else float("inf")
+            delta = new_ms - base_ms
+            if ratio > 1 + threshold and delta > min_delta_ms:
+                status = "regressed"
+            elif ratio < 1 / (1 + threshold) and -delta > min_delta_ms:
+                status = "improved"
+            else:
+                status = "ok"
+            rows.append((size, case, base_ms, new_ms, ratio, status))
+    return rows
+
+
+def _ms(value):
+    return f"{value:10.2f}" if value is not None else f"{'-':>10}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("base", help="results of the reference commit")
+    parser.add_argument("new", help="results to check")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression (0.25 = +25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    parser.add_argument("--all", action="store_true", help="list unchanged cases too")
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    print(f"base {base['meta'].get('commit')} ({base['meta'].get('timestamp')}) → "
+          f"new {new['meta'].get('commit')} ({new['meta'].get('timestamp')})")
+    if base["meta"].get("platform") != new["meta"].get("platform"):
+        print("⚠️  Results come from different machines; timings may not be comparable.")
+
+    rows = compare(base, new, args.threshold, args.min_delta_ms)
+    marks = {"regressed": "❌", "failed": "❌", "missing": "⚠️ ", "improved": "✅", "new": "  ", "ok": "  "}
+    print(f"   {'rows':>9}  {'case':<58} {'base ms':>10} {'new ms':>10}  ratio")
+    for size, case, base_ms, new_ms, ratio, status in rows:
+        if status == "ok" and not args.all:
+            continue
+        ratio_text = f"{ratio:5.2f}x" if ratio is not None else status
+        print(f"{marks[status]} {size:>9}  {case:<58} {_ms(base_ms)} {_ms(new_ms)}  {ratio_text}")
+
+    counts = {status: sum(r[5] == status for r in rows) for status in marks}
+    print(f"{counts['regressed']} regressed, {counts['failed']} failed, {counts['missing']} missing, "
+          f"{counts['improved']} improved, {counts['ok']} unchanged, {counts['new']} new "
+          f"(threshold +{args.threshold:.0%}, min {args.min_delta_ms} ms)")
+    return 1 if counts["regressed"] or counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+"""
+Deterministic synthetic data at scale, in the same formats as DATA/.
+
+Writes cyber_incidents.csv, it_tickets.csv, datasets_metadata.csv (same
+columns as the sample CSVs) and users.txt (username,password_hash,role)
+with the requested number of rows each. The same --rows and --seed always
+produce byte-identical files, so results from different commits compare
+like for like. Rows are written in chunks, so 10M rows fit in memory.
+
+Run from the repo root:
+    python -m benchmarks.generate --rows 10000 --out bench_data/DATA
+    python -m benchmarks.generate --rows 1000000 10000000 --out bench_data
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEED = 42
+CHUNK_ROWS = 500_000
+FAKE_HASH = "$2b$12$" + "x" * 53          # same length as a real bcrypt hash
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+INCIDENT_CATEGORIES = ["Phishing", "Malware", "DDoS", "Unauthorized Access", "Misconfiguration"]
+INCIDENT_STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+TICKET_STATUSES = ["Open", "In Progress", "Resolved", "Waiting for User"]
+ASSIGNEES = ["IT_Support_A", "IT_Support_B", "IT_Support_C"]
+UPLOADERS = ["data_scientist", "cyber_admin", "it_admin"]
+ROLES = ["user", "analyst", "admin"]
+
+# Free text for descriptions, so full-text search has realistic term spread.
+WORDS = np.array(
+    ("suspicious email detected from external sender credential harvesting link malware "
+     "beacon outbound traffic blocked firewall login failure brute force vpn account locked "
+     "ransomware note endpoint quarantined data exfiltration printer offline password reset "
+     "laptop slow disk full outlook crash license expired network drive unreachable").split()
+)
+
+START = np.datetime64("2024-01-01T00:00:00")
+
+FILES = {
+    "cyber_incidents": "cyber_incidents.csv",
+    "it_tickets": "it_tickets.csv",
+    "datasets_metadata": "datasets_metadata.csv",
+    "users": "users.txt",
+}
+
+
+def _rng(seed, name, chunk):
+    """Independent random stream per file and chunk."""
+    return np.random.default_rng([seed, sum(map(ord, name)), chunk])
+
+
+def _sentences(rng, n, words=6):
+    picks = WORDS[rng.integers(0, len(WORDS), size=(n, words))]
+    return pd.Series([" ".join(row) for row in picks])
+
+
+def _stamps(rng, n, fmt):
+    offsets = rng.integers(0, 365 * 24 * 3600, n).astype("timedelta64[s]")
+    return pd.Series(START + offsets).dt.strftime(fmt)
+
+
+def incidents_frame(start, n, rng):
+    """Rows start..start+n of cyber_incidents.csv."""
+    return pd.DataFrame({
+        "incident_id": np.arange(1000 + start, 1000 + start + n),
+        "timestamp": _stamps(rng, n, "%Y-%m-%d %H:%M:%S.%f"),
+        "severity": rng.choice(SEVERITIES, n),
+        "category": rng.choice(INCIDENT_CATEGORIES, n),
+        "status": rng.choice(INCIDENT_STATUSES, n),
+        "description": _sentences(rng, n),
+    })
+
+
+def tickets_frame(start, n, rng):
+    """Rows start..start+n of it_tickets.csv."""
+    return pd.DataFrame({
+        "ticket_id": np.arange(2000 + start, 2000 + start + n),
+        "priority": rng.choice(SEVERITIES, n),
+        "description": _sentences(rng, n),
+        "status": rng.choice(TICKET_STATUSES, n),
+        "assigned_to": rng.choice(ASSIGNEES, n),
+        "created_at": _stamps(rng, n, "%Y-%m-%d %H:%M:%S"),
+        "resolution_time_hours": rng.integers(1, 120, n),
+    })
+
+
+def datasets_frame(start, n, rng):
+    """Rows start..start+n of datasets_metadata.csv."""
+    ids = np.arange(start + 1, start + n + 1)
+    return pd.DataFrame({
+        "dataset_id": ids,
+        "name": [f"Dataset_{i}" for i in ids],
+        "rows": rng.integers(100, 2_000_000, n),
+        "columns": rng.integers(3, 60, n),
+        "uploaded_by": rng.choice(UPLOADERS, n),
+        "upload_date": _stamps(rng, n, "%Y-%m-%d"),
+    })
+
+
+def _write_users(path, start, n, rng):
+    roles = rng.choice(ROLES, n)
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(f"user{start + i},{FAKE_HASH},{role}\n" for i, role in enumerate(roles))
+
+
+FRAMES = {
+    "cyber_incidents": incidents_frame,
+    "it_tickets": tickets_frame,
+    "datasets_metadata": datasets_frame,
+}
+
+
+def generate(out_dir, rows, seed=DEFAULT_SEED):
+    """Write every file in FILES with `rows` rows into out_dir; returns {name: path}."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {name: out_dir / filename for name, filename in FILES.items()}
+    for path in paths.values():
+        path.unlink(missing_ok=True)
+
+    for chunk, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        n = min(CHUNK_ROWS, rows - start)
+        for name, make_frame in FRAMES.items():
+            df = make_frame(start, n, _rng(seed, name, chunk))
+            df.to_csv(paths[name], mode="a", header=start == 0, index=False)
+        _write_users(paths["users"], start, n, _rng(seed, "users", chunk))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--out", default="bench_data",
+                        help="output directory (one <rows>/ subfolder per size if several)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+    for rows in args.rows:
+        out = Path(args.out) / str(rows) if len(args.rows) > 1 else Path(args.out)
+        paths = generate(out, rows, args.seed)
+        size_mb = sum(p.stat().st_size for p in paths.values()) / 1e6
+        print(f"✅ {rows} rows per file → {out} ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+"""
+Benchmark suite: every public data-layer and user-service helper at scale.
+
+For each size, benchmarks.generate writes the CSVs and users.txt into a
+temporary working directory's DATA/ folder, and the suite runs from there.
+DB_PATH and the CSV paths are relative, so every helper (including the
+ones that open their own pooled connection) uses the synthetic database,
+never the real one. The phases run in order:
+- setup: loaders, migrations, CSV sync and ingest, each timed once
+- reads: aggregates, filters, search, frames, caches and snapshots, timed
+  --repeat times
+- writes: inserts, updates and deletes, timed --repeat times
+
+Results (median and min seconds per case, plus commit and environment)
+go to a JSON file that benchmarks.compare diffs between commits. Public
+functions no case covers are listed, so new helpers do not go unmeasured.
+
+Run from the repo root:
+    python -m benchmarks.suite                                  # 10k rows
+    python -m benchmarks.suite --sizes 10000 1000000 --output results/bench-new.json
+    python -m benchmarks.suite --sizes 10000000 --repeat 3 --only incidents filters
+    python -m benchmarks.compare results/bench-old.json results/bench-new.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.generate import DEFAULT_SEED, generate
+
+DEFAULT_SIZES = (10_000,)
+DEFAULT_REPEAT = 5
+
+# Modules whose public functions the suite is expected to cover.
+COVERED_MODULES = [
+    "app.data.analytics", "app.data.cache", "app.data.csv_loader", "app.data.csv_sync", "app.data.datasets",
+    "app.data.db", "app.data.filters", "app.data.frames", "app.data.incidents",
+    "app.data.incremental", "app.data.ingest", "app.data.metrics", "app.data.migrations",
+    "app.data.reconcile", "app.data.rollups", "app.data.schema", "app.data.snapshots",
+    "app.data.tickets", "app.data.users", "app.services.user_service",
+]
+# Command-line wrappers around helpers that are timed directly.
+CLI_ENTRY_POINTS = {"main", "run", "add_arguments"}
+
+RESOLUTION_HOURS_SQL = "(JULIANDAY(resolved_date) - JULIANDAY(created_date)) * 24"
+
+
+class Suite:
+    """Times cases, records results and tracks which functions were exercised."""
+
+    def __init__(self, repeat, only=None):
+        self.repeat = repeat
+        self.only = only
+        self.results = {}
+        self.covered = set()
+
+    def time(self, name, fn, *args, repeat=None, setup=None, covers=(), **kwargs):
+        """
+        Time fn(*args, **kwargs) (or fn(*setup(i)) when setup is given, with
+        setup itself untimed). name is "module.function[variant]"; covers
+        names further functions the case exercises.
+        """
+        if self.only and not any(name.startswith(prefix) for prefix in self.only):
+            return None
+        runs, result = [], None
+        try:
+            for i in range(repeat or self.repeat):
+                call_args = setup(i) if setup else args
+                with contextlib.redirect_stdout(io.StringIO()):  # loaders report progress
+                    start = time.perf_counter()
+                    result = fn(*call_args, **kwargs)
+                    runs.append(time.perf_counter() - start)
+        except Exception as e:
+            self.results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"  ❌ {name:<55} {type(e).__name__}: {e}")
+            return None
+        self.results[name] = {
+            "median_s": statistics.median(runs),
+            "min_s": min(runs),
+            "runs": len(runs),
+        }
+        self.covered.add(name.split("[")[0])
+        self.covered.update(covers)
+        print(f"  {name:<57} {statistics.median(runs) * 1000:10.2f} ms  (min {min(runs) * 1000:.2f}, n={len(runs)})")
+        return result
+
+
+def public_functions():
+    """["module.function"] for every public function defined in COVERED_MODULES."""
+    names = []
+    for module_name in COVERED_MODULES:
+        module = importlib.import_module(module_name)
+        short = module_name.rsplit(".", 1)[1]
+        for name, obj in inspect.getmembers(module, inspect.isfunction):
+            if not name.startswith("_") and obj.__module__ == module_name and name not in CLI_ENTRY_POINTS:
+                names.append(f"{short}.{name}")
+    return sorted(names)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(repeat, seed):
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "seed": seed,
+    }
+
+
+def run_setup(s, conn, paths):
+    from app.data.csv_sync import sync_all
+    from app.data.datasets import load_csv_to_table_datasets_metadata
+    from app.data.incidents import load_csv_to_table_incidents
+    from app.data.ingest import ingest
+    from app.data.migrations import run_migrations
+    from app.data.schema import create_all_tables
+    from app.data.tickets import load_csv_to_table_it_tickets
+    from app.services.user_service import bulk_migrate_users
+
+    s.time("schema.create_all_tables", create_all_tables, conn, repeat=1,
+           covers=("schema.create_users_table", "schema.create_cyber_incidents_table",
+                   "schema.create_datasets_metadata_table", "schema.create_it_tickets_table"))
+    s.time("incidents.load_csv_to_table_incidents", load_csv_to_table_incidents,
+           conn, paths["cyber_incidents"], "cyber_incidents", repeat=1, covers=("csv_loader.stream_csv_to_table",))
+    s.time("tickets.load_csv_to_table_it_tickets", load_csv_to_table_it_tickets,
+           conn, paths["it_tickets"], "it_tickets", repeat=1)
+    s.time("datasets.load_csv_to_table_datasets_metadata", load_csv_to_table_datasets_metadata,
+           conn, paths["datasets_metadata"], "datasets_metadata", repeat=1)
+    s.time("user_service.bulk_migrate_users", bulk_migrate_users, conn, paths["users"], repeat=1)
+    s.time("migrations.run_migrations", run_migrations, conn, repeat=1,
+           covers=("rollups.create_rollups", "rollups.rebuild_rollups", "schema.define_search_indexes",
+                   "schema.reindex_search_indexes", "schema.create_ai_cache_table",
+                   "csv_sync.create_sync_tables"))
+    s.time("csv_sync.sync_all[first run]", sync_all, conn, repeat=1,
+           covers=("csv_sync.sync_csv", "csv_sync.plan_file", "csv_sync.read_chunks", "csv_sync.prepare_batch",
+                   "csv_sync.write_batch", "csv_sync.record_progress", "csv_sync.new_report",
+                   "csv_sync.row_hashes", "csv_sync.file_sha256"))
+    s.time("csv_sync.sync_all[unchanged]", sync_all, conn, repeat=1)
+    s.time("ingest.ingest[forced, tickets]", ingest, [f"it_tickets={paths['it_tickets']}"],
+           workers=1, force=True, repeat=1, covers=("ingest.resolve_sources",))
+
+
+def mixed_assignee_db(i):
+    """In-memory tickets whose assignees (NULL and '') share one ticket_rollup key."""
+    from app.data.rollups import create_rollups
+    from app.data.schema import create_all_tables
+
+    mem = sqlite3.connect(":memory:")
+    create_all_tables(mem)
+    create_rollups(mem)
+    mem.executemany(
+        "INSERT INTO it_tickets (ticket_id, priority, status, category, subject, created_date, assigned_to) "
+        "VALUES (?, 'High', 'Open', 'General', 'bench', '2024-01-01 09:00:00', ?)",
+        [("a", None), ("b", "")],
+    )
+    return (mem,)
+
+
+def run_reads(s, conn, paths, rows):
+    from app.data import analytics, cache, db, filters, frames, migrations, reconcile, rollups, schema
+    from app.data.datasets import (
+        count_datasets_by_category, count_large_datasets, datasets_recently_updated, get_all_datasets_metadata,
+    )
+    from app.data.incidents import (
+        count_incident_matches, get_all_incidents, get_high_severity_by_status,
+        get_incident_types_with_many_cases, get_incidents_by_type_count, search_incidents,
+    )
+    from app.data.tickets import (
+        average_resolution_time, compute_resolved_dates, count_ticket_matches, count_tickets_by_priority,
+        count_tickets_by_status, get_all_it_tickets, search_tickets, unresolved_tickets,
+    )
+    from app.data.users import get_user_by_username
+
+    full = max(1, min(s.repeat, 3))   # whole-table loads are slow at 10M rows
+
+    # Whole-table loads and the dashboard aggregates
+    incidents = s.time("incidents.get_all_incidents", get_all_incidents, repeat=full)
+    s.time("incidents.get_incidents_by_type_count", get_incidents_by_type_count, conn)
+    s.time("incidents.get_high_severity_by_status", get_high_severity_by_status, conn)
+    s.time("incidents.get_incident_types_with_many_cases", get_incident_types_with_many_cases, conn)
+    tickets = s.time("tickets.get_all_it_tickets", get_all_it_tickets, repeat=full)
+    s.time("tickets.count_tickets_by_priority", count_tickets_by_priority, conn)
+    s.time("tickets.count_tickets_by_status", count_tickets_by_status, conn)
+    s.time("tickets.unresolved_tickets", unresolved_tickets, conn, repeat=full)
+    s.time("tickets.average_resolution_time", average_resolution_time, conn)
+    s.time("datasets.get_all_datasets_metadata", get_all_datasets_metadata, repeat=full)
+    s.time("datasets.count_datasets_by_category", count_datasets_by_category, conn)
+    s.time("datasets.count_large_datasets", count_large_datasets, conn)
+    s.time("datasets.datasets_recently_updated", datasets_recently_updated, conn, days=3650)
+    s.time("users.get_user_by_username", get_user_by_username, f"user{rows // 2}")
+
+    # Full-text search
+    s.time("incidents.search_incidents[common term]", search_incidents, conn, "email")
+    s.time("incidents.search_incidents[two words]", search_incidents, conn, "credential harvesting")
+    s.time("incidents.count_incident_matches[cap 10k]", count_incident_matches, conn, "email", cap=10_000)
+    s.time("tickets.search_tickets[prefix]", search_tickets, conn, "pass*")
+    s.time("tickets.count_ticket_matches[cap 10k]", count_ticket_matches, conn, "password", cap=10_000)
+    s.time("schema.fts_query", schema.fts_query, "phish* credential-harvesting")
+    s.time("schema.count_fts_matches", schema.count_fts_matches, conn, "tickets_fts", '"vpn"')
+
+    # Server-side filters (the DB view of the dashboards)
+    date_range = (date(2024, 3, 1), date(2024, 9, 30))
+    where, params = filters.build_where(date_col="date", date_range=date_range,
+                                        isin={"severity": ["High", "Critical"]})
+    s.time("filters.build_where", filters.build_where, date_col="date",
+           date_range=date_range, isin={"severity": ["High", "Critical"]})
+    s.time("filters.fetch_page[first page]", filters.fetch_page, conn, "cyber_incidents", where, params)
+    s.time("filters.fetch_page[middle page]", filters.fetch_page, conn, "cyber_incidents", offset=rows // 2)
+    s.time("filters.count_by", filters.count_by, conn, "cyber_incidents", "severity", where, params)
+    s.time("filters.count_by_day", filters.count_by_day, conn, "cyber_incidents", "date", where, params)
+    s.time("filters.count_by_pair", filters.count_by_pair, conn, "it_tickets", "priority", "status")
+    s.time("filters.aggregate", filters.aggregate, conn, "it_tickets",
+           {"n": "COUNT(*)", "avg_hours": f"AVG({RESOLUTION_HOURS_SQL})"})
+    s.time("filters.histogram", filters.histogram, conn, "it_tickets", RESOLUTION_HOURS_SQL)
+    s.time("filters.distinct_values", filters.distinct_values, conn, "cyber_incidents", "incident_type")
+    s.time("filters.value_bounds", filters.value_bounds, conn, "it_tickets", "created_date")
+    s.time("rollups.rollup_exists", rollups.rollup_exists, conn, "incident_rollup")
+    s.time("schema.table_exists", schema.table_exists, conn, "incidents_fts")
+    s.time("schema.table_fingerprint", schema.table_fingerprint, conn, "cyber_incidents")
+
+    # Resolution SLA percentiles (the IT tickets dashboard's SLA section)
+    def cold_sla_report(i):
+        cache.clear_query_cache()
+        return ()
+
+    resolved = s.time("analytics.resolved_tickets", analytics.resolved_tickets, conn, repeat=full)
+    if resolved is not None:
+        for by in analytics.GROUPINGS:
+            s.time(f"analytics.percentiles_by[{by}]", analytics.percentiles_by, resolved, by, repeat=full)
+    s.time("analytics.resolution_percentiles[priority]", analytics.resolution_percentiles,
+           conn, "priority", repeat=full)
+    s.time("analytics.sla_report[miss]", analytics.sla_report, setup=cold_sla_report, repeat=full)
+    s.time("analytics.sla_report[hit]", analytics.sla_report)
+    s.time("analytics.resolution_histogram", analytics.resolution_histogram, conn)
+    if tickets is not None:
+        s.time("analytics.sla_report_frame", analytics.sla_report_frame, tickets,
+               repeat=full, covers=("analytics.resolved_frame",))
+        hours = s.time("analytics.resolution_hours", analytics.resolution_hours, tickets, repeat=full)
+        if hours is not None:
+            s.time("analytics.bin_hours", analytics.bin_hours, hours)
+
+    # DataFrame helpers
+    csv_incidents = pd.read_csv(paths["cyber_incidents"])
+    csv_tickets = pd.read_csv(paths["it_tickets"]).rename(columns={"created_at": "created_date"})
+    s.time("tickets.compute_resolved_dates", compute_resolved_dates, csv_tickets)
+    s.time("frames.parse_dates", frames.parse_dates, csv_incidents["timestamp"])
+    optimized = s.time("frames.optimize_frame", frames.optimize_frame, csv_incidents, dates=("timestamp",))
+    if optimized is not None:
+        s.time("frames.memory_report", frames.memory_report, optimized)
+        s.time("frames.concat_frames", frames.concat_frames, [optimized, optimized])
+    if incidents is not None:
+        s.time("frames.optimize_table", frames.optimize_table, incidents, "cyber_incidents")
+    if incidents is not None:
+        s.time("reconcile.canonical_keys", reconcile.canonical_keys, incidents, "cyber_incidents", repeat=full)
+        def cold_reconciler(i):
+            reconcile.get_reconciler("cyber_incidents").reset()
+            return "cyber_incidents", incidents, csv_incidents
+
+        s.time("reconcile.reconcile[rebuild]", reconcile.reconcile, setup=cold_reconciler,
+               repeat=full, covers=("reconcile.get_reconciler",))
+        s.time("reconcile.reconcile[unchanged]", reconcile.reconcile, "cyber_incidents", incidents, csv_incidents,
+               db_signature="bench", csv_signature="bench")
+    s.time("reconcile.file_signature", reconcile.file_signature, paths["cyber_incidents"])
+
+    # Shared query cache
+    cache.clear_query_cache()
+    query = "SELECT severity, COUNT(*) FROM cyber_incidents GROUP BY severity"
+    cache.cached_call(("cyber_incidents",), get_incidents_by_type_count, conn)
+    s.time("cache.cached_call[hit]", cache.cached_call, ("cyber_incidents",), get_incidents_by_type_count, conn)
+    cache.cached_query(conn, query, tables=("cyber_incidents",))
+    s.time("cache.cached_query[hit]", cache.cached_query, conn, query, tables=("cyber_incidents",))
+    s.time("cache.cached_read_csv[miss]", cache.cached_read_csv, paths["it_tickets"], repeat=1)
+    s.time("cache.cached_read_csv[hit]", cache.cached_read_csv, paths["it_tickets"])
+    s.time("cache.table_version", cache.table_version, "cyber_incidents")
+    s.time("cache.query_cache_stats", cache.query_cache_stats)
+    s.time("cache.get_query_cache", cache.get_query_cache)
+    s.time("cache.bump_table_version", cache.bump_table_version, "bench_only")
+    s.time("cache.clear_query_cache", cache.clear_query_cache)
+
+    # Connections
+    def open_close():
+        db.connect_database().close()
+
+    def borrow():
+        with db.pooled_connection():
+            pass
+
+    def empty_transaction():
+        with db.transaction():
+            pass
+
+    s.time("db.connect_database", open_close)
+    s.time("db.pooled_connection", borrow)
+    s.time("db.transaction", empty_transaction)
+    s.time("db.get_pool", db.get_pool)
+    s.time("db.pool_stats", db.pool_stats)
+
+    # Query instrumentation: the same whole-table load with every statement timed
+    db.enable_query_stats(log_path=Path("DATA") / "slow_queries.log")
+    try:
+        s.time("db.enable_query_stats (get_all_incidents instrumented)", get_all_incidents,
+               repeat=full, covers=("db.enable_query_stats", "db.disable_query_stats"))
+        s.time("db.query_stats", db.query_stats)
+        s.time("db.dump_query_stats", db.dump_query_stats)
+        s.time("db.reset_query_stats", db.reset_query_stats)
+    finally:
+        db.disable_query_stats()
+
+    # Query plans and schema version
+    s.time("migrations.get_schema_version", migrations.get_schema_version, conn)
+    s.time("migrations.explain_query_plan", migrations.explain_query_plan, conn, query)
+    s.time("migrations.find_full_scans", migrations.find_full_scans, conn)
+    s.time("migrations.assert_query_plans", migrations.assert_query_plans, conn)
+
+    # Arrow snapshots (optional pyarrow)
+    from app.data import snapshots
+    s.time("snapshots.snapshot_path", snapshots.snapshot_path, "cyber_incidents")
+    if snapshots.HAS_PYARROW:
+        from app.data.incremental import IncrementalTableLoader
+
+        s.time("snapshots.export_snapshot", snapshots.export_snapshot, conn, "cyber_incidents", repeat=full,
+               covers=("snapshots.write_snapshot",))
+        s.time("snapshots.read_snapshot", snapshots.read_snapshot, snapshots.snapshot_path("cyber_incidents"))
+
+        def cold_loader(i):
+            return (IncrementalTableLoader("cyber_incidents", optimize=True),)
+
+        def cold_loader_without_snapshot(i):
+            snapshots.snapshot_path("cyber_incidents").unlink(missing_ok=True)
+            return cold_loader(i)
+
+        s.time("snapshots.load_table[cold, no snapshot]", snapshots.load_table,
+               setup=cold_loader_without_snapshot, repeat=full)
+        s.time("snapshots.load_table[cold, from snapshot]", snapshots.load_table, setup=cold_loader, repeat=full)
+        warm = IncrementalTableLoader("cyber_incidents", optimize=True)
+        snapshots.load_table(warm)
+        s.time("snapshots.load_table[warm]", snapshots.load_table, warm)
+
+    # Rebuilds that migrations ran once, at this scale
+    s.time("rollups.rebuild_rollups", rollups.rebuild_rollups, conn, repeat=1)
+    s.time("rollups.rebuild_rollups[NULL and '' assignee]", rollups.rebuild_rollups,
+           setup=mixed_assignee_db, repeat=1)
+    s.time("schema.rebuild_search_indexes", schema.rebuild_search_indexes, conn, repeat=1)
+    s.time("schema.create_search_indexes[existing]", schema.create_search_indexes, conn, repeat=1)
+
+
+def run_writes(s, conn, paths, rows):
+    from app.data.datasets import delete_dataset_metadata, insert_dataset_metadata, update_dataset_metadata
+    from app.data.incidents import bulk_insert_incidents, delete_incident, insert_incident, update_incident_status
+    from app.data.tickets import delete_it_ticket, insert_it_ticket, update_it_ticket
+    from app.data.users import insert_user
+    from app.services import user_service
+
+    # Each insert case records its new row ids; the delete cases remove them.
+    new_incidents, new_tickets, new_datasets = [], [], []
+
+    def keep(ids, fn):
+        return lambda *args: ids.append(fn(*args))
+
+    s.time("incidents.insert_incident", keep(new_incidents, insert_incident),
+           setup=lambda i: ("2025-01-01 00:00:00", "Phishing", "High", "Open", f"bench incident {i}", "bench"))
+    s.time("incidents.update_incident_status", update_incident_status,
+           setup=lambda i: (conn, 1 + (i * 7919) % rows, "Resolved"))
+    records = [("2025-01-02 00:00:00", "Malware", "Low", "Open", f"bulk incident {i}", "bench") for i in range(1000)]
+    s.time("incidents.bulk_insert_incidents[1000 rows]", bulk_insert_incidents, records)
+    s.time("tickets.insert_it_ticket", keep(new_tickets, insert_it_ticket),
+           setup=lambda i: (f"BENCH-{i}", "High", "Open", "General", "bench ticket", "bench ticket body"))
+    s.time("tickets.update_it_ticket", update_it_ticket,
+           setup=lambda i: (conn, 1 + (i * 7919) % rows, "status", "Resolved"))
+    s.time("datasets.insert_dataset_metadata", keep(new_datasets, insert_dataset_metadata),
+           setup=lambda i: (f"bench_dataset_{i}", "Bench", "bench", "2025-01-01", 1000, 1.0))
+    s.time("datasets.update_dataset_metadata", update_dataset_metadata,
+           setup=lambda i: (conn, 1 + (i * 7919) % rows, "record_count", 1234))
+    s.time("incidents.delete_incident", delete_incident, setup=lambda i: (conn, new_incidents[i]),
+           repeat=len(new_incidents) or 1)
+    s.time("tickets.delete_it_ticket", delete_it_ticket, setup=lambda i: (conn, new_tickets[i]),
+           repeat=len(new_tickets) or 1)
+    s.time("datasets.delete_dataset_metadata", delete_dataset_metadata, setup=lambda i: (conn, new_datasets[i]),
+           repeat=len(new_datasets) or 1)
+
+    # Users: bcrypt at the production work factor dominates these
+    hash_repeat = max(1, min(s.repeat, 3))
+    s.time("users.insert_user", insert_user, setup=lambda i: (f"bench_user_{i}", "$2b$12$" + "x" * 53))
+    s.time("user_service.hash_password", user_service.hash_password, "Benchmark123!", repeat=hash_repeat)
+    s.time("user_service.register_user", user_service.register_user,
+           setup=lambda i: (f"bench_register_{i}", "Benchmark123!"), repeat=hash_repeat)
+    s.time("user_service.login_user", user_service.login_user, "bench_register_0", "Benchmark123!",
+           repeat=hash_repeat, covers=("user_service.invalidate_user_cache",))
+    s.time("user_service.login_metrics", user_service.login_metrics)
+    s.time("user_service.register_users_batch[8 users]", user_service.register_users_batch,
+           setup=lambda i: ([(f"bench_batch_{i}_{j}", "Benchmark123!") for j in range(8)],),
+           executor="thread", repeat=1)
+    s.time("user_service.migrate_users_from_file[batched, all present]", user_service.migrate_users_from_file,
+           conn, paths["users"], batch_size=5000, repeat=1)
+
+
+def run_size(rows, repeat, seed, only=None):
+    """Generate data for `rows`, run every phase in a scratch directory and return its results."""
+    from app.data import cache
+    from app.data.db import DB_PATH, connect_database
+
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"bench_{rows}_") as tmp:
+        start = time.perf_counter()
+        paths = generate(Path(tmp) / "DATA", rows, seed)
+        paths = {name: Path("DATA") / path.name for name, path in paths.items()}
+        generate_s = time.perf_counter() - start
+        print(f"── {rows} rows (generated in {generate_s:.1f}s) ──")
+
+        os.chdir(tmp)
+        cache.clear_query_cache()
+        s = Suite(repeat, only)
+        conn = connect_database(DB_PATH)
+        try:
+            s.only = None                   # reads and writes need the loaded, migrated database
+            run_setup(s, conn, paths)
+            s.only = only
+            run_reads(s, conn, paths, rows)
+            run_writes(s, conn, paths, rows)
+        finally:
+            conn.close()
+            os.chdir(original_cwd)
+    return {"generate_s": generate_s, "cases": s.results}, s.covered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="rows per table, e.g. 10000 1000000 10000000")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--only", nargs="+", help="case name prefixes to run, e.g. incidents filters.count_by")
+    parser.add_argument("--output", default="bench-results.json")
+    args = parser.parse_args()
+
+    report = {"meta": environment(args.repeat, args.seed), "sizes": {}}
+    covered = set()
+    for rows in args.sizes:
+        report["sizes"][str(rows)], size_covered = run_size(rows, args.repeat, args.seed, args.only)
+        covered |= size_covered
+
+    report["uncovered"] = [name for name in public_functions() if name not in covered]
+    if report["uncovered"] and not args.only:
+        print(f"⚠️  Not benchmarked: {', '.join(report['uncovered'])}")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    errors = sum("error" in case for size in report["sizes"].values() for case in size["cases"].values())
+    print(f"{'❌' if errors else '✅'} {output} ({errors} failed cases)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
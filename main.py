@@ -1,12 +1,14 @@
 from app.data.db import connect_database
 from app.data.schema import create_all_tables
-from app.services.user_service import register_user, login_user, migrate_users_from_file
-from app.data.incidents import insert_incident, get_all_incidents, load_csv_to_table_incidents, get_incidents_by_type_count, get_high_severity_by_status, get_incident_types_with_many_cases, update_incident_status, delete_incident
-from app.data.datasets import load_csv_to_table_datasets_metadata
-from app.data.tickets import load_csv_to_table_it_tickets
-from pathlib import Path
+from app.data.migrations import run_migrations
+from app.services.user_service import register_user, login_user, login_metrics, migrate_users_from_file
+from app.data.incidents import insert_incident, get_all_incidents, get_incidents_by_type_count, get_high_severity_by_status, get_incident_types_with_many_cases, update_incident_status, delete_incident
+from app.data.csv_sync import sync_all
+from app.data import ingest
+import argparse
+import sys
 
-def main():
+def demo():
     print("=" * 60)
     print("Week 8: Database Demo")
     print("=" * 60)
@@ -14,6 +16,7 @@ def main():
     # 1. Setup database
     conn = connect_database()
     create_all_tables(conn)
+    run_migrations(conn)
     # conn.close()
     
     # 2. Migrate users
@@ -25,6 +28,8 @@ def main():
     
     success, msg = login_user("kareena", "SecurePass123!")
     print(msg)
+    latency = login_metrics()["latency_ms"]
+    print(f"Login latency p50={latency['p50_ms']}ms p99={latency['p99_ms']}ms")
     
     # 4. Test CRUD
     incident_id = insert_incident(
@@ -41,9 +46,8 @@ def main():
     df = get_all_incidents()
     print(f"Total incidents: {len(df)}")
 
-    load_csv_to_table_incidents(conn, Path("DATA") / "cyber_incidents.csv", "cyber_incidents")
-    load_csv_to_table_datasets_metadata(conn, Path("DATA") / "datasets_metadata.csv", "datasets_metadata")
-    load_csv_to_table_it_tickets(conn, Path("DATA") / "it_tickets.csv", "it_tickets")
+    # only new or changed CSV rows are written; unchanged files are skipped
+    sync_all(conn)
     
     # 5. Query data again
     df = get_all_incidents()
@@ -85,5 +89,27 @@ def main():
 
     conn.close()
 
+
+def run_ingest(args):
+    """Nightly backfill: parallel CSV transforms, one writer (app.data.ingest)."""
+    conn = connect_database(args.db)
+    create_all_tables(conn)
+    run_migrations(conn)
+    conn.close()
+    return ingest.run(args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Week 8 database demo and CSV ingestion.")
+    commands = parser.add_subparsers(dest="command")
+    ingest.add_arguments(commands.add_parser("ingest", help="load CSV sources in parallel"))
+    commands.add_parser("demo", help="run the database demo (default)")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        return run_ingest(args)
+    demo()
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import streamlit as st
-from auth import _read_users, hash_password, verify_password, validate_username, validate_password, _append_user
+from auth import get_user_hash, user_exists, hash_password, verify_password, validate_username, validate_password, _append_user
 
 st.set_page_config(page_title="Multi-Domain Intelligence Dashboard - Login", page_icon="🔐", layout="centered")
 
@@ -13,11 +13,11 @@ if "username" not in st.session_state:
 
 
 def login_user(username, password):
-    users = _read_users()
-    if username not in users:
+    stored_hash = get_user_hash(username)
+    if stored_hash is None:
         return False, "Username not found."
 
-    if verify_password(password, users[username]):
+    if verify_password(password, stored_hash):
         st.session_state.logged_in = True
         st.session_state.username = username
         return True, "Login successful!"
@@ -34,12 +34,12 @@ def register_user(username, password):
     if not ok:
         return False, msg
 
-    users = _read_users()
-    if username in users:
+    if user_exists(username):
         return False, "Username already exists."
 
     hashed = hash_password(password)
-    _append_user(username, hashed)
+    if not _append_user(username, hashed):
+        return False, "Username already exists."
 
     return True, "Registration successful! You may now login."
 
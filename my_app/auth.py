@@ -7,14 +7,25 @@ Features:
  - Username/password validation
  - Auto-create users.txt
  - Falls back from getpass() when running in non-TTY environments (e.g. PyCharm Run)
+ - Indexed user lookups and atomic appends to users.txt
 """
 
+import mmap
 import os
 import re
 import sys
+import threading
+import zlib
 from getpass import getpass, GetPassWarning
 import bcrypt
 
+# fcntl (POSIX only) adds a cross-process lock around appends
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
 USER_DATA_FILE = "users.txt"
 
 def _ensure_user_file():
@@ -22,27 +33,137 @@ def _ensure_user_file():
         open(USER_DATA_FILE, "w", encoding="utf-8").close()
 
 
+def _parse_users(data, users):
+    """Add the username,hashed lines in data (bytes) to users."""
+    for line in data.decode("utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        # stored as username,hashed
+        parts = line.split(",", 1)
+        if len(parts) == 2:
+            users[parts[0]] = parts[1]
+
+
+class _UserIndex:
+    """
+    In-memory username -> hash index over one users file.
+
+    refresh() is a single stat() when the file is unchanged. When it has
+    grown and the bytes already indexed still checksum the same (the append-only
+    case) only the new bytes are parsed; if it was replaced, truncated or
+    rewritten in place the whole file is re-parsed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.users = {}
+        self.ends_with_newline = True
+        self._offset = 0
+        self._stat_key = None
+        self._crc = None   # crc32 of the first _offset bytes
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            with self._lock:
+                self.users, self._offset, self._stat_key = {}, 0, None
+                self._crc = None
+                self.ends_with_newline = True
+            return
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key == self._stat_key:
+                return
+            with open(self.path, "rb") as f:
+                try:
+                    # mapped, so the indexed prefix is checksummed in place
+                    buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:   # empty file
+                    buf = b""
+            try:
+                with memoryview(buf) as view:
+                    appended = (self._stat_key is not None and st.st_ino == self._stat_key[0]
+                                and len(view) >= self._offset
+                                and zlib.crc32(view[:self._offset]) == self._crc)
+                    offset = self._offset if appended else 0
+                    data = bytes(view[offset:])
+            finally:
+                if isinstance(buf, mmap.mmap):
+                    buf.close()
+            users = self.users if appended else {}
+            _parse_users(data, users)
+            self.users = users
+            # Resume after the last complete line, so a line caught mid-write
+            # (or an unterminated last line) is parsed again next time.
+            end = data.rfind(b"\n") + 1
+            self._crc = zlib.crc32(data[:end], self._crc if appended else 0)
+            self._offset = offset + end
+            if data:
+                self.ends_with_newline = data.endswith(b"\n")
+            elif not appended:
+                self.ends_with_newline = True
+            self._stat_key = (st.st_ino, st.st_mtime_ns, self._offset)
+
+    def get(self, username):
+        self.refresh()
+        return self.users.get(username)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_append_lock = threading.Lock()
+
+
+def _get_index():
+    path = os.path.abspath(USER_DATA_FILE)
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = _UserIndex(path)
+        return _indexes[path]
+
+
+def get_user_hash(username):
+    """Return the stored hash for username, or None. O(1) once indexed."""
+    return _get_index().get(username)
+
+
+def user_exists(username):
+    return get_user_hash(username) is not None
+
+
 def _read_users():
-    """Return dict username -> hashed_password"""
-    users = {}
-    if not os.path.exists(USER_DATA_FILE):
-        return users
-    with open(USER_DATA_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            # stored as username,hashed
-            parts = line.split(",", 1)
-            if len(parts) == 2:
-                users[parts[0]] = parts[1]
-    return users
+    """Return dict username -> hashed_password (a copy of the index)."""
+    index = _get_index()
+    index.refresh()
+    return dict(index.users)
 
 
 def _append_user(username, hashed):
+    """
+    Append one user atomically. Writers in this process are serialized by a
+    lock and other processes by flock() where available; the line goes out
+    in a single O_APPEND write. Returns False if the username is taken.
+    """
     _ensure_user_file()
-    with open(USER_DATA_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{username},{hashed}\n")
+    index = _get_index()
+    with _append_lock:
+        fd = os.open(USER_DATA_FILE, os.O_WRONLY | os.O_APPEND)
+        try:
+            if HAS_FCNTL:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            # re-check under the lock so concurrent registrations can't both win
+            index.refresh()
+            if username in index.users:
+                return False
+            prefix = "" if index.ends_with_newline else "\n"
+            os.write(fd, f"{prefix}{username},{hashed}\n".encode("utf-8"))
+        finally:
+            os.close(fd)  # also releases the flock
+    index.refresh()
+    return True
 
 
 
@@ -111,8 +232,7 @@ def register_flow():
         print(f"Error: {msg}")
         return
 
-    users = _read_users()
-    if username in users:
+    if user_exists(username):
         print("Error: Username already exists.")
         return
 
@@ -128,20 +248,22 @@ def register_flow():
         return
 
     hashed = hash_password(password)
-    _append_user(username, hashed)
+    if not _append_user(username, hashed):
+        print("Error: Username already exists.")
+        return
     print(f"Success: User '{username}' registered successfully!")
 
 
 def login_flow():
     print("\n--- USER LOGIN ---")
     username = input("Enter your username: ").strip()
-    users = _read_users()
-    if username not in users:
+    stored_hash = get_user_hash(username)
+    if stored_hash is None:
         print("Error: Username not found.")
         return
 
     password = safe_get_password("Enter your password: ").strip()
-    if verify_password(password, users[username]):
+    if verify_password(password, stored_hash):
         print(f"Success: Welcome, {username}!")
     else:
         print("Error: Invalid password.")
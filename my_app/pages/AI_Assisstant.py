@@ -13,8 +13,31 @@ Features:
 import streamlit as st
 import sqlite3
 import json
+import os
 from openai import OpenAI
 
+# Shared query cache (app.data.cache) — dashboards see AI updates immediately
+try:
+    from app.data.cache import bump_table_version  # type: ignore
+    HAS_QUERY_CACHE = True
+except Exception:
+    HAS_QUERY_CACHE = False
+
+# Streaming async client (app.services.ai_service) — bounded context, timeouts
+try:
+    from app.services.ai_service import (  # type: ignore
+        AIServiceBusy, AssistantClient, CONTEXT_TOKEN_BUDGET, HAS_OPENAI, ai_metrics, build_context,
+    )
+    HAS_AI_SERVICE = HAS_OPENAI
+except Exception:
+    HAS_AI_SERVICE = False
+
+# Response cache + coalescing of identical in-flight requests (app.services.ai_cache)
+try:
+    from app.services.ai_cache import ai_cache_stats, cached_stream  # type: ignore
+    HAS_AI_CACHE = True
+except Exception:
+    HAS_AI_CACHE = False
 
 
 # PAGE CONFIGURATION
@@ -30,11 +53,22 @@ st.caption("Multi-Domain Intelligence Platform")
 
 
 # OPENAI CLIENT (NEW API – CORRECT)
+# OPEN_AI_BASE_URL (secrets or env) points at a compatible server, e.g.
+# the local stub: python -m app.services.ai_stub_server
+BASE_URL = st.secrets.get("OPEN_AI_BASE_URL") or os.environ.get("OPEN_AI_BASE_URL")
+
 client = OpenAI(
-    api_key=st.secrets["OPEN_AI_KEY"]
+    api_key=st.secrets["OPEN_AI_KEY"],
+    base_url=BASE_URL
 )
 
 
+@st.cache_resource
+def get_assistant(api_key: str, base_url):
+    """One streaming client per process; its request slots are shared by all sessions."""
+    return AssistantClient(api_key, base_url=base_url)
+
+
 # DATABASE CONFIG
 DB_PATH = "DATA/intelligence_platform.db"
 
@@ -56,6 +90,8 @@ def update_table(table_name: str, data: dict):
 
     conn.commit()
     conn.close()
+    if HAS_QUERY_CACHE:
+        bump_table_version(table_name)
 
 
 
@@ -80,6 +116,23 @@ if "messages" not in st.session_state:
         }
     ]
 
+# Rolling summary of the turns that no longer fit the context budget
+if "summary" not in st.session_state:
+    st.session_state.summary = ""
+    st.session_state.summarized = 0
+    st.session_state.pending_summary = None   # (future, summarized when started, overflow size)
+
+# A summary runs on the background loop; apply it on the first rerun after it
+# finishes, unless the chat was cleared or summarized again in the meantime.
+pending = st.session_state.get("pending_summary")
+if pending is not None and pending[0].done():
+    st.session_state.pending_summary = None
+    future, started_at, folded = pending
+    if future.exception() is None and st.session_state.summarized == started_at:
+        st.session_state.summary = future.result()
+        st.session_state.summarized += folded
+    # on failure the old summary stays; those turns are folded in next time
+
 
 
 # SIDEBAR CONTROLS
@@ -93,8 +146,31 @@ with st.sidebar:
 
     if st.button("🗑 Clear Chat", use_container_width=True):
         st.session_state.messages = [st.session_state.messages[0]]
+        st.session_state.summary = ""
+        st.session_state.summarized = 0
+        st.session_state.pending_summary = None
         st.rerun()
 
+    stream_replies = HAS_AI_SERVICE and st.toggle("Stream replies", value=True)
+    if HAS_AI_SERVICE:
+        _, _, context_tokens = build_context(
+            st.session_state.messages, st.session_state.summary, st.session_state.summarized
+        )
+        st.caption(f"Context sent: ~{context_tokens} / {CONTEXT_TOKEN_BUDGET} tokens")
+        if st.session_state.summary:
+            with st.expander(f"Summary of {st.session_state.summarized} earlier messages"):
+                st.write(st.session_state.summary)
+        first_token = ai_metrics()["first_token_ms"]["p50_ms"]
+        if first_token is not None:
+            st.caption(f"First token p50: {first_token:.0f} ms")
+        if HAS_AI_CACHE:
+            cache = ai_cache_stats()
+            st.metric("Cache hit ratio", f"{cache['hit_ratio']:.0%}")
+            st.caption(
+                f"{cache['hits']} cached, {cache['coalesced']} shared in flight, "
+                f"{cache['misses']} sent upstream · ~{cache['saved_ms'] / 1000:.1f} s saved"
+            )
+
     st.divider()
     st.header("🧠 AI Table Updates")
 
@@ -129,20 +205,51 @@ if user_input:
 
     
     # OPENAI RESPONSE (NEW RESPONSES API)
+    ai_reply = None
     with st.chat_message("assistant"):
-        with st.spinner("AI is thinking..."):
-            response = client.responses.create(
-                model="gpt-4.1-mini",
-                input=st.session_state.messages
+        if stream_replies:
+            # recent turns within the token budget, older ones as a summary
+            context, overflow, _ = build_context(
+                st.session_state.messages, st.session_state.summary, st.session_state.summarized
             )
+            assistant = get_assistant(st.secrets["OPEN_AI_KEY"], BASE_URL)
+            try:
+                if HAS_AI_CACHE:
+                    ai_reply = st.write_stream(cached_stream(assistant, context, user_input))
+                else:
+                    ai_reply = st.write_stream(assistant.stream(context))
+            except (AIServiceBusy, TimeoutError) as e:
+                st.error(str(e))
+            except Exception as e:
+                st.error(f"AI request failed: {e}")
+        else:
+            with st.spinner("AI is thinking..."):
+                try:
+                    response = client.responses.create(
+                        model="gpt-4.1-mini",
+                        input=st.session_state.messages
+                    )
+                    ai_reply = response.output_text
+                    st.markdown(ai_reply)
+                except Exception as e:
+                    st.error(f"AI request failed: {e}")
 
-            ai_reply = response.output_text
-            st.markdown(ai_reply)
+    if ai_reply is None:
+        # drop the unanswered message so the next turn does not resend it
+        st.session_state.messages.pop()
+        st.stop()
 
     st.session_state.messages.append(
         {"role": "assistant", "content": ai_reply}
     )
 
+    if stream_replies and overflow and st.session_state.get("pending_summary") is None:
+        st.session_state.pending_summary = (
+            assistant.summarize_later(st.session_state.summary, overflow),
+            st.session_state.summarized,
+            len(overflow),
+        )
+
     
     # APPLY AI UPDATE
     if enable_updates and target_table != "None":
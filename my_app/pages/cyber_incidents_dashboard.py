@@ -14,6 +14,67 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+# Incremental DB loading (app.data) — falls back to full reads if unavailable
+try:
+    from app.data.incremental import IncrementalTableLoader  # type: ignore
+    HAS_INCREMENTAL = True
+except Exception:
+    HAS_INCREMENTAL = False
+
+# Arrow snapshots (app.data.snapshots, needs pyarrow) — cold loads start from a memory-mapped copy
+try:
+    from app.data.snapshots import HAS_PYARROW, load_table, snapshot_path  # type: ignore
+    HAS_SNAPSHOTS = HAS_PYARROW
+except Exception:
+    HAS_SNAPSHOTS = False
+
+# Compact dtypes (app.data.frames) — categoricals, downcast ints, dates parsed once
+try:
+    from app.data.frames import optimize_frame, concat_frames, memory_report  # type: ignore
+    HAS_FRAMES = True
+except Exception:
+    HAS_FRAMES = False
+
+# Combined view reconciliation (app.data.reconcile) — canonical keys, incremental row hashes
+try:
+    from app.data.reconcile import file_signature, get_reconciler  # type: ignore
+    HAS_RECONCILE = True
+except Exception:
+    HAS_RECONCILE = False
+
+# Server-side filtering/paging (app.data.filters) — pandas filtering if unavailable
+try:
+    from app.data.db import pooled_connection  # type: ignore
+    from app.data.filters import (  # type: ignore
+        build_where, fetch_page, aggregate, count_by, count_by_day, distinct_values, value_bounds,
+    )
+    from app.data.rollups import rollup_exists  # type: ignore
+    HAS_PUSHDOWN = True
+except Exception:
+    HAS_PUSHDOWN = False
+
+# Full-text search (app.data.incidents, FTS5 index from migration 7)
+try:
+    from app.data.incidents import count_incident_matches, search_incidents  # type: ignore
+    from app.data.schema import RANKED_SEARCH_LIMIT, table_exists  # type: ignore
+    HAS_SEARCH = True
+except Exception:
+    HAS_SEARCH = False
+
+# Shared query cache (app.data.cache) — invalidated by data-layer writes
+try:
+    from app.data.cache import cached_call, cached_read_csv, clear_query_cache  # type: ignore
+    HAS_QUERY_CACHE = True
+except Exception:
+    HAS_QUERY_CACHE = False
+
+# Render profiling (app.services.profiler) — on with ?profile=1 (or =mem) or APP_PROFILE=1
+try:
+    from app.services.profiler import RENDER_TRACE, profile_rows, start_profiler  # type: ignore
+    HAS_PROFILER = True
+except Exception:
+    HAS_PROFILER = False
+
 
 #set_page_config before anything that writes to the page
 st.set_page_config(page_title="Cyber Incidents (DB + CSV)", layout="wide", page_icon="🛡️")
@@ -33,6 +94,11 @@ if not st.session_state.logged_in:
 # Paths
 DB_PATH = Path("DATA") / "intelligence_platform.db"
 CSV_PATH = Path("DATA") / "cyber_incidents.csv"
+TABLE_NAME = "cyber_incidents"
+ROLLUP_NAME = "incident_rollup"
+PAGE_SIZE = 100
+SEARCH_PAGE_SIZE = 10
+SEARCH_MATCH_CAP = 10_000  # counting stops here; nobody pages further
 
 
 def connect_via_helper(db_path: Path):
@@ -72,10 +138,49 @@ def get_connection(db_path: Path = DB_PATH) -> Optional[sqlite3.Connection]:
 
 
 # Load DB table into DataFrame
+@st.cache_resource
+def get_table_loader(table_name: str):
+    """
+    Process-wide incremental loader. It keeps the table's rows between reruns,
+    already typed (dates parsed, low-cardinality columns categorical), and
+    only fetches rows added or changed since the previous load.
+    """
+    return IncrementalTableLoader(table_name, optimize=True)
+
+
+def load_db_table(table_name: str = "cyber_incidents") -> pd.DataFrame:
+    """
+    Load the named table from the DB through the incremental loader (a cold
+    loader starts from the Arrow snapshot when there is one), otherwise a
+    full read cached for 60 s. Returns the normalize_df() frame, which the
+    loader computes once per change of the table.
+    """
+    if not HAS_INCREMENTAL:
+        return normalize_df(load_full_table(table_name))
+    if not DB_PATH.exists():
+        return normalize_df(load_full_table(table_name))  # shows the "DB not found" warning
+    try:
+        if HAS_SNAPSHOTS:
+            return load_table(get_table_loader(table_name), db_path=DB_PATH, prepare=normalize_df)
+        return get_table_loader(table_name).load(db_path=DB_PATH, prepare=normalize_df)
+    except Exception as e:
+        st.error(f"Failed to read table '{table_name}' from DB: {e}")
+        return pd.DataFrame()
+
+
+def reset_db_table(table_name: str = "cyber_incidents") -> None:
+    """Forget cached DB rows so the next load re-reads the whole table."""
+    if HAS_INCREMENTAL:
+        get_table_loader(table_name).reset()
+    if HAS_SNAPSHOTS:
+        snapshot_path(table_name).unlink(missing_ok=True)  # the full re-read writes a new one
+    load_full_table.clear()
+
+
 # NOTE: Do NOT accept a Connection object as an argument to a cached function,
 # because sqlite3.Connection is unhashable. Instead request the connection inside the function.
 @st.cache_data(ttl=60)
-def load_db_table(table_name: str = "cyber_incidents") -> pd.DataFrame:
+def load_full_table(table_name: str = "cyber_incidents") -> pd.DataFrame:
     """
     Load the named table from the DB. The connection is obtained from get_connection()
     inside the function, avoiding unhashable parameters.
@@ -98,14 +203,14 @@ def load_db_table(table_name: str = "cyber_incidents") -> pd.DataFrame:
         return pd.DataFrame()
 
 # Load CSV
-@st.cache_data(ttl=60)
 def load_csv(path: Path) -> pd.DataFrame:
     if not path.exists():
         st.warning(f"CSV not found at {path}.")
         return pd.DataFrame()
     try:
-        df = pd.read_csv(path)
-        return df
+        if HAS_QUERY_CACHE:
+            return cached_read_csv(path, prepare=normalize_df)  # read and normalized once per file change
+        return normalize_df(pd.read_csv(path))
     except Exception as e:
         st.error(f"Failed to read CSV {path}: {e}")
         return pd.DataFrame()
@@ -122,10 +227,26 @@ def try_get_insert_function():
     except Exception:
         return None
 
-# Load data
-# get_connection() is cached_resource; load_db_table() will call it internally
-db_df = load_db_table()  # no conn argument anymore
-csv_df = load_csv(CSV_PATH)
+def query_db(fn, *args, **kwargs):
+    """Run an app.data.filters helper on a pooled connection."""
+    with pooled_connection(DB_PATH) as conn:
+        return fn(conn, *args, **kwargs)
+
+def run_sql(fn, *args, **kwargs):
+    """query_db() through the shared cache; results last until TABLE_NAME is written."""
+    if HAS_QUERY_CACHE:
+        return cached_call((TABLE_NAME,), query_db, fn, *args, **kwargs)
+    return query_db(fn, *args, **kwargs)
+
+# Render profiling: times each section of this rerun when enabled
+profiler = start_profiler("cyber_incidents_dashboard", st.query_params.get("profile")) if HAS_PROFILER else None
+
+
+def profile_step(name, **frames):
+    """End the profiled section `name`, noting the size of any frames it produced."""
+    if profiler is not None:
+        profiler.step(name, **frames)
+
 
 # Merge/choose options
 st.title("🔐 Cyber Incidents")
@@ -137,6 +258,18 @@ source = st.radio(
     index=0,
 )
 
+# DB-only view pushes filters, KPIs, charts and paging down to SQL,
+# so the table is never loaded whole into pandas.
+use_sql = HAS_PUSHDOWN and source == "Database table (DB)" and DB_PATH.exists()
+
+# KPIs, filter options, charts and the row count read the trigger-maintained
+# rollup (one row per day/severity/status/type) once migration 4 has run;
+# only the displayed page of rows comes from the base table.
+if use_sql and run_sql(rollup_exists, ROLLUP_NAME):
+    agg_table, agg_date, weight = ROLLUP_NAME, "day", "n"
+else:
+    agg_table, agg_date, weight = TABLE_NAME, "date", "1"
+
 # Prepare combined dataset
 def normalize_df(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -171,6 +304,8 @@ def normalize_df(df: pd.DataFrame) -> pd.DataFrame:
                 break
     if colmap:
         df = df.rename(columns=colmap)
+    if HAS_FRAMES:
+        return optimize_frame(df, dates=("date",))
     if "date" in df.columns:
         try:
             df["date"] = pd.to_datetime(df["date"], errors="coerce")
@@ -178,16 +313,30 @@ def normalize_df(df: pd.DataFrame) -> pd.DataFrame:
             pass
     return df
 
-db_df_norm = normalize_df(db_df)
-csv_df_norm = normalize_df(csv_df)
+# Load data
+# get_connection() is cached_resource; load_db_table() will call it internally
+db_df_norm = pd.DataFrame() if use_sql else load_db_table()
+csv_df_norm = load_csv(CSV_PATH)
+profile_step("load", db_df=db_df_norm, csv_df=csv_df_norm)
 
 if source == "Database table (DB)":
     df_display = db_df_norm.copy()
 elif source == "CSV file":
     df_display = csv_df_norm.copy()
+elif HAS_RECONCILE:
+    # DB rows plus the CSV rows whose canonical key the DB lacks; only
+    # rows that changed since the last rerun are re-hashed
+    reconciler = get_reconciler(TABLE_NAME)
+    df_display = reconciler.combine(db_df_norm, csv_df_norm, csv_signature=file_signature(CSV_PATH))
+    rstats = reconciler.stats()
+    st.caption(f"Combined: {rstats['db_rows']} DB rows + {rstats['csv_kept']} CSV-only rows "
+               f"({rstats['csv_duplicates']} CSV rows already in the DB).")
 else:
     # Combined: concat and drop duplicates (use 'id' if available)
-    combined = pd.concat([db_df_norm, csv_df_norm], ignore_index=True, sort=False)
+    combined = (
+        concat_frames([db_df_norm, csv_df_norm], ignore_index=True, sort=False) if HAS_FRAMES
+        else pd.concat([db_df_norm, csv_df_norm], ignore_index=True, sort=False)
+    )
     if "id" in combined.columns:
         combined = combined.drop_duplicates(subset=["id"])
     else:
@@ -202,60 +351,92 @@ else:
             combined = combined.drop_duplicates()
     df_display = combined.reset_index(drop=True)
 
+profile_step("normalize", df_display=df_display)
+
 # KPIs
-total = len(df_display)
-open_cnt = int((df_display.get("status") == "Open").sum()) if "status" in df_display.columns else 0
-critical_cnt = int((df_display.get("severity") == "Critical").sum()) if "severity" in df_display.columns else 0
+if use_sql:
+    kpis = run_sql(aggregate, agg_table, {
+        "total": f"SUM({weight})",
+        "open_cnt": f"SUM({weight} * (status = 'Open'))",
+        "critical_cnt": f"SUM({weight} * (severity = 'Critical'))",
+    })
+    total = int(kpis["total"] or 0)
+    open_cnt = int(kpis["open_cnt"] or 0)
+    critical_cnt = int(kpis["critical_cnt"] or 0)
+else:
+    total = len(df_display)
+    open_cnt = int((df_display.get("status") == "Open").sum()) if "status" in df_display.columns else 0
+    critical_cnt = int((df_display.get("severity") == "Critical").sum()) if "severity" in df_display.columns else 0
 
 col1, col2, col3 = st.columns(3)
 col1.metric("Displayed incidents", total)
 col2.metric("Open", open_cnt)
 col3.metric("Critical", critical_cnt)
+profile_step("kpis")
 
 st.divider()
 
+# Filter options: from SQL in DB view, otherwise from the displayed df
+if use_sql:
+    lo, hi = run_sql(value_bounds, agg_table, agg_date)
+    min_date, max_date = pd.to_datetime(lo, errors="coerce"), pd.to_datetime(hi, errors="coerce")
+    date_bounds = None if pd.isna(min_date) or pd.isna(max_date) else (min_date.date(), max_date.date())
+    severity_opts = run_sql(distinct_values, agg_table, "severity")
+    status_opts = run_sql(distinct_values, agg_table, "status")
+else:
+    date_bounds = None
+    if "date" in df_display.columns and not df_display["date"].isna().all():
+        date_bounds = (pd.to_datetime(df_display["date"]).min().date(),
+                       pd.to_datetime(df_display["date"]).max().date())
+    severity_opts = sorted(df_display["severity"].dropna().unique().tolist()) if "severity" in df_display.columns else None
+    status_opts = sorted(df_display["status"].dropna().unique().tolist()) if "status" in df_display.columns else None
+
 # Sidebar filters (applies to displayed df)
 with st.sidebar:
     st.header("Filters")
-    if "date" in df_display.columns and not df_display["date"].isna().all():
-        min_date = pd.to_datetime(df_display["date"]).min().date()
-        max_date = pd.to_datetime(df_display["date"]).max().date()
-        date_range = st.date_input("Date range", value=(min_date, max_date))
+    if date_bounds is not None:
+        date_range = st.date_input("Date range", value=date_bounds)
     else:
         date_range = None
 
-    if "severity" in df_display.columns:
-        avail = sorted(df_display["severity"].dropna().unique().tolist())
-        severity_sel = st.multiselect("Severity", options=avail, default=avail)
+    if severity_opts is not None:
+        severity_sel = st.multiselect("Severity", options=severity_opts, default=severity_opts)
     else:
         severity_sel = []
 
-    if "status" in df_display.columns:
-        avail = sorted(df_display["status"].dropna().unique().tolist())
-        status_sel = st.multiselect("Status", options=avail, default=avail)
+    if status_opts is not None:
+        status_sel = st.multiselect("Status", options=status_opts, default=status_opts)
     else:
         status_sel = []
 
     if st.button("Refresh data"):
         # Clear caches and reload
-        load_db_table.clear()
-        load_csv.clear()
+        reset_db_table()
+        if HAS_QUERY_CACHE:
+            clear_query_cache()
         st.rerun()
 
 # Apply filters
-df_filtered = df_display.copy()
-if date_range is not None and "date" in df_filtered.columns:
-    start_date, end_date = date_range
-    df_filtered = df_filtered[
-        (pd.to_datetime(df_filtered["date"]).dt.date >= start_date)
-        & (pd.to_datetime(df_filtered["date"]).dt.date <= end_date)
-    ]
+if use_sql:
+    isin = {"severity": severity_sel, "status": status_sel}
+    where, params = build_where(date_col="date", date_range=date_range, isin=isin)
+    agg_where, agg_params = build_where(date_col=agg_date, date_range=date_range, isin=isin)
+else:
+    df_filtered = df_display.copy()
+    if date_range is not None and len(date_range) == 2 and "date" in df_filtered.columns:
+        start_date, end_date = date_range
+        df_filtered = df_filtered[
+            (pd.to_datetime(df_filtered["date"]).dt.date >= start_date)
+            & (pd.to_datetime(df_filtered["date"]).dt.date <= end_date)
+        ]
+
+    if severity_sel and "severity" in df_filtered.columns:
+        df_filtered = df_filtered[df_filtered["severity"].isin(severity_sel)]
 
-if severity_sel and "severity" in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered["severity"].isin(severity_sel)]
+    if status_sel and "status" in df_filtered.columns:
+        df_filtered = df_filtered[df_filtered["status"].isin(status_sel)]
 
-if status_sel and "status" in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered["status"].isin(status_sel)]
+profile_step("filter", df_filtered=None if use_sql else df_filtered)
 
 # Charts + table
 st.subheader("Incidents Overview")
@@ -263,19 +444,74 @@ st.subheader("Incidents Overview")
 chart_col, table_col = st.columns((1, 2))
 
 with chart_col:
-    if "severity" in df_filtered.columns and not df_filtered["severity"].isna().all():
-        severity_count = df_filtered["severity"].value_counts()
-        st.bar_chart(severity_count)
+    if use_sql:
+        severity_count = run_sql(count_by, agg_table, "severity", agg_where, agg_params,
+                                 count_expr=f"SUM({weight})")
+        if not severity_count.empty:
+            st.bar_chart(severity_count.set_index("severity")["count"])
+
+        ts = run_sql(count_by_day, agg_table, agg_date, agg_where, agg_params,
+                     count_expr=f"SUM({weight})")
+        if not ts.empty:
+            st.line_chart(ts.set_index("date")["count"])
+    else:
+        if "severity" in df_filtered.columns and not df_filtered["severity"].isna().all():
+            # categoricals also count unused categories; keep observed ones
+            severity_count = df_filtered["severity"].value_counts().loc[lambda c: c > 0]
+            st.bar_chart(severity_count)
+
+        if "date" in df_filtered.columns and not df_filtered["date"].isna().all():
+            ts = df_filtered.groupby(pd.to_datetime(df_filtered["date"]).dt.date).size().rename("count")
+            st.line_chart(ts)
 
-    if "date" in df_filtered.columns and not df_filtered["date"].isna().all():
-        ts = df_filtered.groupby(pd.to_datetime(df_filtered["date"]).dt.date).size().rename("count")
-        st.line_chart(ts)
+profile_step("charts")
 
 with table_col:
-    st.dataframe(df_filtered.reset_index(drop=True), use_container_width=True)
+    if use_sql:
+        n_rows = int(run_sql(aggregate, agg_table, {"n": f"SUM({weight})"}, agg_where, agg_params)["n"] or 0)
+        n_pages = max(1, -(-n_rows // PAGE_SIZE))
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+        offset = (page - 1) * PAGE_SIZE
+        page_df = run_sql(fetch_page, TABLE_NAME, where, params, limit=PAGE_SIZE, offset=offset)
+        st.caption(f"Rows {offset + 1 if n_rows else 0}–{offset + len(page_df)} of {n_rows} (page {page}/{n_pages})")
+        st.dataframe(page_df, use_container_width=True)
+    else:
+        st.dataframe(df_filtered.reset_index(drop=True), use_container_width=True)
 
 with st.expander("Show raw (unfiltered) dataset"):
-    st.write(df_display)
+    if use_sql:
+        st.caption(f"First {PAGE_SIZE} rows of {total}")
+        st.write(run_sql(fetch_page, TABLE_NAME, limit=PAGE_SIZE))
+    else:
+        if HAS_FRAMES:
+            st.caption(f"{len(df_display)} rows, {memory_report(df_display)['bytes'] / 1024:.0f} KiB in memory")
+        st.write(df_display)
+
+profile_step("table")
+
+st.divider()
+
+# Full-text search: ranked matches straight from the FTS5 index in the DB
+st.subheader("🔎 Search incidents")
+if HAS_SEARCH and HAS_PUSHDOWN and run_sql(table_exists, "incidents_fts"):
+    search_text = st.text_input("Search incidents", placeholder="e.g. phishing, or phish* credential")
+    if search_text.strip():
+        n_hits = run_sql(count_incident_matches, search_text, cap=SEARCH_MATCH_CAP)
+        n_hit_pages = max(1, -(-n_hits // SEARCH_PAGE_SIZE))
+        hit_page = st.number_input("Results page", min_value=1, max_value=n_hit_pages, value=1, step=1)
+        hit_offset = (hit_page - 1) * SEARCH_PAGE_SIZE
+        hits = run_sql(search_incidents, search_text, limit=SEARCH_PAGE_SIZE, offset=hit_offset)
+        ranked = n_hits <= RANKED_SEARCH_LIMIT
+        st.caption(f"{n_hits:,}{'+' if n_hits >= SEARCH_MATCH_CAP else ''} matches, "
+                   f"{'best' if ranked else 'newest'} first (page {hit_page}/{n_hit_pages})"
+                   + ("" if ranked else " — add words to rank by relevance"))
+        for hit in hits.itertuples():
+            st.markdown(f"**#{hit.id}** · {str(hit.date)[:10]} · {hit.incident_type} · "
+                        f"{hit.severity} · {hit.status}  \n{hit.snippet}")
+else:
+    st.info("Search needs the full-text index; run `python -m app.data.migrations`.")
+
+profile_step("search")
 
 st.divider()
 
@@ -302,7 +538,7 @@ if can_insert:
                     # insert_incident(conn, title, severity, status, date=...)
                     insert_func(conn, t.strip(), sev, status, date=date_val)
                     st.success("Incident successfully added to the database.")
-                    load_db_table.clear()
+                    load_full_table.clear()  # incremental loader picks the row up itself
                     st.rerun()
                 except Exception as e:
                     st.error(f"Insert failed: {e}")
@@ -312,6 +548,20 @@ else:
         "Ensure the database exists and `insert_incident` is implemented."
     )
 
+profile_step("insert")
+
+# Render profile of this rerun (only when profiling is on)
+render_profile = profiler.finish() if profiler is not None else None
+if render_profile is not None:
+    with st.expander("🐞 Render profile"):
+        summary = f"{render_profile['total_ms']:.0f} ms total"
+        if "peak_kib" in render_profile:
+            summary += f", peak {render_profile['peak_kib'] / 1024:.1f} MiB traced"
+        if "queries" in render_profile:
+            summary += f", {render_profile['queries']} queries ({render_profile['query_ms']:.0f} ms)"
+        st.caption(f"{summary} — appended to {RENDER_TRACE}")
+        st.dataframe(pd.DataFrame(profile_rows(render_profile)), use_container_width=True, hide_index=True)
+
 # Logout button
 st.divider()
 
@@ -16,6 +16,60 @@ from datetime import datetime
 from typing import Optional, Callable
 import inspect
 
+# Incremental DB loading (app.data) — falls back to full reads if unavailable
+try:
+    from app.data.incremental import IncrementalTableLoader  # type: ignore
+    HAS_INCREMENTAL = True
+except Exception:
+    HAS_INCREMENTAL = False
+
+# Arrow snapshots (app.data.snapshots, needs pyarrow) — cold loads start from a memory-mapped copy
+try:
+    from app.data.snapshots import HAS_PYARROW, load_table, snapshot_path  # type: ignore
+    HAS_SNAPSHOTS = HAS_PYARROW
+except Exception:
+    HAS_SNAPSHOTS = False
+
+# Compact dtypes (app.data.frames) — categoricals, downcast ints, dates parsed once
+try:
+    from app.data.frames import optimize_frame, concat_frames, memory_report  # type: ignore
+    HAS_FRAMES = True
+except Exception:
+    HAS_FRAMES = False
+
+# Combined view reconciliation (app.data.reconcile) — canonical keys, incremental row hashes
+try:
+    from app.data.reconcile import file_signature, get_reconciler  # type: ignore
+    HAS_RECONCILE = True
+except Exception:
+    HAS_RECONCILE = False
+
+# Server-side filtering/paging (app.data.filters) — pandas filtering if unavailable
+try:
+    from app.data.db import pooled_connection  # type: ignore
+    from app.data.filters import (  # type: ignore
+        build_where, fetch_page, aggregate, count_by, count_by_day,
+        distinct_values, value_bounds, histogram,
+    )
+    from app.data.rollups import LARGE_DATASET_ROWS, rollup_exists  # type: ignore
+    HAS_PUSHDOWN = True
+except Exception:
+    HAS_PUSHDOWN = False
+
+# Shared query cache (app.data.cache) — invalidated by data-layer writes
+try:
+    from app.data.cache import cached_call, cached_read_csv, clear_query_cache  # type: ignore
+    HAS_QUERY_CACHE = True
+except Exception:
+    HAS_QUERY_CACHE = False
+
+# Render profiling (app.services.profiler) — on with ?profile=1 (or =mem) or APP_PROFILE=1
+try:
+    from app.services.profiler import RENDER_TRACE, profile_rows, start_profiler  # type: ignore
+    HAS_PROFILER = True
+except Exception:
+    HAS_PROFILER = False
+
 # page config
 st.set_page_config(page_title="Datasets Metadata", layout="wide", page_icon="📚")
 
@@ -35,6 +89,8 @@ if not st.session_state.logged_in:
 DB_PATH = Path("DATA") / "intelligence_platform.db"
 CSV_PATH = Path("DATA") / "datasets_metadata.csv"
 TABLE_NAME = "datasets_metadata"
+ROLLUP_NAME = "dataset_rollup"
+PAGE_SIZE = 100
 
 
 # Helper: connect to DB
@@ -76,8 +132,47 @@ def get_connection(db_path: Path = DB_PATH) -> Optional[sqlite3.Connection]:
 
 
 # Load DB table into DataFrame
-@st.cache_data(ttl=60)
+@st.cache_resource
+def get_table_loader(table_name: str):
+    """
+    Process-wide incremental loader. It keeps the table's rows between reruns,
+    already typed (dates parsed, low-cardinality columns categorical), and
+    only fetches rows added or changed since the previous load.
+    """
+    return IncrementalTableLoader(table_name, optimize=True)
+
+
 def load_db_table(table_name: str = TABLE_NAME) -> pd.DataFrame:
+    """
+    Load the named table from the DB through the incremental loader (a cold
+    loader starts from the Arrow snapshot when there is one), otherwise a
+    full read cached for 60 s. Returns the normalize_df() frame, which the
+    loader computes once per change of the table.
+    """
+    if not HAS_INCREMENTAL:
+        return normalize_df(load_full_table(table_name))
+    if not DB_PATH.exists():
+        return normalize_df(load_full_table(table_name))  # shows the "DB not found" warning
+    try:
+        if HAS_SNAPSHOTS:
+            return load_table(get_table_loader(table_name), db_path=DB_PATH, prepare=normalize_df)
+        return get_table_loader(table_name).load(db_path=DB_PATH, prepare=normalize_df)
+    except Exception as e:
+        st.error(f"Failed to read table '{table_name}' from DB: {e}")
+        return pd.DataFrame()
+
+
+def reset_db_table(table_name: str = TABLE_NAME) -> None:
+    """Forget cached DB rows so the next load re-reads the whole table."""
+    if HAS_INCREMENTAL:
+        get_table_loader(table_name).reset()
+    if HAS_SNAPSHOTS:
+        snapshot_path(table_name).unlink(missing_ok=True)  # the full re-read writes a new one
+    load_full_table.clear()
+
+
+@st.cache_data(ttl=60)
+def load_full_table(table_name: str = TABLE_NAME) -> pd.DataFrame:
     conn = get_connection()
     if conn is None:
         return pd.DataFrame()
@@ -97,14 +192,14 @@ def load_db_table(table_name: str = TABLE_NAME) -> pd.DataFrame:
 
 
 # Load CSV
-@st.cache_data(ttl=60)
 def load_csv(path: Path) -> pd.DataFrame:
     if not path.exists():
         st.warning(f"CSV not found at {path}.")
         return pd.DataFrame()
     try:
-        df = pd.read_csv(path)
-        return df
+        if HAS_QUERY_CACHE:
+            return cached_read_csv(path, prepare=normalize_df)  # read and normalized once per file change
+        return normalize_df(pd.read_csv(path))
     except Exception as e:
         st.error(f"Failed to read CSV {path}: {e}")
         return pd.DataFrame()
@@ -173,7 +268,7 @@ def normalize_df(df: pd.DataFrame) -> pd.DataFrame:
         df = df.rename(columns=colmap)
 
     # coerce types
-    if "last_updated" in df.columns:
+    if "last_updated" in df.columns and not HAS_FRAMES:
         try:
             df["last_updated"] = pd.to_datetime(df["last_updated"], errors="coerce")
         except Exception:
@@ -185,15 +280,33 @@ def normalize_df(df: pd.DataFrame) -> pd.DataFrame:
         except Exception:
             pass
 
+    if HAS_FRAMES:
+        df = optimize_frame(df, dates=("last_updated",))
+
     return df
 
 
-# Load data
-db_df = load_db_table()
-csv_df = load_csv(CSV_PATH)
+def query_db(fn, *args, **kwargs):
+    """Run an app.data.filters helper on a pooled connection."""
+    with pooled_connection(DB_PATH) as conn:
+        return fn(conn, *args, **kwargs)
+
+def run_sql(fn, *args, **kwargs):
+    """query_db() through the shared cache; results last until TABLE_NAME is written."""
+    if HAS_QUERY_CACHE:
+        return cached_call((TABLE_NAME,), query_db, fn, *args, **kwargs)
+    return query_db(fn, *args, **kwargs)
+
+
+# Render profiling: times each section of this rerun when enabled
+profiler = start_profiler("datasets_metadata", st.query_params.get("profile")) if HAS_PROFILER else None
+
+
+def profile_step(name, **frames):
+    """End the profiled section `name`, noting the size of any frames it produced."""
+    if profiler is not None:
+        profiler.step(name, **frames)
 
-db_df_norm = normalize_df(db_df)
-csv_df_norm = normalize_df(csv_df)
 
 # UI: choose source
 st.title("📚 Datasets Metadata")
@@ -205,12 +318,32 @@ source = st.radio(
     index=0,
 )
 
+# DB-only view pushes filters, KPIs, charts and paging down to SQL,
+# so the table is never loaded whole into pandas.
+use_sql = HAS_PUSHDOWN and source == "Database table (DB)" and DB_PATH.exists()
+
+# Load data
+db_df_norm = pd.DataFrame() if use_sql else load_db_table()
+csv_df_norm = load_csv(CSV_PATH)
+profile_step("load", db_df=db_df_norm, csv_df=csv_df_norm)
+
 if source == "Database table (DB)":
     df_display = db_df_norm.copy()
 elif source == "CSV file":
     df_display = csv_df_norm.copy()
+elif HAS_RECONCILE:
+    # DB rows plus the CSV rows whose canonical key the DB lacks; only
+    # rows that changed since the last rerun are re-hashed
+    reconciler = get_reconciler(TABLE_NAME)
+    df_display = reconciler.combine(db_df_norm, csv_df_norm, csv_signature=file_signature(CSV_PATH))
+    rstats = reconciler.stats()
+    st.caption(f"Combined: {rstats['db_rows']} DB rows + {rstats['csv_kept']} CSV-only rows "
+               f"({rstats['csv_duplicates']} CSV rows already in the DB).")
 else:
-    combined = pd.concat([db_df_norm, csv_df_norm], ignore_index=True, sort=False)
+    combined = (
+        concat_frames([db_df_norm, csv_df_norm], ignore_index=True, sort=False) if HAS_FRAMES
+        else pd.concat([db_df_norm, csv_df_norm], ignore_index=True, sort=False)
+    )
     # drop duplicates by id or dataset_name+last_updated if available
     if "id" in combined.columns:
         combined = combined.drop_duplicates(subset=["id"])
@@ -226,75 +359,124 @@ else:
             combined = combined.drop_duplicates()
     df_display = combined.reset_index(drop=True)
 
+profile_step("normalize", df_display=df_display)
+
 # KPIs
-total = len(df_display)
-large_count = int((df_display.get("record_count", 0) >= 100000).sum()) if "record_count" in df_display.columns else 0
-unique_categories = int(df_display["category"].nunique()) if "category" in df_display.columns else 0
+if use_sql and run_sql(rollup_exists, ROLLUP_NAME):
+    # one row per category, kept current by triggers (migration 4)
+    kpis = run_sql(aggregate, ROLLUP_NAME, {
+        "total": "SUM(n)",
+        "large_count": "SUM(large_n)",
+        "unique_categories": "COUNT(*)",
+    })
+    total = int(kpis["total"] or 0)
+    large_count = int(kpis["large_count"] or 0)
+    unique_categories = int(kpis["unique_categories"] or 0)
+elif use_sql:
+    kpis = run_sql(aggregate, TABLE_NAME, {
+        "total": "COUNT(*)",
+        "large_count": f"SUM(record_count >= {LARGE_DATASET_ROWS})",
+        "unique_categories": "COUNT(DISTINCT category)",
+    })
+    total = kpis["total"]
+    large_count = int(kpis["large_count"] or 0)
+    unique_categories = int(kpis["unique_categories"] or 0)
+else:
+    total = len(df_display)
+    large_count = int((df_display.get("record_count", 0) >= 100000).sum()) if "record_count" in df_display.columns else 0
+    unique_categories = int(df_display["category"].nunique()) if "category" in df_display.columns else 0
 
 col1, col2, col3 = st.columns(3)
 col1.metric("Displayed datasets", total)
 col2.metric("Large datasets (≥100k rows)", large_count)
 col3.metric("Categories", unique_categories)
+profile_step("kpis")
 
 st.divider()
 
+# Filter options: from SQL in DB view, otherwise from the displayed df
+if use_sql:
+    lo, hi = run_sql(value_bounds, TABLE_NAME, "last_updated")
+    min_date, max_date = pd.to_datetime(lo, errors="coerce"), pd.to_datetime(hi, errors="coerce")
+    date_bounds = None if pd.isna(min_date) or pd.isna(max_date) else (min_date.date(), max_date.date())
+    category_opts = run_sql(distinct_values, TABLE_NAME, "category")
+    source_opts = run_sql(distinct_values, TABLE_NAME, "source")
+    lo, hi = run_sql(value_bounds, TABLE_NAME, "record_count")
+    rows_bounds = (int(lo or 0), int(hi or 0))
+else:
+    date_bounds = None
+    if "last_updated" in df_display.columns and not df_display["last_updated"].isna().all():
+        date_bounds = (pd.to_datetime(df_display["last_updated"]).min().date(),
+                       pd.to_datetime(df_display["last_updated"]).max().date())
+    category_opts = sorted(df_display["category"].dropna().unique().tolist()) if "category" in df_display.columns else None
+    source_opts = sorted(df_display["source"].dropna().unique().tolist()) if "source" in df_display.columns else None
+    rows_bounds = None
+    if "record_count" in df_display.columns:
+        rows_bounds = (int(df_display["record_count"].min() or 0), int(df_display["record_count"].max() or 0))
+
 # Sidebar filters
 with st.sidebar:
     st.header("Filters")
     # date range for last_updated
-    if "last_updated" in df_display.columns and not df_display["last_updated"].isna().all():
-        min_date = pd.to_datetime(df_display["last_updated"]).min().date()
-        max_date = pd.to_datetime(df_display["last_updated"]).max().date()
-        date_range = st.date_input("Last updated range", value=(min_date, max_date))
+    if date_bounds is not None:
+        date_range = st.date_input("Last updated range", value=date_bounds)
     else:
         date_range = None
 
     # category
-    if "category" in df_display.columns:
-        avail = sorted(df_display["category"].dropna().unique().tolist())
-        category_sel = st.multiselect("Category", options=avail, default=avail)
+    if category_opts is not None:
+        category_sel = st.multiselect("Category", options=category_opts, default=category_opts)
     else:
         category_sel = []
 
     # source filter
-    if "source" in df_display.columns:
-        avail = sorted(df_display["source"].dropna().unique().tolist())
-        source_sel = st.multiselect("Source", options=avail, default=avail)
+    if source_opts is not None:
+        source_sel = st.multiselect("Source", options=source_opts, default=source_opts)
     else:
         source_sel = []
 
     # record_count slider (if present)
-    if "record_count" in df_display.columns:
-        max_rows = int(df_display["record_count"].max() or 0)
-        min_rows = int(df_display["record_count"].min() or 0)
+    if rows_bounds is not None:
+        min_rows, max_rows = rows_bounds
         rows_range = st.slider("Record count range", min_value=min_rows, max_value=max_rows, value=(min_rows, max_rows))
     else:
         rows_range = None
 
     if st.button("Refresh data"):
-        load_db_table.clear()
-        load_csv.clear()
+        reset_db_table()
+        if HAS_QUERY_CACHE:
+            clear_query_cache()
         st.rerun()
 
 # Apply filters
-df_filtered = df_display.copy()
+if use_sql:
+    where, params = build_where(
+        date_col="last_updated",
+        date_range=date_range,
+        isin={"category": category_sel, "source": source_sel},
+        ranges={"record_count": rows_range},
+    )
+else:
+    df_filtered = df_display.copy()
 
-if date_range is not None and "last_updated" in df_filtered.columns:
-    start_date, end_date = date_range
-    df_filtered = df_filtered[
-        (pd.to_datetime(df_filtered["last_updated"]).dt.date >= start_date)
-        & (pd.to_datetime(df_filtered["last_updated"]).dt.date <= end_date)
-    ]
+    if date_range is not None and len(date_range) == 2 and "last_updated" in df_filtered.columns:
+        start_date, end_date = date_range
+        df_filtered = df_filtered[
+            (pd.to_datetime(df_filtered["last_updated"]).dt.date >= start_date)
+            & (pd.to_datetime(df_filtered["last_updated"]).dt.date <= end_date)
+        ]
 
-if category_sel and "category" in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered["category"].isin(category_sel)]
+    if category_sel and "category" in df_filtered.columns:
+        df_filtered = df_filtered[df_filtered["category"].isin(category_sel)]
 
-if source_sel and "source" in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered["source"].isin(source_sel)]
+    if source_sel and "source" in df_filtered.columns:
+        df_filtered = df_filtered[df_filtered["source"].isin(source_sel)]
 
-if rows_range is not None and "record_count" in df_filtered.columns:
-    lo, hi = rows_range
-    df_filtered = df_filtered[(df_filtered["record_count"] >= lo) & (df_filtered["record_count"] <= hi)]
+    if rows_range is not None and "record_count" in df_filtered.columns:
+        lo, hi = rows_range
+        df_filtered = df_filtered[(df_filtered["record_count"] >= lo) & (df_filtered["record_count"] <= hi)]
+
+profile_step("filter", df_filtered=None if use_sql else df_filtered)
 
 # Charts + table
 st.subheader("Datasets Overview")
@@ -302,29 +484,62 @@ st.subheader("Datasets Overview")
 chart_col, table_col = st.columns((1, 2))
 
 with chart_col:
-    if "category" in df_filtered.columns and not df_filtered["category"].isna().all():
-        cat_counts = df_filtered["category"].value_counts()
-        st.bar_chart(cat_counts)
-
-    if "record_count" in df_filtered.columns and not df_filtered["record_count"].isna().all():
-        # histogram-like plot via value_counts by binning
-        try:
-            s = df_filtered["record_count"].dropna()
-            bins = pd.cut(s, bins=10)
-            counts = bins.value_counts().sort_index()
-            st.bar_chart(counts)
-        except Exception:
-            pass
-
-    if "last_updated" in df_filtered.columns and not df_filtered["last_updated"].isna().all():
-        ts = df_filtered.groupby(pd.to_datetime(df_filtered["last_updated"]).dt.date).size().rename("count")
-        st.line_chart(ts)
+    if use_sql:
+        cat_counts = run_sql(count_by, TABLE_NAME, "category", where, params)
+        if not cat_counts.empty:
+            st.bar_chart(cat_counts.set_index("category")["count"])
+
+        rows_hist = run_sql(histogram, TABLE_NAME, "record_count", where, params, bins=10)
+        if not rows_hist.empty:
+            labels = [f"{a:,.0f}–{b:,.0f}" for a, b in zip(rows_hist["bin_start"], rows_hist["bin_end"])]
+            st.bar_chart(pd.Series(rows_hist["count"].values, index=labels))
+
+        ts = run_sql(count_by_day, TABLE_NAME, "last_updated", where, params)
+        if not ts.empty:
+            st.line_chart(ts.set_index("date")["count"])
+    else:
+        if "category" in df_filtered.columns and not df_filtered["category"].isna().all():
+            cat_counts = df_filtered["category"].value_counts().loc[lambda c: c > 0]
+            st.bar_chart(cat_counts)
+
+        if "record_count" in df_filtered.columns and not df_filtered["record_count"].isna().all():
+            # histogram-like plot via value_counts by binning
+            try:
+                s = df_filtered["record_count"].dropna()
+                bins = pd.cut(s, bins=10)
+                counts = bins.value_counts().sort_index()
+                st.bar_chart(counts)
+            except Exception:
+                pass
+
+        if "last_updated" in df_filtered.columns and not df_filtered["last_updated"].isna().all():
+            ts = df_filtered.groupby(pd.to_datetime(df_filtered["last_updated"]).dt.date).size().rename("count")
+            st.line_chart(ts)
+
+profile_step("charts")
 
 with table_col:
-    st.dataframe(df_filtered.reset_index(drop=True), use_container_width=True)
+    if use_sql:
+        n_rows = run_sql(aggregate, TABLE_NAME, {"n": "COUNT(*)"}, where, params)["n"]
+        n_pages = max(1, -(-n_rows // PAGE_SIZE))
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+        offset = (page - 1) * PAGE_SIZE
+        page_df = run_sql(fetch_page, TABLE_NAME, where, params, limit=PAGE_SIZE, offset=offset)
+        st.caption(f"Rows {offset + 1 if n_rows else 0}–{offset + len(page_df)} of {n_rows} (page {page}/{n_pages})")
+        st.dataframe(page_df, use_container_width=True)
+    else:
+        st.dataframe(df_filtered.reset_index(drop=True), use_container_width=True)
 
 with st.expander("Show raw (unfiltered) dataset"):
-    st.write(df_display)
+    if use_sql:
+        st.caption(f"First {PAGE_SIZE} rows of {total}")
+        st.write(run_sql(fetch_page, TABLE_NAME, limit=PAGE_SIZE))
+    else:
+        if HAS_FRAMES:
+            st.caption(f"{len(df_display)} rows, {memory_report(df_display)['bytes'] / 1024:.0f} KiB in memory")
+        st.write(df_display)
+
+profile_step("table")
 
 st.divider()
 
@@ -369,8 +584,8 @@ if can_insert:
                         insert_func(name.strip(), category.strip(), source.strip(), str(last_updated), int(record_count), float(file_size_mb))
 
                     st.success("Inserted dataset metadata.")
-                    # clear caches and reload
-                    load_db_table.clear()
+                    # clear caches and reload (incremental loader picks the row up itself)
+                    load_full_table.clear()
                     st.rerun()
                 except Exception as e:
                     st.error(f"Insert failed: {e}")
@@ -380,6 +595,20 @@ else:
         "and implement `insert_dataset_metadata` in app/data/datasets.py (or adjust helper import)."
     )
 
+profile_step("insert")
+
+# Render profile of this rerun (only when profiling is on)
+render_profile = profiler.finish() if profiler is not None else None
+if render_profile is not None:
+    with st.expander("🐞 Render profile"):
+        summary = f"{render_profile['total_ms']:.0f} ms total"
+        if "peak_kib" in render_profile:
+            summary += f", peak {render_profile['peak_kib'] / 1024:.1f} MiB traced"
+        if "queries" in render_profile:
+            summary += f", {render_profile['queries']} queries ({render_profile['query_ms']:.0f} ms)"
+        st.caption(f"{summary} — appended to {RENDER_TRACE}")
+        st.dataframe(pd.DataFrame(profile_rows(render_profile)), use_container_width=True, hide_index=True)
+
 # Logout button
 st.divider()
 if st.button("Log out"):
@@ -24,6 +24,75 @@ try:
 except Exception:
     HAS_ALTAIR = False
 
+# Incremental DB loading (app.data) — falls back to full reads if unavailable
+try:
+    from app.data.incremental import IncrementalTableLoader  # type: ignore
+    HAS_INCREMENTAL = True
+except Exception:
+    HAS_INCREMENTAL = False
+
+# Arrow snapshots (app.data.snapshots, needs pyarrow) — cold loads start from a memory-mapped copy
+try:
+    from app.data.snapshots import HAS_PYARROW, load_table, snapshot_path  # type: ignore
+    HAS_SNAPSHOTS = HAS_PYARROW
+except Exception:
+    HAS_SNAPSHOTS = False
+
+# Compact dtypes (app.data.frames) — categoricals, downcast ints, dates parsed once
+try:
+    from app.data.frames import optimize_frame, concat_frames, memory_report  # type: ignore
+    HAS_FRAMES = True
+except Exception:
+    HAS_FRAMES = False
+
+# Combined view reconciliation (app.data.reconcile) — canonical keys, incremental row hashes
+try:
+    from app.data.reconcile import file_signature, get_reconciler  # type: ignore
+    HAS_RECONCILE = True
+except Exception:
+    HAS_RECONCILE = False
+
+# Server-side filtering/paging (app.data.filters) — pandas filtering if unavailable
+try:
+    from app.data.db import pooled_connection  # type: ignore
+    from app.data.filters import (  # type: ignore
+        build_where, fetch_page, aggregate, count_by_day, count_by_pair,
+        distinct_values, histogram,
+    )
+    from app.data.rollups import rollup_exists  # type: ignore
+    HAS_PUSHDOWN = True
+except Exception:
+    HAS_PUSHDOWN = False
+
+# Full-text search (app.data.tickets, FTS5 index from migration 7)
+try:
+    from app.data.tickets import count_ticket_matches, search_tickets  # type: ignore
+    from app.data.schema import RANKED_SEARCH_LIMIT, table_exists  # type: ignore
+    HAS_SEARCH = True
+except Exception:
+    HAS_SEARCH = False
+
+# Resolution SLA analytics (app.data.analytics) — p50/p90/p99 per priority, assignee, week
+try:
+    from app.data.analytics import bin_hours, resolution_hours, sla_report, sla_report_frame  # type: ignore
+    HAS_ANALYTICS = True
+except Exception:
+    HAS_ANALYTICS = False
+
+# Shared query cache (app.data.cache) — invalidated by data-layer writes
+try:
+    from app.data.cache import cached_call, cached_read_csv, clear_query_cache  # type: ignore
+    HAS_QUERY_CACHE = True
+except Exception:
+    HAS_QUERY_CACHE = False
+
+# Render profiling (app.services.profiler) — on with ?profile=1 (or =mem) or APP_PROFILE=1
+try:
+    from app.services.profiler import RENDER_TRACE, profile_rows, start_profiler  # type: ignore
+    HAS_PROFILER = True
+except Exception:
+    HAS_PROFILER = False
+
 # Page config (set before any writes)
 st.set_page_config(page_title="IT Tickets (DB + CSV)", layout="wide", page_icon="🧰")
 
@@ -43,6 +112,11 @@ if not st.session_state.logged_in:
 DB_PATH = Path("DATA") / "intelligence_platform.db"
 CSV_PATH = Path("DATA") / "it_tickets.csv"
 TABLE_NAME = "it_tickets"
+ROLLUP_NAME = "ticket_rollup"
+PAGE_SIZE = 100
+SEARCH_PAGE_SIZE = 10
+SEARCH_MATCH_CAP = 10_000  # counting stops here; nobody pages further
+RESOLUTION_HOURS_SQL = "(JULIANDAY(resolved_date) - JULIANDAY(created_date)) * 24"
 
 # DB connection helpers (try your app.data.db helper first)
 def connect_via_helper(db_path: Path):
@@ -74,8 +148,47 @@ def get_connection(db_path: Path = DB_PATH) -> Optional[sqlite3.Connection]:
             return None
 
 # Load functions (DB table + CSV)
-@st.cache_data(ttl=60)
+@st.cache_resource
+def get_table_loader(table_name: str):
+    """
+    Process-wide incremental loader. It keeps the table's rows between reruns,
+    already typed (dates parsed, low-cardinality columns categorical), and
+    only fetches rows added or changed since the previous load.
+    """
+    return IncrementalTableLoader(table_name, optimize=True)
+
+
 def load_db_table(table_name: str = TABLE_NAME) -> pd.DataFrame:
+    """
+    Load the named table from the DB through the incremental loader (a cold
+    loader starts from the Arrow snapshot when there is one), otherwise a
+    full read cached for 60 s. Returns the normalize_df() frame, which the
+    loader computes once per change of the table.
+    """
+    if not HAS_INCREMENTAL:
+        return normalize_df(load_full_table(table_name))
+    if not DB_PATH.exists():
+        return normalize_df(load_full_table(table_name))  # shows the "DB not found" warning
+    try:
+        if HAS_SNAPSHOTS:
+            return load_table(get_table_loader(table_name), db_path=DB_PATH, prepare=normalize_df)
+        return get_table_loader(table_name).load(db_path=DB_PATH, prepare=normalize_df)
+    except Exception as e:
+        st.error(f"Failed to read table '{table_name}' from DB: {e}")
+        return pd.DataFrame()
+
+
+def reset_db_table(table_name: str = TABLE_NAME) -> None:
+    """Forget cached DB rows so the next load re-reads the whole table."""
+    if HAS_INCREMENTAL:
+        get_table_loader(table_name).reset()
+    if HAS_SNAPSHOTS:
+        snapshot_path(table_name).unlink(missing_ok=True)  # the full re-read writes a new one
+    load_full_table.clear()
+
+
+@st.cache_data(ttl=60)
+def load_full_table(table_name: str = TABLE_NAME) -> pd.DataFrame:
     conn = get_connection()
     if conn is None:
         return pd.DataFrame()
@@ -92,14 +205,14 @@ def load_db_table(table_name: str = TABLE_NAME) -> pd.DataFrame:
         st.error(f"Failed to read table '{table_name}' from DB: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=60)
 def load_csv(path: Path) -> pd.DataFrame:
     if not path.exists():
         st.warning(f"CSV not found at {path}.")
         return pd.DataFrame()
     try:
-        df = pd.read_csv(path)
-        return df
+        if HAS_QUERY_CACHE:
+            return cached_read_csv(path, prepare=normalize_df)  # read and normalized once per file change
+        return normalize_df(pd.read_csv(path))
     except Exception as e:
         st.error(f"Failed to read CSV {path}: {e}")
         return pd.DataFrame()
@@ -162,6 +275,9 @@ def normalize_df(df: pd.DataFrame) -> pd.DataFrame:
     if colmap:
         df = df.rename(columns=colmap)
 
+    if HAS_FRAMES:
+        return optimize_frame(df, dates=("created_date", "resolved_date"))
+
     # coerce dates
     if "created_date" in df.columns:
         try:
@@ -176,12 +292,26 @@ def normalize_df(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-# Load dataframes
-db_df = load_db_table()
-csv_df = load_csv(CSV_PATH)
+def query_db(fn, *args, **kwargs):
+    """Run an app.data.filters helper on a pooled connection."""
+    with pooled_connection(DB_PATH) as conn:
+        return fn(conn, *args, **kwargs)
+
+def run_sql(fn, *args, **kwargs):
+    """query_db() through the shared cache; results last until TABLE_NAME is written."""
+    if HAS_QUERY_CACHE:
+        return cached_call((TABLE_NAME,), query_db, fn, *args, **kwargs)
+    return query_db(fn, *args, **kwargs)
+
+# Render profiling: times each section of this rerun when enabled
+profiler = start_profiler("it_tickets", st.query_params.get("profile")) if HAS_PROFILER else None
+
+
+def profile_step(name, **frames):
+    """End the profiled section `name`, noting the size of any frames it produced."""
+    if profiler is not None:
+        profiler.step(name, **frames)
 
-db_df_norm = normalize_df(db_df)
-csv_df_norm = normalize_df(csv_df)
 
 # UI: choose source 
 st.title("🧰 IT Tickets")
@@ -193,12 +323,42 @@ source = st.radio(
     index=0
 )
 
+# DB-only view pushes filters, KPIs, charts and paging down to SQL,
+# so the table is never loaded whole into pandas.
+use_sql = HAS_PUSHDOWN and source == "Database table (DB)" and DB_PATH.exists()
+
+# KPIs, filter options, counts and the row count read the trigger-maintained
+# rollup (one row per day/priority/status/assignee) once migration 4 has run;
+# the resolution histogram and the displayed page still read the base table.
+if use_sql and run_sql(rollup_exists, ROLLUP_NAME):
+    agg_table, agg_date, weight = ROLLUP_NAME, "day", "n"
+    avg_hours_sql = "SUM(resolution_hours) / SUM(resolved_n)"
+else:
+    agg_table, agg_date, weight = TABLE_NAME, "created_date", "1"
+    avg_hours_sql = f"AVG({RESOLUTION_HOURS_SQL})"
+
+# Load dataframes
+db_df_norm = pd.DataFrame() if use_sql else load_db_table()
+csv_df_norm = load_csv(CSV_PATH)
+profile_step("load", db_df=db_df_norm, csv_df=csv_df_norm)
+
 if source == "Database table (DB)":
     df_display = db_df_norm.copy()
 elif source == "CSV file":
     df_display = csv_df_norm.copy()
+elif HAS_RECONCILE:
+    # DB rows plus the CSV rows whose canonical key the DB lacks; only
+    # rows that changed since the last rerun are re-hashed
+    reconciler = get_reconciler(TABLE_NAME)
+    df_display = reconciler.combine(db_df_norm, csv_df_norm, csv_signature=file_signature(CSV_PATH))
+    rstats = reconciler.stats()
+    st.caption(f"Combined: {rstats['db_rows']} DB rows + {rstats['csv_kept']} CSV-only rows "
+               f"({rstats['csv_duplicates']} CSV rows already in the DB).")
 else:
-    combined = pd.concat([db_df_norm, csv_df_norm], ignore_index=True, sort=False)
+    combined = (
+        concat_frames([db_df_norm, csv_df_norm], ignore_index=True, sort=False) if HAS_FRAMES
+        else pd.concat([db_df_norm, csv_df_norm], ignore_index=True, sort=False)
+    )
     # dedupe by id or subject+created_date
     if "id" in combined.columns:
         combined = combined.drop_duplicates(subset=["id"])
@@ -216,80 +376,128 @@ else:
             combined = combined.drop_duplicates()
     df_display = combined.reset_index(drop=True)
 
-# KPIs 
-total = len(df_display)
-open_cnt = int((df_display.get("status") == "Open").sum()) if "status" in df_display.columns else 0
-high_priority = 0
-if "priority" in df_display.columns:
-    high_priority = int(df_display[df_display["priority"].isin(["High", "Critical", "P1", "P0"])].shape[0])
+profile_step("normalize", df_display=df_display)
 
+# KPIs 
 avg_resolution = None
-if "created_date" in df_display.columns and "resolved_date" in df_display.columns:
-    resolved_mask = df_display["resolved_date"].notna() & df_display["created_date"].notna()
-    if resolved_mask.any():
-        diffs = (pd.to_datetime(df_display.loc[resolved_mask, "resolved_date"]) - pd.to_datetime(df_display.loc[resolved_mask, "created_date"]))
-        avg_hours = diffs.dt.total_seconds().mean() / 3600.0
-        avg_resolution = round(avg_hours, 1)
+if use_sql:
+    kpis = run_sql(aggregate, agg_table, {
+        "total": f"SUM({weight})",
+        "open_cnt": f"SUM({weight} * (status = 'Open'))",
+        "high_priority": f"SUM({weight} * (priority IN ('High', 'Critical', 'P1', 'P0')))",
+        "avg_hours": avg_hours_sql,
+    })
+    total = int(kpis["total"] or 0)
+    open_cnt = int(kpis["open_cnt"] or 0)
+    high_priority = int(kpis["high_priority"] or 0)
+    if kpis["avg_hours"] is not None:
+        avg_resolution = round(kpis["avg_hours"], 1)
+else:
+    total = len(df_display)
+    open_cnt = int((df_display.get("status") == "Open").sum()) if "status" in df_display.columns else 0
+    high_priority = 0
+    if "priority" in df_display.columns:
+        high_priority = int(df_display[df_display["priority"].isin(["High", "Critical", "P1", "P0"])].shape[0])
+
+    if "created_date" in df_display.columns and "resolved_date" in df_display.columns:
+        resolved_mask = df_display["resolved_date"].notna() & df_display["created_date"].notna()
+        if resolved_mask.any():
+            diffs = (pd.to_datetime(df_display.loc[resolved_mask, "resolved_date"]) - pd.to_datetime(df_display.loc[resolved_mask, "created_date"]))
+            avg_hours = diffs.dt.total_seconds().mean() / 3600.0
+            avg_resolution = round(avg_hours, 1)
 
 col1, col2, col3 = st.columns(3)
 col1.metric("Displayed tickets", total)
 col2.metric("Open tickets", open_cnt)
 col3.metric("Avg resolution (hrs)", avg_resolution if avg_resolution is not None else "N/A")
+profile_step("kpis")
 
 st.divider()
 
+# Filter options: from SQL in DB view, otherwise from the displayed df
+if use_sql:
+    # the rollup stores missing dates/assignees as '' (key columns are NOT NULL)
+    bounds = run_sql(aggregate, agg_table, {
+        "lo": f"MIN(NULLIF({agg_date}, ''))",
+        "hi": f"MAX(NULLIF({agg_date}, ''))",
+    })
+    lo, hi = bounds["lo"], bounds["hi"]
+    min_date, max_date = pd.to_datetime(lo, errors="coerce"), pd.to_datetime(hi, errors="coerce")
+    date_bounds = None if pd.isna(min_date) or pd.isna(max_date) else (min_date.date(), max_date.date())
+    pri_opts = run_sql(distinct_values, agg_table, "priority")
+    st_opts = run_sql(distinct_values, agg_table, "status")
+    assignees = [a for a in run_sql(distinct_values, agg_table, "assigned_to") if a != ""]
+else:
+    date_bounds = None
+    if "created_date" in df_display.columns and not df_display["created_date"].isna().all():
+        date_bounds = (pd.to_datetime(df_display["created_date"]).min().date(),
+                       pd.to_datetime(df_display["created_date"]).max().date())
+    pri_opts = sorted(df_display["priority"].dropna().unique().tolist()) if "priority" in df_display.columns else None
+    st_opts = sorted(df_display["status"].dropna().unique().tolist()) if "status" in df_display.columns else None
+    assignees = sorted(df_display["assigned_to"].dropna().unique().tolist()) if "assigned_to" in df_display.columns else None
+
 # Sidebar filters 
 with st.sidebar:
     st.header("Filters")
 
-    if "created_date" in df_display.columns and not df_display["created_date"].isna().all():
-        min_date = pd.to_datetime(df_display["created_date"]).min().date()
-        max_date = pd.to_datetime(df_display["created_date"]).max().date()
-        date_range = st.date_input("Created date range", value=(min_date, max_date))
+    if date_bounds is not None:
+        date_range = st.date_input("Created date range", value=date_bounds)
     else:
         date_range = None
 
-    if "priority" in df_display.columns:
-        pri_opts = sorted(df_display["priority"].dropna().unique().tolist())
+    if pri_opts is not None:
         priority_sel = st.multiselect("Priority", options=pri_opts, default=pri_opts)
     else:
         priority_sel = []
 
-    if "status" in df_display.columns:
-        st_opts = sorted(df_display["status"].dropna().unique().tolist())
+    if st_opts is not None:
         status_sel = st.multiselect("Status", options=st_opts, default=st_opts)
     else:
         status_sel = []
 
-    if "assigned_to" in df_display.columns:
-        assignees = sorted(df_display["assigned_to"].dropna().unique().tolist())
+    if assignees is not None:
         assigned_sel = st.multiselect("Assigned to", options=assignees, default=assignees)
     else:
         assigned_sel = []
 
     if st.button("Refresh data"):
-        load_db_table.clear()
-        load_csv.clear()
+        reset_db_table()
+        if HAS_QUERY_CACHE:
+            clear_query_cache()
         st.rerun()
 
 # Apply filters
-df_filtered = df_display.copy()
+if use_sql:
+    isin = {"priority": priority_sel, "status": status_sel, "assigned_to": assigned_sel}
+    where, params = build_where(date_col="created_date", date_range=date_range, isin=isin)
+    agg_where, agg_params = build_where(date_col=agg_date, date_range=date_range, isin=isin)
+    # the SQL charts below stand in for df_filtered
+    counts = run_sql(count_by_pair, agg_table, "priority", "status", agg_where, agg_params,
+                     count_expr=f"SUM({weight})")
+    ts = run_sql(count_by_day, agg_table, agg_date, agg_where, agg_params,
+                 count_expr=f"SUM({weight})")
+    ts = ts[ts["date"].fillna("") != ""]
+    hours_hist = run_sql(histogram, TABLE_NAME, RESOLUTION_HOURS_SQL, where, params, bins=25)
+else:
+    df_filtered = df_display.copy()
 
-if date_range is not None and "created_date" in df_filtered.columns:
-    start_date, end_date = date_range
-    df_filtered = df_filtered[
-        (pd.to_datetime(df_filtered["created_date"]).dt.date >= start_date)
-        & (pd.to_datetime(df_filtered["created_date"]).dt.date <= end_date)
-    ]
+    if date_range is not None and len(date_range) == 2 and "created_date" in df_filtered.columns:
+        start_date, end_date = date_range
+        df_filtered = df_filtered[
+            (pd.to_datetime(df_filtered["created_date"]).dt.date >= start_date)
+            & (pd.to_datetime(df_filtered["created_date"]).dt.date <= end_date)
+        ]
 
-if priority_sel and "priority" in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered["priority"].isin(priority_sel)]
+    if priority_sel and "priority" in df_filtered.columns:
+        df_filtered = df_filtered[df_filtered["priority"].isin(priority_sel)]
 
-if status_sel and "status" in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered["status"].isin(status_sel)]
+    if status_sel and "status" in df_filtered.columns:
+        df_filtered = df_filtered[df_filtered["status"].isin(status_sel)]
 
-if assigned_sel and "assigned_to" in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered["assigned_to"].isin(assigned_sel)]
+    if assigned_sel and "assigned_to" in df_filtered.columns:
+        df_filtered = df_filtered[df_filtered["assigned_to"].isin(assigned_sel)]
+
+profile_step("filter", df_filtered=None if use_sql else df_filtered)
 
 # Charts + table (fancier) 
 st.subheader("Tickets Overview")
@@ -297,12 +505,9 @@ st.subheader("Tickets Overview")
 chart_col, table_col = st.columns((1.2, 1.8))
 
 with chart_col:
-    # Stacked bar: Priority vs Status (if both present)
-    if "priority" in df_filtered.columns and "status" in df_filtered.columns:
+    if use_sql:
+        # Same charts, fed by the SQL aggregates computed above
         st.markdown("**Priority × Status**")
-        counts = (df_filtered.groupby(["priority", "status"])
-                  .size()
-                  .reset_index(name="count"))
         if HAS_ALTAIR and not counts.empty:
             chart = alt.Chart(counts).mark_bar().encode(
                 x=alt.X("priority:N", title="Priority", sort=alt.EncodingSortField(field="count", order="descending")),
@@ -311,14 +516,10 @@ with chart_col:
                 tooltip=["priority", "status", "count"]
             ).properties(height=300)
             st.altair_chart(chart, use_container_width=True)
-        else:
-            st.bar_chart(df_filtered["priority"].value_counts())
+        elif not counts.empty:
+            st.bar_chart(counts.groupby("priority")["count"].sum())
 
-    # Time-series: tickets created per day
-    if "created_date" in df_filtered.columns:
         st.markdown("**Tickets created (by day)**")
-        ts = df_filtered.groupby(pd.to_datetime(df_filtered["created_date"]).dt.date).size().rename("count").reset_index()
-        ts.columns = ["date", "count"]
         if HAS_ALTAIR and not ts.empty:
             ts_chart = alt.Chart(ts).mark_line(point=True).encode(
                 x=alt.X("date:T", title="Date"),
@@ -326,37 +527,175 @@ with chart_col:
                 tooltip=["date", "count"]
             ).properties(height=240)
             st.altair_chart(ts_chart, use_container_width=True)
-        else:
+        elif not ts.empty:
             st.line_chart(ts.set_index("date")["count"])
 
-    # Histogram of resolution times (hours)
-    if "created_date" in df_filtered.columns and "resolved_date" in df_filtered.columns:
         st.markdown("**Resolution time (hours)**")
-        mask = df_filtered["resolved_date"].notna() & df_filtered["created_date"].notna()
-        if mask.any():
-            diffs = (pd.to_datetime(df_filtered.loc[mask, "resolved_date"]) - pd.to_datetime(df_filtered.loc[mask, "created_date"]))
-            hours = diffs.dt.total_seconds() / 3600.0
-            hist_df = pd.DataFrame({"hours": hours})
-            if HAS_ALTAIR:
-                hist = alt.Chart(hist_df).transform_bin(
-                    "binned_hours", "hours", bin=alt.Bin(maxbins=25)
-                ).mark_bar().encode(
-                    x=alt.X("binned_hours:Q", title="Resolution hours"),
-                    y=alt.Y("count()", title="Tickets"),
-                    tooltip=[alt.Tooltip("count()", title="Tickets")]
+        if HAS_ALTAIR and not hours_hist.empty:
+            hist = alt.Chart(hours_hist).mark_bar().encode(
+                x=alt.X("bin_start:Q", bin="binned", title="Resolution hours"),
+                x2="bin_end:Q",
+                y=alt.Y("count:Q", title="Tickets"),
+                tooltip=[alt.Tooltip("count:Q", title="Tickets")]
+            ).properties(height=240)
+            st.altair_chart(hist, use_container_width=True)
+        elif not hours_hist.empty:
+            st.bar_chart(hours_hist.set_index(hours_hist["bin_start"].round(1))["count"])
+    else:
+        # Stacked bar: Priority vs Status (if both present)
+        if "priority" in df_filtered.columns and "status" in df_filtered.columns:
+            st.markdown("**Priority × Status**")
+            counts = (df_filtered.groupby(["priority", "status"])
+                      .size()
+                      .reset_index(name="count"))
+            if HAS_ALTAIR and not counts.empty:
+                chart = alt.Chart(counts).mark_bar().encode(
+                    x=alt.X("priority:N", title="Priority", sort=alt.EncodingSortField(field="count", order="descending")),
+                    y=alt.Y("count:Q", title="Count"),
+                    color=alt.Color("status:N", title="Status"),
+                    tooltip=["priority", "status", "count"]
+                ).properties(height=300)
+                st.altair_chart(chart, use_container_width=True)
+            else:
+                st.bar_chart(df_filtered["priority"].value_counts().loc[lambda c: c > 0])
+
+        # Time-series: tickets created per day
+        if "created_date" in df_filtered.columns:
+            st.markdown("**Tickets created (by day)**")
+            ts = df_filtered.groupby(pd.to_datetime(df_filtered["created_date"]).dt.date).size().rename("count").reset_index()
+            ts.columns = ["date", "count"]
+            if HAS_ALTAIR and not ts.empty:
+                ts_chart = alt.Chart(ts).mark_line(point=True).encode(
+                    x=alt.X("date:T", title="Date"),
+                    y=alt.Y("count:Q", title="Tickets"),
+                    tooltip=["date", "count"]
                 ).properties(height=240)
-                st.altair_chart(hist, use_container_width=True)
+                st.altair_chart(ts_chart, use_container_width=True)
+            else:
+                st.line_chart(ts.set_index("date")["count"])
+
+        # Histogram of resolution times (hours)
+        if "created_date" in df_filtered.columns and "resolved_date" in df_filtered.columns:
+            st.markdown("**Resolution time (hours)**")
+            if HAS_ANALYTICS:
+                # bin in pandas so the chart gets 25 counts, not one point per ticket
+                hours_hist = bin_hours(resolution_hours(df_filtered), bins=25)
+                if HAS_ALTAIR and not hours_hist.empty:
+                    hist = alt.Chart(hours_hist).mark_bar().encode(
+                        x=alt.X("bin_start:Q", bin="binned", title="Resolution hours"),
+                        x2="bin_end:Q",
+                        y=alt.Y("count:Q", title="Tickets"),
+                        tooltip=[alt.Tooltip("count:Q", title="Tickets")]
+                    ).properties(height=240)
+                    st.altair_chart(hist, use_container_width=True)
+                elif not hours_hist.empty:
+                    st.bar_chart(hours_hist.set_index(hours_hist["bin_start"].round(1))["count"])
             else:
-                st.bar_chart(pd.cut(hours, bins=10).value_counts().sort_index())
+                mask = df_filtered["resolved_date"].notna() & df_filtered["created_date"].notna()
+                if mask.any():
+                    diffs = (pd.to_datetime(df_filtered.loc[mask, "resolved_date"]) - pd.to_datetime(df_filtered.loc[mask, "created_date"]))
+                    hours = diffs.dt.total_seconds() / 3600.0
+                    hist_df = pd.DataFrame({"hours": hours})
+                    if HAS_ALTAIR:
+                        hist = alt.Chart(hist_df).transform_bin(
+                            "binned_hours", "hours", bin=alt.Bin(maxbins=25)
+                        ).mark_bar().encode(
+                            x=alt.X("binned_hours:Q", title="Resolution hours"),
+                            y=alt.Y("count()", title="Tickets"),
+                            tooltip=[alt.Tooltip("count()", title="Tickets")]
+                        ).properties(height=240)
+                        st.altair_chart(hist, use_container_width=True)
+                    else:
+                        st.bar_chart(pd.cut(hours, bins=10).value_counts().sort_index())
+
+profile_step("charts")
 
 with table_col:
-    st.dataframe(df_filtered.reset_index(drop=True), use_container_width=True)
+    if use_sql:
+        n_rows = int(run_sql(aggregate, agg_table, {"n": f"SUM({weight})"}, agg_where, agg_params)["n"] or 0)
+        n_pages = max(1, -(-n_rows // PAGE_SIZE))
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+        offset = (page - 1) * PAGE_SIZE
+        page_df = run_sql(fetch_page, TABLE_NAME, where, params, limit=PAGE_SIZE, offset=offset)
+        st.caption(f"Rows {offset + 1 if n_rows else 0}–{offset + len(page_df)} of {n_rows} (page {page}/{n_pages})")
+        st.dataframe(page_df, use_container_width=True)
+    else:
+        st.dataframe(df_filtered.reset_index(drop=True), use_container_width=True)
 
 with st.expander("Show raw (unfiltered) dataset"):
-    st.write(df_display)
+    if use_sql:
+        st.caption(f"First {PAGE_SIZE} rows of {total}")
+        st.write(run_sql(fetch_page, TABLE_NAME, limit=PAGE_SIZE))
+    else:
+        if HAS_FRAMES:
+            st.caption(f"{len(df_display)} rows, {memory_report(df_display)['bytes'] / 1024:.0f} KiB in memory")
+        st.write(df_display)
+
+profile_step("table")
 
 st.divider()
 
+# Resolution SLA: nearest-rank percentiles of resolution hours, from one
+# cached SQL scan in DB view or one vectorized pass over the filtered frame
+st.subheader("⏱️ Resolution SLA")
+if HAS_ANALYTICS:
+    sla = sla_report(where, params, DB_PATH) if use_sql else sla_report_frame(df_filtered)
+    if sla["priority"].empty:
+        st.info("No resolved tickets match the current filters.")
+    else:
+        st.caption("p50 / p90 / p99 resolution hours of resolved tickets matching the filters.")
+        by_priority, by_assignee, by_week = st.tabs(["By priority", "By assignee", "By week"])
+        with by_priority:
+            st.dataframe(sla["priority"].round(1), use_container_width=True, hide_index=True)
+        with by_assignee:
+            st.dataframe(sla["assignee"].round(1), use_container_width=True, hide_index=True)
+        with by_week:
+            weekly = sla["week"].round(1)
+            st.line_chart(weekly.set_index("week")[["p50_hours", "p90_hours", "p99_hours"]])
+            st.dataframe(weekly, use_container_width=True, hide_index=True)
+else:
+    st.info("SLA percentiles need app.data.analytics.")
+
+profile_step("sla")
+
+st.divider()
+
+# Full-text search: ranked matches straight from the FTS5 index in the DB
+st.subheader("🔎 Search tickets")
+if HAS_SEARCH and HAS_PUSHDOWN and run_sql(table_exists, "tickets_fts"):
+    search_text = st.text_input("Search tickets", placeholder="e.g. password reset, or vpn*")
+    if search_text.strip():
+        n_hits = run_sql(count_ticket_matches, search_text, cap=SEARCH_MATCH_CAP)
+        n_hit_pages = max(1, -(-n_hits // SEARCH_PAGE_SIZE))
+        hit_page = st.number_input("Results page", min_value=1, max_value=n_hit_pages, value=1, step=1)
+        hit_offset = (hit_page - 1) * SEARCH_PAGE_SIZE
+        hits = run_sql(search_tickets, search_text, limit=SEARCH_PAGE_SIZE, offset=hit_offset)
+        ranked = n_hits <= RANKED_SEARCH_LIMIT
+        st.caption(f"{n_hits:,}{'+' if n_hits >= SEARCH_MATCH_CAP else ''} matches, "
+                   f"{'best' if ranked else 'newest'} first (page {hit_page}/{n_hit_pages})"
+                   + ("" if ranked else " — add words to rank by relevance"))
+        for hit in hits.itertuples():
+            st.markdown(f"**{hit.ticket_id}** · {hit.priority} · {hit.status} · "
+                        f"{hit.assigned_to or 'unassigned'}  \n{hit.snippet}")
+else:
+    st.info("Search needs the full-text index; run `python -m app.data.migrations`.")
+
+profile_step("search")
+
+st.divider()
+
+# Render profile of this rerun (only when profiling is on)
+render_profile = profiler.finish() if profiler is not None else None
+if render_profile is not None:
+    with st.expander("🐞 Render profile"):
+        summary = f"{render_profile['total_ms']:.0f} ms total"
+        if "peak_kib" in render_profile:
+            summary += f", peak {render_profile['peak_kib'] / 1024:.1f} MiB traced"
+        if "queries" in render_profile:
+            summary += f", {render_profile['queries']} queries ({render_profile['query_ms']:.0f} ms)"
+        st.caption(f"{summary} — appended to {RENDER_TRACE}")
+        st.dataframe(pd.DataFrame(profile_rows(render_profile)), use_container_width=True, hide_index=True)
+
 # Logout button
 if st.button("Log out"):
     st.session_state.logged_in = False